@@ -0,0 +1,555 @@
+"""Адміністрування: фонові завдання, імпорт з Excel, бекап і відновлення (blueprint 'admin').
+
+Усі маршрути доступні лише суперадміну.
+"""
+import json
+import os
+import uuid
+from datetime import datetime
+
+from flask import Blueprint, current_app, flash, jsonify, redirect, render_template, request, send_file, url_for
+from flask_login import current_user, login_required
+
+from backup import BackupFormatError, iter_backup, iter_backup_json, open_backup, upsert_rows, write_backup
+from barcodes import backfill as backfill_ean13
+from db_engine import pool_status
+from extensions import author_index, catalog_index, catalog_version, job_runner
+from jobs import remove_old_files
+from loan_history import parse_history
+from models import db, Book, Loan, Reader, Tombstone, User
+from stats import apply as apply_stats, book_delta, rebuild as rebuild_stats
+
+bp = Blueprint('admin', __name__)
+
+# ====== ФОНОВІ ЗАВДАННЯ ======
+# Імпорт, відновлення та експорт виконуються у пулі потоків, маршрут одразу
+# повертає сторінку прогресу /jobs/<id>/view. Файли завдань — у instance/jobs.
+def _job_file(suffix):
+    jobs_path = os.path.join(current_app.instance_path, 'jobs')
+    os.makedirs(jobs_path, exist_ok=True)
+    remove_old_files(jobs_path, current_app.config['JOB_FILE_MAX_AGE'])
+    return os.path.join(jobs_path, f'{uuid.uuid4().hex}{suffix}')
+
+@bp.route('/jobs/<job_id>')
+@login_required
+def job_status(job_id):
+    if current_user.role != 'superadmin':
+        return jsonify({'error': 'forbidden'}), 403
+    job = job_runner.status(job_id)
+    if job is None:
+        return jsonify({'error': 'not found'}), 404
+    return jsonify({
+        'id': job['id'],
+        'kind': job['kind'],
+        'status': job['status'],
+        'processed': job['processed'],
+        'total': job['total'],
+        'error_count': job['error_count'],
+        'errors': job['errors'].split('\n') if job['errors'] else [],
+        'message': job['message'],
+        'download_url': url_for('admin.job_download', job_id=job_id)
+                        if job['status'] == 'done' and job['result_path'] else None,
+    })
+
+@bp.route('/jobs/<job_id>/view')
+@login_required
+def job_view(job_id):
+    if current_user.role != 'superadmin':
+        flash('❌ У вас немає прав!', 'danger')
+        return redirect('/books')
+    job = job_runner.status(job_id)
+    if job is None:
+        flash('❌ Завдання не знайдено!', 'danger')
+        return redirect('/books')
+    return render_template('job.html', job=job)
+
+@bp.route('/jobs/<job_id>/download')
+@login_required
+def job_download(job_id):
+    if current_user.role != 'superadmin':
+        flash('❌ У вас немає прав для завантаження бази даних!', 'danger')
+        return redirect('/books')
+    job = job_runner.status(job_id)
+    if job is None or job['status'] != 'done' or not job['result_path'] or not os.path.exists(job['result_path']):
+        flash('❌ Файл завдання не знайдено (можливо, вже видалено)!', 'danger')
+        return redirect('/books')
+    compressed = job['result_path'].endswith('.gz')
+    return send_file(
+        job['result_path'],
+        as_attachment=True,
+        download_name=f'library_backup_{job["finished_at"].strftime("%Y%m%d_%H%M%S")}.json' + ('.gz' if compressed else ''),
+        mimetype='application/gzip' if compressed else 'application/json'
+    )
+
+# ====== ІМПОРТ З EXCEL ======
+def _index_imported_books(rows):
+    # Кожна закомічена пачка одразу потрапляє в індекси пошуку
+    for row in rows:
+        catalog_index.upsert_row(row['id'], row['name_book'], row['author'], row['ean'], row['stat'])
+        author_index.add(row['author'])
+    # Пачка вже закомічена — списки в браузерах мають оновитись
+    catalog_version.bump()
+
+def _count_imported_books(rows):
+    apply_stats(db.session, [book_delta(row['author'], row['stat']) for row in rows])
+
+def _import_excel_job(progress, path):
+    # openpyxl важкий і потрібен лише тут — імпортуємо при першому імпорті, а не при старті воркера
+    from excel_import import import_books
+
+    try:
+        # Потоково читаємо аркуш і вставляємо книги пачками
+        result = import_books(path, db.session, Book.__table__,
+                              chunk_size=current_app.config['IMPORT_CHUNK_SIZE'],
+                              after_chunk=_index_imported_books,
+                              before_commit=_count_imported_books,
+                              progress=lambda r: progress.update(processed=r.rows, error_count=r.error_count,
+                                                                 errors=r.errors))
+    finally:
+        os.remove(path)
+
+    # Повідомлення про результат
+    message = f"✅ Імпорт завершено! Додано книг: {result.added}"
+    if result.error_count:
+        message += f"\n⚠️ Помилок: {result.error_count}"
+    return {'message': message}
+
+@bp.route('/import-excel', methods=['GET', 'POST'])
+@login_required
+def import_excel():
+    if current_user.role != 'superadmin':
+        flash('❌ У вас немає прав для імпорту даних!', 'danger')
+        return redirect('/books')
+
+    if request.method == 'POST':
+        if 'excel_file' not in request.files:
+            flash('❌ Файл не вибрано!', 'danger')
+            return redirect(request.url)
+
+        file = request.files['excel_file']
+
+        if file.filename == '':
+            flash('❌ Файл не вибрано!', 'danger')
+            return redirect(request.url)
+
+        if file and (file.filename.endswith('.xlsx') or file.filename.endswith('.xls')):
+            # Зберігаємо файл і віддаємо імпорт у фонове завдання
+            path = _job_file('.xlsx')
+            file.save(path)
+            job_id = job_runner.submit('import_excel', _import_excel_job, path, user_id=current_user.id)
+            return redirect(url_for('admin.job_view', job_id=job_id))
+        else:
+            flash('❌ Невірний формат файлу! Потрібен файл .xlsx або .xls', 'danger')
+            return redirect(request.url)
+
+    return render_template('import_excel.html')
+
+# ====== ЕКСПОРТ БАЗИ У JSON (працює і локально, і на сервері) ======
+def _backup_sections(since=None):
+    # Таблиці й колонки бекапу; порядок важливий: видалення застосовуються першими,
+    # видачі посилаються на книги. since — лише рядки, змінені після цього часу (UTC)
+    book, loan, reader, user = Book.__table__, Loan.__table__, Reader.__table__, User.__table__
+    sections = [
+        ('books', db.select(book.c.id, book.c.name_book, book.c.author, book.c.surname, book.c.ean,
+                            book.c.buyer, book.c.phone, book.c.stat, book.c.date, book.c.enddate,
+                            book.c.history, book.c.updated_at)),
+        ('loans', db.select(loan.c.id, loan.c.book_id, loan.c.reader, loan.c.surname, loan.c.phone,
+                            loan.c.start, loan.c.due, loan.c.returned_at, loan.c.notified_at,
+                            loan.c.updated_at)),
+        ('readers', db.select(reader.c.id, reader.c.name, reader.c.surname, reader.c.phone, reader.c.updated_at)),
+        ('users', db.select(user.c.id, user.c.username, user.c.password_hash, user.c.role, user.c.updated_at)),
+    ]
+    if since is None:
+        return [(key, stmt.order_by(stmt.selected_columns.id)) for key, stmt in sections]
+
+    tombstone = Tombstone.__table__
+    deletions = db.select(tombstone.c.table_name, tombstone.c.row_id, tombstone.c.deleted_at).where(
+        tombstone.c.deleted_at > since).order_by(tombstone.c.id)
+    return [('deletions', deletions)] + [
+        (key, stmt.where(stmt.selected_columns.updated_at > since).order_by(stmt.selected_columns.id))
+        for key, stmt in sections
+    ]
+
+def _backup_since(value):
+    # ?since= приймає id попереднього завдання експорту або час ISO (UTC)
+    job = job_runner.status(value) if len(value) == 32 else None
+    if job is not None and job['kind'] == 'export' and job['status'] == 'done':
+        return job['started_at']
+    return datetime.fromisoformat(value)
+
+def _export_database_job(progress, compress, since):
+    snapshot = datetime.utcnow()
+    sections = _backup_sections(since)
+    counts = {key: db.session.execute(db.select(db.func.count()).select_from(stmt.order_by(None).subquery())).scalar()
+              for key, stmt in sections}
+    progress.update(total=sum(counts.values()))
+
+    header = {'type': 'full' if since is None else 'delta', 'snapshot': snapshot.isoformat()}
+    if since is not None:
+        header['since'] = since.isoformat()
+
+    # JSON пишеться у файл частинами, поки таблиці читаються пачками
+    path = _job_file('.json.gz' if compress else '.json')
+    write_backup(path, iter_backup_json(db.session, sections, header=header, on_row=progress.advance), compress)
+
+    kind = 'Експортовано' if since is None else f'Експортовано зміни з {since.strftime("%d.%m.%Y %H:%M")} (UTC)'
+    message = f"📥 {kind}: {counts['books']} книг, {counts['loans']} видач, {counts['readers']} читачів, {counts['users']} користувачів"
+    if since is not None:
+        message += f", {counts['deletions']} видалень"
+    print(message)
+    message += f"\n🆔 Наступний дельта-бекап: ?since={progress.job_id}"
+    return {'message': message, 'result_path': path}
+
+@bp.route('/download-db-secret-12345')
+@login_required
+def download_database():
+    if current_user.role != 'superadmin':
+        flash('❌ У вас немає прав для завантаження бази даних!', 'danger')
+        return redirect('/books')
+
+    # ?gzip=1 — стиснути бекап (restore_database приймає обидва варіанти)
+    compress = request.args.get('gzip') == '1'
+    # ?since=<id завдання експорту або час ISO, UTC> — лише зміни після нього
+    since = None
+    if request.args.get('since'):
+        try:
+            since = _backup_since(request.args['since'])
+        except ValueError:
+            flash('❌ Невірний параметр since: потрібен id попереднього бекапу або дата ISO', 'danger')
+            return redirect('/books')
+
+    job_id = job_runner.submit('export', _export_database_job, compress, since, user_id=current_user.id)
+    return redirect(url_for('admin.job_view', job_id=job_id))
+
+# ====== ІМПОРТ БАЗИ З JSON (працює і локально, і на сервері) ======
+def _reset_sequences():
+    # Після вставки з явними id лічильники PostgreSQL треба підтягнути до MAX(id)
+    for table in ('book', 'reader', 'user', 'loan'):
+        db.session.execute(db.text(f"""
+            SELECT setval(pg_get_serial_sequence('{table}', 'id'),
+                   COALESCE((SELECT MAX(id) FROM "{table}"), 0) + 1, false);
+        """))
+    db.session.commit()
+
+def _parse_datetime(value, default=None):
+    return datetime.fromisoformat(value) if value else default
+
+def _book_row(data):
+    return {
+        'id': int(data['id']),
+        'name_book': data.get('name_book', ''),
+        'author': data.get('author', ''),
+        'surname': data.get('surname', ''),
+        'ean': data.get('ean', ''),
+        'buyer': data.get('buyer', ''),
+        'phone': data.get('phone', ''),
+        'stat': data.get('stat', 'доступна'),
+        'date': _parse_datetime(data.get('date'), datetime.utcnow()),
+        'enddate': _parse_datetime(data.get('enddate'), datetime.utcnow()),
+        'history': data.get('history', ''),
+        'updated_at': _parse_datetime(data.get('updated_at'), datetime.utcnow())
+    }
+
+def _loan_row(data):
+    return {
+        'id': int(data['id']),
+        'book_id': int(data['book_id']),
+        'reader': data.get('reader', ''),
+        'surname': data.get('surname', ''),
+        'phone': data.get('phone', ''),
+        'start': _parse_datetime(data.get('start')),
+        'due': _parse_datetime(data.get('due')),
+        'returned_at': _parse_datetime(data.get('returned_at')),
+        'notified_at': _parse_datetime(data.get('notified_at')),
+        'updated_at': _parse_datetime(data.get('updated_at'), datetime.utcnow())
+    }
+
+def _reader_row(data):
+    return {
+        'id': int(data['id']),
+        'name': data.get('name', ''),
+        'surname': data.get('surname', ''),
+        'phone': data.get('phone', ''),
+        'updated_at': _parse_datetime(data.get('updated_at'), datetime.utcnow())
+    }
+
+def _deletion_row(data):
+    if data.get('table_name') not in ('book', 'reader'):
+        raise ValueError(f"невідома таблиця {data.get('table_name')}")
+    return {
+        'table_name': data['table_name'],
+        'row_id': int(data['row_id']),
+        'deleted_at': _parse_datetime(data.get('deleted_at'), datetime.utcnow())
+    }
+
+def _apply_deletions(session, table, rows):
+    # Видалення з дельта-бекапу: прибираємо рядки й зберігаємо надгробки для наступних дельт
+    book_ids = [row['row_id'] for row in rows if row['table_name'] == 'book']
+    reader_ids = [row['row_id'] for row in rows if row['table_name'] == 'reader']
+    if book_ids:
+        session.execute(db.delete(Loan.__table__).where(Loan.__table__.c.book_id.in_(book_ids)))
+        session.execute(db.delete(Book.__table__).where(Book.__table__.c.id.in_(book_ids)))
+    if reader_ids:
+        session.execute(db.delete(Reader.__table__).where(Reader.__table__.c.id.in_(reader_ids)))
+    if rows:
+        session.execute(db.insert(table), rows)
+
+def _restore_users(users_data, user_id):
+    # Користувачі зіставляються за username одним запитом; того, хто відновлює, не чіпаємо
+    users_data = [data for data in users_data if data.get('id') != user_id]
+    if not users_data:
+        return 0
+    user = User.__table__
+    existing = set(db.session.execute(
+        db.select(user.c.username).where(user.c.username.in_([data.get('username', '') for data in users_data]))
+    ).scalars())
+
+    updates = [{'b_username': data.get('username', ''),
+                'b_password_hash': data.get('password_hash', ''),
+                'b_role': data.get('role', 'admin')}
+               for data in users_data if data.get('username', '') in existing]
+    inserts = [{'id': int(data['id']),
+                'username': data.get('username', ''),
+                'password_hash': data.get('password_hash', ''),
+                'role': data.get('role', 'admin'),
+                'updated_at': _parse_datetime(data.get('updated_at'), datetime.utcnow())}
+               for data in users_data if data.get('username', '') not in existing]
+    if updates:
+        db.session.execute(
+            user.update().where(user.c.username == db.bindparam('b_username'))
+                .values(password_hash=db.bindparam('b_password_hash'), role=db.bindparam('b_role')),
+            updates)
+    upsert_rows(db.session, user, inserts)
+    return len(updates) + len(inserts)
+
+def _restore_legacy_history(book_ids):
+    # Стара копія без таблиці loan — розбираємо рядки history відновлених книг
+    restored = 0
+    for start in range(0, len(book_ids), current_app.config['IMPORT_CHUNK_SIZE']):
+        batch = book_ids[start:start + current_app.config['IMPORT_CHUNK_SIZE']]
+        books = db.session.query(Book.id, Book.history).filter(
+            Book.id.in_(batch), ~db.exists().where(Loan.book_id == Book.id))
+        rows = [dict(book_id=book_id, **entry) for book_id, history in books for entry in parse_history(history)]
+        if rows:
+            db.session.execute(db.insert(Loan.__table__), rows)
+            restored += len(rows)
+    return restored
+
+def _clear_database(user_id):
+    # Надгробки для всіх книг і читачів — дельта-бекап після очищення має прибрати їх і в копії
+    tombstone = Tombstone.__table__
+    deleted_at = db.literal(datetime.utcnow(), db.DateTime)
+    for table_name, model in (('book', Book), ('reader', Reader)):
+        db.session.execute(db.insert(tombstone).from_select(
+            ['table_name', 'row_id', 'deleted_at'], db.select(db.literal(table_name), model.id, deleted_at)))
+
+    # Видаляємо всі книги, історію видач та читачів
+    Loan.query.delete()
+    Book.query.delete()
+    Reader.query.delete()
+
+    # Видаляємо всіх користувачів КРІМ того, хто запустив відновлення
+    User.query.filter(User.id != user_id).delete()
+    # Без коміту: очищення фіксується разом з імпортом, а битий файл відкочує все
+    print("🗑️ База даних очищена перед імпортом")
+
+def _restore_database_job(progress, path, clear_before_import, user_id):
+    stats = {
+        'books_restored': 0,
+        'readers_restored': 0,
+        'users_restored': 0,
+        'loans_restored': 0,
+        'deletions_applied': 0,
+        'errors': []
+    }
+
+    # Ключ у бекапі -> (таблиця, перетворення запису, запис пачки, лічильник, назва для помилок)
+    sections = {
+        'deletions': (Tombstone.__table__, _deletion_row, _apply_deletions, 'deletions_applied', 'Видалення'),
+        'books': (Book.__table__, _book_row, upsert_rows, 'books_restored', 'Книга'),
+        'loans': (Loan.__table__, _loan_row, upsert_rows, 'loans_restored', 'Видача'),
+        'readers': (Reader.__table__, _reader_row, upsert_rows, 'readers_restored', 'Читач'),
+    }
+    chunks = {key: [] for key in sections}
+    header = {}
+    users_data = []
+    history_book_ids = []
+    has_loans = False
+    started = False
+    current_key = None
+    chunk_size = current_app.config['IMPORT_CHUNK_SIZE']
+
+    def flush(key):
+        table, _, write, counter, _ = sections[key]
+        write(db.session, table, chunks[key])
+        stats[counter] += len(chunks[key])
+        chunks[key] = []
+
+    def start():
+        # Заголовок уже прочитано: дельту можна накладати лише на наявну базу
+        if header.get('type') == 'delta' and clear_before_import:
+            raise ValueError('Дельта-бекап накладається на повний — не вмикайте очищення бази!')
+        if clear_before_import:
+            _clear_database(user_id)
+
+    # Файл читаємо потоково, записи пишемо пачками в порядку розділів файлу
+    try:
+        with open_backup(path) as f:
+            for key, data in iter_backup(f):
+                if not isinstance(data, dict):
+                    header[key] = data
+                    continue
+                if not started:
+                    start()
+                    started = True
+                if key != current_key:
+                    if current_key in sections:
+                        flush(current_key)
+                    current_key = key
+                progress.advance()
+                if key == 'users':
+                    users_data.append(data)
+                    continue
+                if key not in sections:
+                    continue
+                _, build, _, _, label = sections[key]
+                try:
+                    row = build(data)
+                except Exception as e:
+                    stats['errors'].append(f"{label} {data.get('id', data.get('row_id'))}: {str(e)}")
+                    continue
+                if key == 'loans':
+                    has_loans = True
+                elif key == 'books' and row['history']:
+                    history_book_ids.append(row['id'])
+                chunks[key].append(row)
+                if len(chunks[key]) >= chunk_size:
+                    flush(key)
+    except (json.JSONDecodeError, BackupFormatError, UnicodeDecodeError, EOFError, OSError):
+        db.session.rollback()
+        raise ValueError('Невірний формат JSON файлу!')
+    finally:
+        os.remove(path)
+
+    if not started:
+        start()
+    for key in sections:
+        flush(key)
+    if not has_loans and history_book_ids and 'type' not in header:
+        # Копія, зроблена до появи таблиці loan
+        stats['loans_restored'] += _restore_legacy_history(history_book_ids)
+    stats['users_restored'] = _restore_users(users_data, user_id)
+    # ean13 у бекап не пишеться — перераховуємо з ean відновлених книг
+    _, ean_conflicts = backfill_ean13(db.session, Book.__table__)
+    if ean_conflicts:
+        stats['errors'].append(f"EAN: {len(ean_conflicts)} книг мають код, який уже має інша книга — "
+                               f"код не прив'язано (напр. книга {ean_conflicts[0][0]}: \"{ean_conflicts[0][1]}\")")
+
+    if clear_before_import:
+        # Відновлені рядки нові для бази: дельта-бекап має передати їх слідом за надгробками очищення
+        restored_at = datetime.utcnow()
+        for table in (Book.__table__, Loan.__table__, Reader.__table__):
+            db.session.execute(db.update(table).values(updated_at=restored_at))
+
+    # Розділи бекапу перезаписують книги й видачі довільно — лічильники перераховуємо з нуля
+    rebuild_stats(db.session)
+
+    # Комітимо всі зміни
+    db.session.commit()
+    # Після відновлення індекс перебудується при наступному пошуку
+    catalog_index.invalidate()
+    author_index.invalidate()
+    catalog_version.bump(reset=True)
+
+    print(f"📤 Імпортовано: {stats['books_restored']} книг, {stats['readers_restored']} читачів, {stats['users_restored']} користувачів")
+
+    # Виправляємо sequences тільки для PostgreSQL (один раз, після всіх вставок)
+    if 'postgresql' in current_app.config['SQLALCHEMY_DATABASE_URI']:
+        try:
+            _reset_sequences()
+            print("✅ PostgreSQL sequences виправлено автоматично")
+        except Exception as e:
+            db.session.rollback()
+            print(f"⚠️ Помилка виправлення sequences: {str(e)}")
+
+    progress.update(error_count=len(stats['errors']), errors=stats['errors'])
+
+    # Повідомлення про результат
+    action = "повністю замінено" if clear_before_import else "оновлено"
+    if header.get('type') == 'delta':
+        action = "оновлено змінами з дельта-бекапу"
+    message = f"✅ База даних {action}! Відновлено: Книг: {stats['books_restored']}, Видач: {stats['loans_restored']}, Читачів: {stats['readers_restored']}, Користувачів: {stats['users_restored']}"
+    if stats['deletions_applied']:
+        message += f", Видалень: {stats['deletions_applied']}"
+    if stats['errors']:
+        message += f"\n⚠️ Помилки: {len(stats['errors'])}"
+    return {'message': message}
+
+@bp.route('/restore-db-secret-54321', methods=['GET', 'POST'])
+@login_required
+def restore_database():
+    if current_user.role != 'superadmin':
+        flash('❌ У вас немає прав для відновлення бази даних!', 'danger')
+        return redirect('/books')
+
+    if request.method == 'POST':
+        if 'database' not in request.files:
+            flash('❌ Файл не вибрано!', 'danger')
+            return redirect(request.url)
+
+        file = request.files['database']
+
+        if file.filename == '':
+            flash('❌ Файл не вибрано!', 'danger')
+            return redirect(request.url)
+
+        # Перевіряємо чи треба очистити базу перед імпортом
+        clear_before_import = request.form.get('clear_db') == 'yes'
+
+        if file and (file.filename.endswith('.json') or file.filename.endswith('.json.gz')):
+            # Зберігаємо файл і віддаємо відновлення у фонове завдання
+            path = _job_file('.json')
+            file.save(path)
+            job_id = job_runner.submit('restore', _restore_database_job, path, clear_before_import,
+                                       current_user.id, user_id=current_user.id)
+            return redirect(url_for('admin.job_view', job_id=job_id))
+        else:
+            flash('❌ Невірний формат файлу! Потрібен файл .json або .json.gz', 'danger')
+            return redirect(request.url)
+
+    return render_template('restore_db.html')
+
+# ====== ВИПРАВЛЕННЯ SEQUENCES (тільки для PostgreSQL) ======
+@bp.route('/fix-sequences-secret-88888')
+@login_required
+def fix_sequences():
+    if current_user.role != 'superadmin':
+        flash('❌ У вас немає прав!', 'danger')
+        return redirect('/books')
+
+    # Перевірка чи це PostgreSQL
+    if 'postgresql' not in current_app.config['SQLALCHEMY_DATABASE_URI']:
+        flash('⚠️ Ця функція тільки для PostgreSQL. SQLite не потребує виправлення sequences.', 'info')
+        return redirect('/books')
+
+    try:
+        _reset_sequences()
+
+        flash('✅ Послідовності ID успішно виправлено!', 'success')
+        return redirect('/books')
+
+    except Exception as e:
+        db.session.rollback()
+        flash(f'❌ Помилка: {str(e)}', 'danger')
+        return redirect('/books')
+
+
+
+
+# ====== СТАН ПУЛУ З'ЄДНАНЬ ======
+@bp.route('/pool-stats')
+@login_required
+def pool_stats():
+    if current_user.role != 'superadmin':
+        return jsonify({'error': 'forbidden'}), 403
+    return jsonify(pool_status(db.engine))
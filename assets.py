@@ -0,0 +1,174 @@
+"""Статичні ресурси: бандли CSS/JS і логотипи з хешем вмісту в імені файлу.
+
+Спільні стилі й скрипти шаблонів лежать у static/src/ і збираються в
+static/dist/ (BUNDLES): app.<хеш>.css, app.<хеш>.js, а поруч — стиснені
+заздалегідь .gz-варіанти. Логотипи копіюються туди ж з хешем (IMAGES).
+manifest.json зіставляє логічну назву з файлом, а шаблони беруть посилання
+через asset_url('app.css').
+
+Ім'я змінюється разом із вмістом, тож /assets/ віддає файли з
+Cache-Control: immutable на рік — повторні перегляди сторінок тягнуть лише
+дані. Збирає лише flask build-assets (bin/post_compile на кроці збирання): create_app()
+тільки читає маніфест і нічого не пише в дерево коду. Якщо маніфесту немає
+або джерела новіші за нього, посилання ведуть на незібрані файли: логотипи —
+на /static/, бандли — на /assets/app.css, що склеюється з джерел на льоту
+без довгого кешування.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+
+import click
+from flask import abort, current_app, make_response, request, send_file, url_for
+from flask.cli import with_appcontext
+
+from compression import COMPRESSIBLE_MIMETYPES
+
+logger = logging.getLogger(__name__)
+
+# Логічна назва -> джерела (шляхи від static/), склеюються в цьому порядку
+BUNDLES = {
+    'app.css': ['css/main.css', 'src/css/layout.css', 'src/css/catalog.css', 'src/css/forms.css'],
+    'app.js': ['src/js/autocomplete.js', 'src/js/pages.js'],
+}
+IMAGES = ['image/logotyp.jpg', 'image/logotyp2.jpg', 'image/logotyp3.jpg']
+
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+MAX_AGE = 365 * 24 * 3600
+
+
+def _fingerprint(name, content):
+    stem, ext = os.path.splitext(os.path.basename(name))
+    prefix = os.path.dirname(name)
+    hashed = f'{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}'
+    return f'{prefix}/{hashed}' if prefix else hashed
+
+
+def _mimetype(filename):
+    return mimetypes.guess_type(filename)[0]
+
+
+def _write(path, content):
+    # Атомарно: запущений сервер може читати dist під час збирання
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def _bundle(static_folder, name):
+    parts = []
+    for source in BUNDLES[name]:
+        with open(os.path.join(static_folder, source), 'rb') as f:
+            parts.append(f'/* {source} */\n'.encode('utf-8') + f.read().rstrip() + b'\n')
+    return b'\n'.join(parts)
+
+
+def build(static_folder):
+    """Збирає бандли й логотипи в static/dist; повертає маніфест {назва: файл}."""
+    dist = os.path.join(static_folder, DIST_DIR)
+    outputs = {name: _bundle(static_folder, name) for name in BUNDLES}
+    for name in IMAGES:
+        with open(os.path.join(static_folder, name), 'rb') as f:
+            outputs[name] = f.read()
+
+    manifest = {}
+    keep = {MANIFEST}
+    for name, content in outputs.items():
+        filename = _fingerprint(name, content)
+        manifest[name] = filename
+        keep.add(filename)
+        path = os.path.join(dist, filename)
+        if not os.path.exists(path):
+            _write(path, content)
+        if _mimetype(filename) in COMPRESSIBLE_MIMETYPES:
+            keep.add(filename + '.gz')
+            if not os.path.exists(path + '.gz'):
+                _write(path + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+
+    # Старі версії більше не згадуються в шаблонах
+    for root, _, files in os.walk(dist):
+        for file in files:
+            relative = os.path.relpath(os.path.join(root, file), dist).replace(os.sep, '/')
+            if relative not in keep:
+                os.remove(os.path.join(root, file))
+
+    _write(os.path.join(dist, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+def _sources(static_folder):
+    return [os.path.join(static_folder, source) for sources in BUNDLES.values() for source in sources] + \
+        [os.path.join(static_folder, name) for name in IMAGES]
+
+
+class Assets:
+    def __init__(self):
+        self.manifest = {}
+        self.dist = None
+        self.static_folder = None
+
+    def init_app(self, app):
+        self.static_folder = app.static_folder
+        self.dist = os.path.join(app.static_folder, DIST_DIR)
+        self.manifest = self._load(app.static_folder)
+        app.add_url_rule('/assets/<path:filename>', 'assets', self.serve)
+        app.add_template_global(self.url, 'asset_url')
+        app.cli.add_command(build_assets_command)
+
+    def _load(self, static_folder):
+        path = os.path.join(self.dist, MANIFEST)
+        try:
+            built_at = os.path.getmtime(path)
+            if all(os.path.getmtime(source) <= built_at for source in _sources(static_folder)):
+                with open(path, encoding='utf-8') as f:
+                    return json.load(f)
+        except (OSError, ValueError):
+            pass
+        logger.warning('Маніфест ресурсів відсутній або застарів — віддаємо незібрані файли; '
+                       'зберіть їх командою flask build-assets')
+        return {}
+
+    def url(self, name):
+        if name in self.manifest:
+            return url_for('assets', filename=self.manifest[name])
+        # Без маніфесту: бандл склеюється в serve(), решта — звичайні статичні файли
+        if name in BUNDLES:
+            return url_for('assets', filename=name)
+        return url_for('static', filename=name)
+
+    def serve(self, filename):
+        if filename in BUNDLES and filename not in self.manifest:
+            # Ім'я без хешу — вміст може змінитися, тож браузер перепитує щоразу
+            response = make_response(_bundle(self.static_folder, filename))
+            response.mimetype = _mimetype(filename)
+            response.cache_control.no_cache = True
+            return response
+        if filename not in self.manifest.values():
+            abort(404)
+        path = os.path.join(self.dist, filename)
+        mimetype = _mimetype(filename)
+        if os.path.exists(path + '.gz') and request.accept_encodings.best_match(['gzip']) == 'gzip':
+            response = send_file(path + '.gz', mimetype=mimetype, max_age=MAX_AGE)
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = send_file(path, mimetype=mimetype, max_age=MAX_AGE)
+        if mimetype in COMPRESSIBLE_MIMETYPES:
+            response.vary.add('Accept-Encoding')
+        # Вміст за цим іменем ніколи не зміниться
+        response.cache_control.immutable = True
+        return response
+
+
+@click.command('build-assets')
+@with_appcontext
+def build_assets_command():
+    """Зібрати CSS/JS-бандли й логотипи в static/dist."""
+    manifest = build(current_app.static_folder)
+    for name, filename in sorted(manifest.items()):
+        click.echo(f'📦 {name} -> {DIST_DIR}/{filename}')
@@ -0,0 +1,89 @@
+"""Вхід, вихід і реєстрація користувачів (blueprint 'auth')."""
+from flask import Blueprint, current_app, flash, redirect, render_template, request, url_for
+from flask_login import current_user, login_required, login_user, logout_user
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from models import db, User
+
+bp = Blueprint('auth', __name__)
+
+_DUMMY_PASSWORD_HASH = None
+
+def _dummy_password_hash():
+    # Хеш-заглушка для вирівнювання часу відповіді при невідомому логіні
+    global _DUMMY_PASSWORD_HASH
+    if _DUMMY_PASSWORD_HASH is None:
+        _DUMMY_PASSWORD_HASH = generate_password_hash('dummy-password')
+    return _DUMMY_PASSWORD_HASH
+
+@bp.route('/login', methods=['GET', 'POST'])
+def login():
+    if current_user.is_authenticated:
+        return redirect(url_for('library.books'))
+
+    if request.method == 'POST':
+        username = request.form.get('username', '').strip()
+        password = request.form['password']
+        user_found = None
+
+        if username:
+            # Одна перевірка хешу на спробу: шукаємо акаунт за унікальним логіном
+            user = User.query.filter_by(username=username).first()
+            if user:
+                if user.check_password(password):
+                    user_found = user
+            else:
+                # Невідомий логін коштує стільки ж, скільки і неправильний пароль
+                check_password_hash(_dummy_password_hash(), password)
+        elif current_app.config['PASSWORD_ONLY_LOGIN']:
+            # Перехідний режим для старої форми "тільки пароль" (O(N) хешів)
+            for user in User.query.all():
+                if user.check_password(password):
+                    user_found = user
+                    break
+            if user_found:
+                flash(f'ℹ️ Наступного разу вкажіть логін: {user_found.username}', 'info')
+        else:
+            flash('⚠️ Введіть логін і пароль', 'warning')
+            return render_template('login.html')
+
+        if user_found:
+            login_user(user_found)
+            next_page = request.args.get('next')
+            return redirect(next_page) if next_page else redirect(url_for('library.books'))
+        else:
+            flash('Неправильний логін або пароль', 'danger')
+
+    return render_template('login.html')
+
+@bp.route('/logout')
+@login_required
+def logout():
+    logout_user()
+    return redirect(url_for('library.books'))
+
+@bp.route('/register', methods=['GET', 'POST'])
+def register():
+    if current_user.is_authenticated:
+        return redirect(url_for('library.books'))
+    
+    if request.method == 'POST':
+        username = request.form['username']
+        password = request.form['password']
+        
+        if User.query.filter_by(username=username).first():
+            flash('Користувач з таким іменем вже існує', 'danger')
+            return render_template('register.html')
+        
+        user = User(username=username)
+        user.set_password(password)
+        
+        try:
+            db.session.add(user)
+            db.session.commit()
+            flash('Реєстрація успішна! Тепер ви можете увійти.', 'success')
+            return redirect(url_for('auth.login'))
+        except:
+            flash('Помилка при реєстрації', 'danger')
+    
+    return render_template('register.html')
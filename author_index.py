@@ -0,0 +1,127 @@
+"""Словник авторів у пам'яті воркера для автопідказок.
+
+Відсортований масив імен (за нижнім регістром) дає пошук за префіксом
+через bisect; якщо префіксних збігів менше за ліміт, решту добираємо
+пошуком підрядка. Порядок результатів такий самий, як у старого
+search_authors(): спершу ті, що починаються з запиту, далі за алфавітом.
+
+Як і індекс каталогу, словник стежить за версією каталогу: якщо її
+збільшив інший процес, словник перечитується перед наступним пошуком.
+Свої зміни процес вносить у словник (add / remove / replace) до bump(),
+тож caught_up() лише переносить словник на записану ним версію — якщо
+між ними не було чужих змін, перечитувати нічого не треба.
+"""
+import bisect
+import threading
+import time
+
+
+class AuthorIndex:
+    def __init__(self, loader, max_age=0, state=None, on_use=None):
+        # loader() повертає ітерацію пар (author, кількість книг); state() — CatalogState або None
+        self._loader = loader
+        self._max_age = max_age
+        self._state = state
+        # on_use(version) — після кожної синхронізації перед пошуком (ETag відповіді)
+        self._on_use = on_use
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._counts = {}
+        self._keys = []      # (author.lower(), author), відсортовано
+        self.built_at = None
+        self.version = None
+
+    @property
+    def is_built(self):
+        return self.built_at is not None
+
+    def __len__(self):
+        return len(self._keys)
+
+    # ====== ПОБУДОВА ======
+    def rebuild(self, state=None):
+        with self._lock:
+            self._reset()
+            for author, count in self._loader():
+                if author:
+                    self._counts[author] = self._counts.get(author, 0) + count
+            self._keys = sorted((author.lower(), author) for author in self._counts)
+            self.built_at = time.monotonic()
+            self.version = state.version if state is not None else None
+
+    def ensure_built(self):
+        state = self._state() if self._state is not None else None
+        with self._lock:
+            stale = (self._max_age and self.built_at is not None
+                     and time.monotonic() - self.built_at > self._max_age)
+            moved = state is not None and (self.version is None or state.version > self.version)
+            if not self.is_built or stale or moved:
+                self.rebuild(state)
+            version = self.version
+        if self._on_use is not None:
+            self._on_use(version)
+
+    def caught_up(self, state):
+        # Версія, щойно записана bump() цього процесу: рівно наступна — словник уже актуальний
+        with self._lock:
+            if (self.is_built and self.version is not None and state.version == self.version + 1
+                    and state.reset_version <= self.version):
+                self.version = state.version
+
+    def invalidate(self):
+        with self._lock:
+            self._reset()
+
+    # ====== ІНКРЕМЕНТАЛЬНІ ЗМІНИ ======
+    def add(self, author):
+        with self._lock:
+            if not self.is_built or not author:
+                return
+            count = self._counts.get(author, 0)
+            self._counts[author] = count + 1
+            if count == 0:
+                bisect.insort(self._keys, (author.lower(), author))
+
+    def remove(self, author):
+        with self._lock:
+            if not self.is_built or author not in self._counts:
+                return
+            self._counts[author] -= 1
+            if self._counts[author] <= 0:
+                del self._counts[author]
+                key = (author.lower(), author)
+                pos = bisect.bisect_left(self._keys, key)
+                if pos < len(self._keys) and self._keys[pos] == key:
+                    del self._keys[pos]
+
+    def replace(self, old_author, new_author):
+        if old_author != new_author:
+            self.remove(old_author)
+            self.add(new_author)
+
+    # ====== ПОШУК ======
+    def search(self, query, limit=10):
+        q = query.lower()
+        if not q:
+            return []
+        self.ensure_built()
+        with self._lock:
+            results = []
+            pos = bisect.bisect_left(self._keys, (q,))
+            while pos < len(self._keys) and len(results) < limit:
+                key, author = self._keys[pos]
+                if not key.startswith(q):
+                    break
+                results.append(author)
+                pos += 1
+
+            if len(results) < limit:
+                # Підрядок не на початку — повільніший, але обмежений прохід
+                for key, author in self._keys:
+                    if q in key and not key.startswith(q):
+                        results.append(author)
+                        if len(results) >= limit:
+                            break
+            return results
@@ -0,0 +1,182 @@
+"""Потоковий JSON-бекап бази.
+
+Таблиці читаються пачками (yield_per; на PostgreSQL — серверний курсор), а
+JSON генерується частинами, тож пам'ять не залежить від розміру каталогу.
+Формат той самий, що читає restore_database(): об'єкт з "timestamp" і
+списками "books", "loans", "readers", "users" — по одному запису на рядок.
+
+Відновлення читає файл так само потоково (iter_backup) і пише пачки
+нативними upsert-ами (INSERT ... ON CONFLICT) на PostgreSQL і SQLite.
+"""
+import gzip
+import json
+import re
+from datetime import date, datetime
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+BATCH_SIZE = 1000
+READ_SIZE = 64 * 1024
+GZIP_MAGIC = b'\x1f\x8b'
+_WHITESPACE = re.compile(r'\s*')
+
+
+class BackupFormatError(ValueError):
+    """Файл не є JSON-об'єктом бекапу."""
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'Неможливо серіалізувати {type(value).__name__}')
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, default=_json_default)
+
+
+def iter_backup_json(session, sections, header=None, on_row=None, batch_size=BATCH_SIZE):
+    """Генерує JSON бекапу частинами.
+
+    sections — список пар (ключ, select(...)); кожен рядок select стає
+    об'єктом списку під цим ключем. header — додаткові скалярні поля на
+    початку файлу. on_row() викликається після кожного рядка.
+    """
+    yield '{\n  "timestamp": ' + _dumps(datetime.now().isoformat())
+    for key, value in (header or {}).items():
+        yield ',\n  ' + _dumps(key) + ': ' + _dumps(value)
+    for key, stmt in sections:
+        yield ',\n  ' + _dumps(key) + ': ['
+        separator = '\n    '
+        for row in session.execute(stmt.execution_options(yield_per=batch_size)):
+            yield separator + _dumps(row._asdict())
+            separator = ',\n    '
+            if on_row:
+                on_row()
+        yield '\n  ]'
+    yield '\n}\n'
+
+
+def write_backup(path, chunks, compress=False):
+    """Записує частини JSON у файл (за потреби — одразу в gzip)."""
+    opener = gzip.open if compress else open
+    with opener(path, 'wt', encoding='utf-8') as f:
+        for chunk in chunks:
+            f.write(chunk)
+
+
+def open_backup(path):
+    """Відкриває бекап для читання, розпізнаючи gzip за сигнатурою."""
+    with open(path, 'rb') as f:
+        compressed = f.read(2) == GZIP_MAGIC
+    if compressed:
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+# ====== ПОТОКОВЕ ЧИТАННЯ ======
+class _StreamReader:
+    # Буфер над текстовим файлом; значення розбираються json.raw_decode
+    def __init__(self, f):
+        self._f = f
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self):
+        if self._eof:
+            return False
+        more = self._f.read(READ_SIZE)
+        if not more:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + more
+        self._pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise BackupFormatError(f'Очікувався символ "{char}"')
+        self._pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                # Значення обірване кінцем буфера — дочитуємо
+                if self._fill():
+                    continue
+                raise
+            if end == len(self._buf) and self._fill():
+                # Число могло обірватися на межі буфера
+                continue
+            self._pos = end
+            return value
+
+
+def iter_backup(f):
+    """Генерує пари (ключ, запис) для кожного елемента списків верхнього рівня.
+
+    Поля заголовка ("timestamp", "type", ...) віддаються як (ключ, значення)
+    у тому місці файлу, де вони стоять. Пам'ять — один запис і буфер читання.
+    """
+    reader = _StreamReader(f)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise BackupFormatError('Очікувався ключ-рядок')
+        reader.expect(':')
+        if reader.peek() == '[':
+            reader.expect('[')
+            if reader.peek() == ']':
+                reader.expect(']')
+            else:
+                while True:
+                    item = reader.value()
+                    if isinstance(item, dict):
+                        yield key, item
+                    if reader.peek() == ',':
+                        reader.expect(',')
+                        continue
+                    reader.expect(']')
+                    break
+        else:
+            yield key, reader.value()
+        if reader.peek() == ',':
+            reader.expect(',')
+            continue
+        reader.expect('}')
+        return
+
+
+# ====== ЗАПИС ПАЧКАМИ ======
+def upsert_rows(session, table, rows):
+    """INSERT ... ON CONFLICT (первинний ключ) DO UPDATE для пачки словників."""
+    if not rows:
+        return
+    dialect = session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        stmt = postgresql.insert(table)
+    elif dialect == 'sqlite':
+        stmt = sqlite.insert(table)
+    else:
+        raise NotImplementedError(f'Upsert не підтримується для {dialect}')
+    key = [column.name for column in table.primary_key.columns]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=key,
+        set_={name: stmt.excluded[name] for name in rows[0] if name not in key})
+    session.execute(stmt, rows)
@@ -0,0 +1,83 @@
+"""Штрихкоди книг: нормалізація EAN/ISBN до EAN-13 і заповнення колонки Book.ean13.
+
+Book.ean лишається як ввели (довільний текст, '-' — коду немає), а в ean13 —
+перевірений 13-значний код з унікальним індексом: за ним сканер знаходить
+книгу одним запитом (/api/ean/<code>). Приймаються EAN-13 (і ISBN-13),
+ISBN-10 (перетворюється на 978…) та UPC-A (12 цифр, доповнюється нулем);
+пробіли й дефіси відкидаються, контрольна цифра перевіряється.
+"""
+import re
+
+from sqlalchemy import bindparam, select, update
+
+_SEPARATORS = re.compile(r'[\s\-‐‑–—.]+')
+# Значення, якими в каталозі позначають відсутність коду
+BLANK_VALUES = ('', '-')
+
+
+def is_blank(value):
+    return value is None or value.strip() in BLANK_VALUES
+
+
+def _ean13_check_digit(digits12):
+    total = sum(int(digit) * (3 if pos % 2 else 1) for pos, digit in enumerate(digits12))
+    return str((10 - total % 10) % 10)
+
+
+def _isbn10_valid(code):
+    total = sum((10 - pos) * (10 if char == 'X' else int(char)) for pos, char in enumerate(code))
+    return total % 11 == 0
+
+
+def normalize_ean(value):
+    """EAN-13 для введеного коду або None, якщо це не коректний EAN/ISBN."""
+    if value is None:
+        return None
+    code = _SEPARATORS.sub('', str(value)).upper()
+    if code.startswith('ISBN'):
+        code = code[4:].lstrip(':')
+    if len(code) == 10 and code[:9].isdigit() and (code[9].isdigit() or code[9] == 'X'):
+        if not _isbn10_valid(code):
+            return None
+        code = '978' + code[:9]
+        return code + _ean13_check_digit(code)
+    if not code.isdigit():
+        return None
+    if len(code) == 12:
+        code = '0' + code
+    if len(code) != 13 or _ean13_check_digit(code[:12]) != code[12]:
+        return None
+    return code
+
+
+def backfill(connection, book_table, chunk_size=1000):
+    """Перераховує ean13 для всіх книг з ean; повертає (оновлено, конфлікти).
+
+    Код лишається за книгою з меншим id, решта з тим самим кодом отримують
+    NULL і потрапляють у конфлікти: [(id книги, ean, id книги з цим кодом)].
+    """
+    owners = {}
+    conflicts = []
+    wanted = {}
+    released = []
+    rows = connection.execute(
+        select(book_table.c.id, book_table.c.ean, book_table.c.ean13).order_by(book_table.c.id))
+    for book_id, ean, current in rows:
+        code = normalize_ean(ean)
+        if code is not None:
+            owner = owners.setdefault(code, book_id)
+            if owner != book_id:
+                conflicts.append((book_id, ean, owner))
+                code = None
+        if code != current:
+            wanted[book_id] = code
+            if current is not None:
+                released.append(book_id)
+
+    # Спершу звільняємо старі коди (вони можуть перейти до інших книг), потім призначаємо нові
+    stmt = update(book_table).where(book_table.c.id == bindparam('b_id')).values(ean13=bindparam('b_ean13'))
+    for params in ([{'b_id': book_id, 'b_ean13': None} for book_id in released],
+                   [{'b_id': book_id, 'b_ean13': code} for book_id, code in wanted.items() if code is not None]):
+        for start in range(0, len(params), chunk_size):
+            connection.execute(stmt, params[start:start + chunk_size])
+    return len(wanted), conflicts
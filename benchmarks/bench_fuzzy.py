@@ -0,0 +1,117 @@
+"""Бенчмарк нечіткого пошуку: побудова словника й затримка запитів на 10k … 100k книг.
+
+Запуск:  python benchmarks/bench_fuzzy.py [--scan]
+
+Каталог синтетичний (слова зі складів, схожих на українські), база не потрібна —
+індекс будується напряму з генератора рядків. Запити — слова каталогу з
+опечаткою, латиницею або в неправильній розкладці. --scan додає для порівняння
+перебір усього словника (відстань до кожного слова) замість обходу з відсіканням.
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fuzzy import _CYRILLIC_TO_LATIN, _UK_TO_EN, distance, max_edits, words  # noqa: E402
+from search_index import CatalogIndex  # noqa: E402
+
+SIZES = [10_000, 50_000, 100_000]
+QUERIES = 200
+SYLLABLES = ['ко', 'бза', 'ре', 'ше', 'вчен', 'ко', 'ли', 'ся', 'мир', 'го', 'ло', 'ва', 'кра', 'ї',
+             'на', 'сте', 'пан', 'дні', 'про', 'ліс', 'ган', 'на', 'зо', 'ря', 'ти', 'хий', 'дон',
+             'жу', 'ра', 'вель', 'ки', 'ус', 'мо', 'вед', 'чар', 'ба', 'би', 'ще', 'ґан', 'єв']
+
+
+def make_word(rng):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def make_catalog(count, seed=1):
+    rng = random.Random(seed)
+    vocabulary = [make_word(rng) for _ in range(count // 4)]
+    surnames = [make_word(rng).capitalize() + rng.choice(['енко', 'ук', 'ський', 'ич']) for _ in range(count // 20)]
+    return [
+        (book_id, ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(1, 4))).capitalize(),
+         f'{make_word(rng).capitalize()} {rng.choice(surnames)}', f'978{book_id:010d}', 'доступна')
+        for book_id in range(1, count + 1)
+    ]
+
+
+def typo(word, rng):
+    pos = rng.randrange(len(word))
+    kind = rng.choice(['drop', 'swap', 'replace'])
+    if kind == 'drop':
+        return word[:pos] + word[pos + 1:]
+    if kind == 'swap' and pos < len(word) - 1:
+        return word[:pos] + word[pos + 1] + word[pos] + word[pos + 2:]
+    return word[:pos] + rng.choice('абвгдеклмнопрст') + word[pos + 1:]
+
+
+def make_queries(rows, seed=2):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(QUERIES):
+        _, name_book, author, _, _ = rng.choice(rows)
+        word = rng.choice([w for w in (name_book + ' ' + author).lower().split() if len(w) > 4] or ['кобзар'])
+        variant = rng.choice(['typo', 'latin', 'layout', 'prefix'])
+        if variant == 'typo':
+            word = typo(word, rng)
+        elif variant == 'latin':
+            word = word.translate(_CYRILLIC_TO_LATIN)
+        elif variant == 'layout':
+            word = word.translate(_UK_TO_EN)
+        else:
+            word = word[:max(4, len(word) - 2)]
+        queries.append(word)
+    return queries
+
+
+def scan_similar(index, query):
+    # Перебір усього словника — те, чого уникає обхід з відсіканням
+    matches = 0
+    for word in words(query):
+        limit = max_edits(len(word))
+        for candidate in list(index._words._postings):
+            if distance(word, candidate) <= limit:
+                matches += 1
+    return matches
+
+
+def time_queries(func, queries):
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        func(query)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def main():
+    scan = '--scan' in sys.argv
+    print(f"{'книг':>8} {'слів':>8} {'побудова, с':>12} {'медіана, мс':>12} {'p95, мс':>9} {'знайдено':>9}"
+          + (f" {'перебір, мс':>12}" if scan else ''))
+    for count in SIZES:
+        rows = make_catalog(count)
+        index = CatalogIndex(lambda: rows)
+        started = time.perf_counter()
+        index.rebuild()
+        build = time.perf_counter() - started
+
+        queries = make_queries(rows)
+        found = sum(1 for query in queries if index.fuzzy_search(query, limit=10))
+        # Кеш similar() прибираємо, щоб міряти холодні запити
+        index._words._cache.clear()
+        median, p95 = time_queries(lambda query: (index._words._cache.clear(), index.fuzzy_search(query, limit=10)), queries)
+        line = f'{count:>8} {len(index._words):>8} {build:>12.2f} {median:>12.2f} {p95:>9.2f} {found:>6}/{QUERIES}'
+        if scan:
+            line += f' {time_queries(lambda query: scan_similar(index, query), queries[:20])[0]:>12.1f}'
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Бенчмарк входу: вартість однієї спроби при 5 … 5000 акаунтах.
+
+Запуск:  python benchmarks/bench_login.py [--legacy]
+
+Кожен прогін працює з тимчасовою SQLite базою. Для порівняння з
+перебором усіх акаунтів (старий вхід лише за паролем) додайте --legacy.
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_tmpdir = tempfile.mkdtemp(prefix='bench_login_')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_tmpdir, 'bench.db')
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+from app import create_app, init_db  # noqa: E402
+from models import db, User  # noqa: E402
+
+app = create_app()
+
+SIZES = [5, 50, 500, 5000]
+ATTEMPTS = 5
+
+
+def populate(count):
+    # Один хеш на всіх — генерація 5000 хешів scrypt тривала б хвилини
+    password_hash = generate_password_hash('correct-password')
+    with app.app_context():
+        db.session.execute(db.delete(User))
+        db.session.execute(db.insert(User), [
+            {'username': f'user{i}', 'password_hash': password_hash, 'role': 'admin'}
+            for i in range(count)
+        ])
+        db.session.commit()
+
+
+def time_login(client, form):
+    timings = []
+    for _ in range(ATTEMPTS):
+        started = time.perf_counter()
+        client.post('/login', data=form)
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)[len(timings) // 2] * 1000
+
+
+def main():
+    legacy = '--legacy' in sys.argv
+    with app.app_context():
+        init_db()
+    print(f"{'акаунтів':>10} {'логін+пароль, мс':>18} {'невідомий логін, мс':>21}"
+          + (f" {'лише пароль, мс':>16}" if legacy else ''))
+    for count in SIZES:
+        populate(count)
+        client = app.test_client()
+        wrong = time_login(client, {'username': f'user{count - 1}', 'password': 'wrong'})
+        unknown = time_login(client, {'username': 'nobody', 'password': 'wrong'})
+        line = f'{count:>10} {wrong:>18.1f} {unknown:>21.1f}'
+        if legacy:
+            app.config['PASSWORD_ONLY_LOGIN'] = True
+            line += f" {time_login(client, {'password': 'wrong'}):>16.1f}"
+            app.config['PASSWORD_ONLY_LOGIN'] = False
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
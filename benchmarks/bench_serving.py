@@ -0,0 +1,169 @@
+"""Навантажувальний бенчмарк профілів gunicorn: запитів/с і p99 для трьох маршрутів.
+
+Запуск:  python benchmarks/bench_serving.py [--profiles sync gthread] [--duration 10]
+                                             [--concurrency 16] [--books 20000]
+
+Для кожного профілю (GUNICORN_WORKER_CLASS) піднімається gunicorn з
+gunicorn.conf.py на тимчасовій SQLite базі з --books книгами, і по черзі
+навантажуються /books, /search_books?q=... та /books/<id> (з входом).
+Кількість процесів і потоків — як їх обере конфіг на цій машині (або
+WEB_CONCURRENCY / GUNICORN_THREADS з оточення).
+"""
+import argparse
+import http.client
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import quote, urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--profiles', nargs='+', default=['sync', 'gthread'], choices=['sync', 'gthread'])
+    parser.add_argument('--duration', type=float, default=10, help='секунд навантаження на маршрут')
+    parser.add_argument('--concurrency', type=int, default=16, help='одночасних клієнтів')
+    parser.add_argument('--books', type=int, default=20000)
+    parser.add_argument('--port', type=int, default=8765)
+    return parser.parse_args()
+
+
+def prepare_database(path, books):
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + path)
+    script = f'''
+from app import create_app, init_db
+from models import db, Book
+app = create_app()
+with app.app_context():
+    init_db()
+    db.session.execute(db.insert(Book), [
+        {{'name_book': f'Книга {{i}}', 'author': f'Автор {{i % 500}}', 'surname': '', 'ean': str(4820000000000 + i),
+          'buyer': '', 'phone': '', 'stat': 'доступна' if i % 3 else 'видана', 'history': ''}}
+        for i in range({books})
+    ])
+    db.session.commit()
+'''
+    subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env, check=True, capture_output=True)
+    return env
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'gunicorn не відповів на порту {port}')
+
+
+def login(port):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    conn.request('POST', '/login', body=urlencode({'username': 'admin', 'password': 'admin123'}),
+                 headers={'Content-Type': 'application/x-www-form-urlencoded'})
+    response = conn.getresponse()
+    response.read()
+    cookie = response.getheader('Set-Cookie', '').split(';')[0]
+    conn.close()
+    if not cookie:
+        raise RuntimeError('Не вдалося увійти як admin')
+    return cookie
+
+
+def load(port, make_path, headers, duration, concurrency):
+    """Клієнти з keep-alive крутять запити до дедлайну; повертає (запитів/с, p50, p99, помилок)."""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def request(conn, path):
+        conn.request('GET', path, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local, failed = [], 0
+        while time.monotonic() < deadline:
+            path = make_path()
+            started = time.perf_counter()
+            try:
+                try:
+                    status = request(conn, path)
+                except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                    # Воркер перезапустився (max_requests) і закрив keep-alive з'єднання —
+                    # як і браузер, повторюємо GET на новому з'єднанні
+                    conn.close()
+                    status = request(conn, path)
+                if status != 200:
+                    failed += 1
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                continue
+            local.append(time.perf_counter() - started)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    workers = [threading.Thread(target=client) for _ in range(concurrency)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    latencies.sort()
+    if not latencies:
+        return 0.0, 0.0, 0.0, errors[0]
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    return len(latencies) / duration, p50, p99, errors[0]
+
+
+def run_profile(profile, args, env):
+    env = dict(env, GUNICORN_WORKER_CLASS=profile, GUNICORN_ACCESS_LOG='', GUNICORN_LOG_LEVEL='warning')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{args.port}'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(args.port)
+        cookie = login(args.port)
+        routes = [
+            ('/books', lambda: '/books', {}),
+            ('/search_books', lambda: '/search_books?q=' + quote(f'Книга {random.randint(1, 999)}'), {}),
+            ('/books/<id>', lambda: f'/books/{random.randint(1, args.books)}', {'Cookie': cookie}),
+        ]
+        results = []
+        for label, make_path, headers in routes:
+            load(args.port, make_path, headers, min(2.0, args.duration), args.concurrency)   # прогрів
+            results.append((label,) + load(args.port, make_path, headers, args.duration, args.concurrency))
+        return results
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+
+def main():
+    args = parse_args()
+    tmpdir = tempfile.mkdtemp(prefix='bench_serving_')
+    env = prepare_database(os.path.join(tmpdir, 'serving.db'), args.books)
+
+    print(f'CPU: {os.cpu_count()}, клієнтів: {args.concurrency}, книг: {args.books}, {args.duration:.0f} с на маршрут')
+    print(f"{'профіль':>8} {'маршрут':>14} {'запитів/с':>10} {'p50, мс':>8} {'p99, мс':>8} {'помилок':>8}")
+    for profile in args.profiles:
+        for label, rps, p50, p99, errors in run_profile(profile, args, env):
+            print(f'{profile:>8} {label:>14} {rps:>10.1f} {p50:>8.1f} {p99:>8.1f} {errors:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Бюджет старту воркера: імпорт app, create_app() і перший запит.
+
+Запуск:  python benchmarks/bench_startup.py [--runs 5] [--import-budget 1200]
+                                              [--create-budget 100] [--request-budget 300]
+
+Кожен прогін — окремий процес Python з тимчасовою SQLite базою (схему
+створює init_db() заздалегідь, поза вимірюванням). Друкує медіани й
+завершується з кодом 1, якщо якась перевищує бюджет (мс), імпорт підтягнув
+openpyxl чи alembic або до першого запиту відкрилося з'єднання з базою.
+
+Бюджет імпорту має запас: самі Flask і SQLAlchemy з моделями займають
+~550–650 мс, а розкид між прогонами на тій самій машині сягає ~150 мс.
+Бюджет ловить нову важку залежність (openpyxl, alembic — +200–300 мс), а не шум.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Вимірювання в дочірньому процесі: лише там імпорт справді "холодний"
+_CHILD = r'''
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+created = time.perf_counter()
+from models import db
+with application.app_context():
+    pool = db.engine.pool
+    connections = pool.checkedin() + pool.checkedout()
+heavy = sorted(name for name in ('openpyxl', 'alembic') if name in sys.modules)
+client = application.test_client()
+before = time.perf_counter()
+status = client.get('/books').status_code
+finished = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_ms': (created - imported) * 1000,
+    'request_ms': (finished - before) * 1000,
+    'connections': connections,
+    'heavy': heavy,
+    'status': status,
+}))
+'''
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--import-budget', type=float, default=1200, help='мс на import app')
+    parser.add_argument('--create-budget', type=float, default=100, help='мс на create_app()')
+    parser.add_argument('--request-budget', type=float, default=300, help='мс на перший GET /books')
+    return parser.parse_args()
+
+
+def run_child(env):
+    output = subprocess.run([sys.executable, '-c', _CHILD], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    args = parse_args()
+    tmpdir = tempfile.mkdtemp(prefix='bench_startup_')
+    env = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.join(tmpdir, 'startup.db'))
+    env.pop('FLASK_RUN_FROM_CLI', None)
+    subprocess.run([sys.executable, '-c', 'import app; a = app.create_app(); a.app_context().push(); app.init_db()'],
+                   cwd=ROOT, env=env, capture_output=True, check=True)
+
+    samples = [run_child(env) for _ in range(args.runs)]
+
+    def median(key):
+        values = sorted(sample[key] for sample in samples)
+        return values[len(values) // 2]
+
+    failures = []
+    print(f"{'етап':>12} {'медіана, мс':>12} {'бюджет, мс':>11}")
+    for key, label, budget in (('import_ms', 'import app', args.import_budget),
+                               ('create_ms', 'create_app', args.create_budget),
+                               ('request_ms', 'GET /books', args.request_budget)):
+        value = median(key)
+        print(f'{label:>12} {value:>12.1f} {budget:>11.0f}' + ('  ❌' if value > budget else ''))
+        if value > budget:
+            failures.append(f'{label}: {value:.1f} мс > {budget:.0f} мс')
+
+    sample = samples[-1]
+    if sample['status'] != 200:
+        failures.append(f"GET /books повернув {sample['status']}")
+    if sample['heavy']:
+        failures.append(f"імпорт підтягнув {', '.join(sample['heavy'])}")
+    if sample['connections']:
+        failures.append("з'єднання з базою відкрилося до першого запиту")
+
+    for failure in failures:
+        print(f'❌ {failure}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""Перевірка планів запитів: жоден маршрут не повинен читати таблицю повністю.
+
+Запуск:  python benchmarks/check_query_plans.py [--database-url URL]
+
+Без --database-url працює з тимчасовою SQLite базою (EXPLAIN QUERY PLAN).
+З URL PostgreSQL запити пояснюються через EXPLAIN з enable_seqscan = off:
+Seq Scan лишається в плані, лише коли придатного індексу немає. Схема
+доводиться до останньої міграції, тож індекси беруться саме з migrations/.
+
+Скрипт проходить маршрути тестовим клієнтом, записує всі SELECT/UPDATE/DELETE
+і завершується з кодом 1, якщо план якогось із них містить повне сканування
+таблиці, не внесене до ALLOWED_SCANS. Окремо перевіряється, що сторінка
+/readers коштує однакову кількість запитів для N і 10N читачів (без N+1).
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+from datetime import datetime
+
+from sqlalchemy import event
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Свідомі повні проходи: (маршрут, таблиця) -> причина
+ALLOWED_SCANS = {
+    ('/books', 'book'): 'перша сторінка без фільтра читається за id до LIMIT; COUNT(*) для загальної кількості',
+    ('/readers', 'reader'): 'SQLite сортує за колацією uk без індексу (на PostgreSQL — ix_reader_sort); COUNT(*)',
+}
+SQLITE_ONLY = {('/readers', 'reader')}
+
+# Перевірка N+1 на /readers: читачі з цим прізвищем, N і 10N на одній сторінці
+READERS_PROBE = 'Лічильник'
+READERS_PROBE_SIZES = (10, 100)
+
+# SCAN ... USING COVERING INDEX теж читає всю таблицю (лише через індекс); SEARCH — ні
+SQLITE_SCAN = re.compile(r'^SCAN (\w+)\b(?! VIRTUAL TABLE)')
+POSTGRES_SCAN = re.compile(r'Seq Scan on "?(\w+)"?')
+# Запити рефлексії схеми (міграції, пошукові бекенди) — не маршрути
+CATALOG_QUERY = re.compile(r'\b(sqlite_master|sqlite_schema|pg_catalog|information_schema)\b')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--database-url', help='PostgreSQL для перевірки (за замовчуванням — тимчасова SQLite)')
+    return parser.parse_args()
+
+
+def prepare_environment(args):
+    if args.database_url:
+        os.environ['DATABASE_URL'] = args.database_url
+    else:
+        tmpdir = tempfile.mkdtemp(prefix='query_plans_')
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmpdir, 'plans.db')
+    # Пошук має йти через базу (FTS5 / pg_trgm), а не через індекс у пам'яті
+    os.environ['SEARCH_BACKEND'] = 'database'
+
+
+def upgrade_schema(app):
+    # init_db(): create_all, позначка базової ревізії й усі міграції до head
+    from app import init_db
+    with app.app_context():
+        init_db()
+
+
+def populate(app, db, Book, Reader, Loan, User, backfill, rebuild_stats):
+    with app.app_context():
+        if not User.query.filter_by(username='plans').first():
+            user = User(username='plans', role='superadmin')
+            user.set_password('plans-password')
+            db.session.add(user)
+        db.session.execute(db.insert(Book), [
+            {'name_book': f'Книга {i}', 'author': f'Автор {i % 50}', 'surname': '', 'ean': str(4820000000000 + i),
+             'buyer': '', 'phone': '', 'stat': 'доступна', 'history': ''}
+            for i in range(500)
+        ])
+        # Кожна 50-та книга — видана й прострочена (черга /overdue і нагадування)
+        issued = Book.__table__
+        db.session.execute(
+            db.update(issued).where(issued.c.id == db.bindparam('b_id')).values(
+                stat='видана', buyer='Іван 1', surname='Петренко 1', phone=db.bindparam('b_phone'),
+                date=datetime(2020, 1, 1), enddate=db.bindparam('b_enddate')),
+            [{'b_id': book_id, 'b_phone': f'050000000{book_id % 3}', 'b_enddate': datetime(2020, 1, 10 + book_id % 7)}
+             for book_id in range(50, 501, 50)])
+        # Відкриті видачі тих самих книг — їх забирають нагадування
+        db.session.execute(db.insert(Loan), [
+            {'book_id': book_id, 'reader': 'Іван 1', 'surname': 'Петренко 1', 'phone': f'050000000{book_id % 3}',
+             'start': datetime(2020, 1, 1), 'due': datetime(2020, 1, 10 + book_id % 7)}
+            for book_id in range(50, 501, 50)])
+        db.session.execute(db.insert(Reader), [
+            {'name': f'Іван {i}', 'surname': f'Петренко {i}', 'phone': f'050{i:07d}'} for i in range(200)
+        ])
+        # ean13 для вставлених напряму рядків (4820000000000 — коректний EAN-13 книги з id 1)
+        backfill(db.session, Book.__table__)
+        # Рядки вставлено в обхід застосунку — лічильники статистики рахуємо з нуля
+        rebuild_stats(db.session)
+        db.session.commit()
+
+
+def exercise(client, encode_cursor):
+    """Маршрут (для звіту) -> виклик тестового клієнта."""
+    cursor = encode_cursor([100])
+    return [
+        ('/books', lambda: client.get('/books')),
+        ('/books?cursor', lambda: client.get(f'/books?cursor={cursor}')),
+        ('/booked', lambda: client.get('/booked')),
+        ('/notbook', lambda: client.get(f'/notbook?cursor={cursor}')),
+        ('/readers', lambda: client.get('/readers')),
+        ('/readers?search', lambda: client.get('/readers?search=Петренко')),
+        ('/search_books', lambda: client.get('/search_books?q=Книга 4')),
+        ('/search_reader', lambda: client.get('/search_reader?q=Петренко')),
+        ('/search_authors', lambda: client.get('/search_authors?q=Автор 1')),
+        ('/books/<id> видача', lambda: client.post('/books/7', data={
+            'stat': 'видана', 'buyer': 'Іван 3', 'surname': 'Петренко 3', 'phone': '0500000003', 'enddate': ''})),
+        ('/books/<id> повернення', lambda: client.post('/books/7', data={'stat': 'доступна', 'enddate': ''})),
+        ('/books/<id>', lambda: client.get('/books/7')),
+        ('/readers/<id>/edit', lambda: client.post('/readers/4/edit', data={
+            'name': 'Іван 3', 'surname': 'Петренко 3', 'phone': '0509999999'})),
+        ('/api/loans', lambda: client.get('/api/loans?phone=0509999999')),
+        ('/api/ean/<code>', lambda: client.get('/api/ean/4820000000000')),
+        ('/api/circulation видача', lambda: client.post('/api/circulation', json={
+            'action': 'checkout', 'items': ['4820000000000', '#20', '#21'],
+            'reader': {'name': 'Іван 5', 'surname': 'Петренко 5', 'phone': '0500000005'}})),
+        ('/api/circulation повернення', lambda: client.post('/api/circulation', json={
+            'action': 'return', 'items': ['4820000000000', '#20', '#21']})),
+        ('/stats', lambda: client.get('/stats')),
+        ('/overdue', lambda: client.get('/overdue')),
+        ('/api/overdue?cursor', lambda: client.get(f"/api/overdue?cursor={encode_cursor(['2020-01-16T00:00:00', 100])}")),
+        ('notify-overdue', lambda: client.application.extensions['overdue_notifier'].run_once()),
+        ('/books/<id>/del', lambda: client.get('/books/9/del')),
+    ]
+
+
+def add_probe_readers(app, db, Book, Reader, start, stop):
+    # Кожен другий читач має видану книгу — EXISTS має рахуватися в тому ж запиті
+    with app.app_context():
+        db.session.execute(db.insert(Reader), [
+            {'name': f'Пробний {i}', 'surname': READERS_PROBE, 'phone': f'077{i:07d}'} for i in range(start, stop)
+        ])
+        db.session.execute(db.insert(Book), [
+            {'name_book': f'Пробна {i}', 'author': 'Пробний автор', 'surname': READERS_PROBE, 'ean': '',
+             'buyer': f'Пробний {i}', 'phone': f'077{i:07d}', 'stat': 'видана', 'history': ''}
+            for i in range(start, stop, 2)
+        ])
+        db.session.commit()
+
+
+def readers_statements(app, db, Book, Reader, client, engine):
+    """Кількість запитів сторінки /readers для кожного з READERS_PROBE_SIZES читачів."""
+    counts = []
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if not CATALOG_QUERY.search(statement):
+            statements.append(statement)
+
+    added = 0
+    for size in READERS_PROBE_SIZES:
+        add_probe_readers(app, db, Book, Reader, added, size)
+        added = size
+        statements.clear()
+        event.listen(engine, 'before_cursor_execute', count)
+        try:
+            response = client.get(f'/readers?search={READERS_PROBE}&per_page={max(READERS_PROBE_SIZES)}')
+        finally:
+            event.remove(engine, 'before_cursor_execute', count)
+        shown = response.get_data(as_text=True).count('077')
+        if response.status_code != 200 or shown < size:
+            print(f'❌ /readers: HTTP {response.status_code}, показано {shown} з {size} читачів')
+            return None
+        counts.append(len(statements))
+    return counts
+
+
+def explain(connection, dialect, statement, parameters):
+    cursor = connection.cursor()
+    try:
+        if dialect == 'postgresql':
+            cursor.execute('SET enable_seqscan = off')
+            cursor.execute('EXPLAIN ' + statement, parameters)
+            lines = [row[0] for row in cursor.fetchall()]
+            cursor.execute('RESET enable_seqscan')
+            return lines, [match.group(1) for line in lines for match in [POSTGRES_SCAN.search(line)] if match]
+        cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+        lines = [row[-1] for row in cursor.fetchall()]
+        return lines, [match.group(1) for line in lines for match in [SQLITE_SCAN.match(line)] if match]
+    finally:
+        cursor.close()
+
+
+def main():
+    args = parse_args()
+    prepare_environment(args)
+
+    from app import create_app  # noqa: E402
+    from barcodes import backfill  # noqa: E402
+    from models import db, Book, Reader, Loan, User  # noqa: E402
+    from pagination import encode_cursor  # noqa: E402
+    from stats import rebuild as rebuild_stats  # noqa: E402
+
+    # Потік нагадувань вимкнено — нагадування запускаються явно в exercise()
+    app = create_app({'MIGRATIONS': True, 'OVERDUE_NOTIFY_INTERVAL': 0})
+    upgrade_schema(app)
+    populate(app, db, Book, Reader, Loan, User, backfill, rebuild_stats)
+
+    recorded = []
+    current = {'route': None}
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if (current['route'] and not executemany and not CATALOG_QUERY.search(statement)
+                and statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE', 'WITH'))):
+            recorded.append((current['route'], statement, parameters))
+
+    client = app.test_client()
+    client.post('/login', data={'username': 'plans', 'password': 'plans-password'})
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    for route, call in exercise(client, encode_cursor):
+        current['route'] = route
+        response = call()
+        # Не лише HTTP-маршрути: фонові завдання повертають власний результат
+        if getattr(response, 'status_code', 200) >= 500:
+            print(f'❌ {route}: HTTP {response.status_code}')
+            return 1
+    current['route'] = None
+    event.remove(engine, 'before_cursor_execute', record)
+
+    dialect = engine.dialect.name
+    failures = 0
+    seen = set()
+    raw = engine.raw_connection()
+    try:
+        for route, statement, parameters in recorded:
+            if (route, statement) in seen:
+                continue
+            seen.add((route, statement))
+            lines, scans = explain(raw, dialect, statement, parameters)
+            base_route = route.split('?')[0].split(' ')[0]
+            bad = [table for table in scans
+                   if (base_route, table) not in ALLOWED_SCANS
+                   or (dialect != 'sqlite' and (base_route, table) in SQLITE_ONLY)]
+            if bad:
+                failures += 1
+                print(f"❌ {route}: повне сканування {', '.join(sorted(set(bad)))}")
+                print('   ' + ' '.join(statement.split()))
+                for line in lines:
+                    print('     ' + line)
+            else:
+                print(f"✅ {route}: {' | '.join(lines)[:150]}")
+    finally:
+        raw.close()
+
+    counts = readers_statements(app, db, Book, Reader, client, engine)
+    if counts is None:
+        failures += 1
+    elif len(set(counts)) > 1:
+        failures += 1
+        sizes = ', '.join(f'{size} читачів — {total}' for size, total in zip(READERS_PROBE_SIZES, counts))
+        print(f'❌ /readers: кількість запитів залежить від кількості читачів ({sizes})')
+    else:
+        print(f'✅ /readers: {counts[0]} запитів і для {READERS_PROBE_SIZES[0]}, і для {READERS_PROBE_SIZES[-1]} читачів')
+
+    print(f"\n{len(seen)} запитів, порушень: {failures}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Єдиний шар пошуку для списків книг, читачів і автопідказок.
+
+Бекенди пошуку книг:
+  * 'index'    — триграмний індекс у пам'яті воркера (search_index.py);
+  * 'database' — один індексований запит з LIMIT: pg_trgm (GIN) на PostgreSQL,
+                 FTS5 з trigram-токенізатором на SQLite (міграція c3f1a9d27e54).
+
+Нечіткий пошук (опечатки, транслітерація, розкладка) завжди йде через
+словник слів індексу в пам'яті — незалежно від бекенду.
+
+Якщо FTS5-таблиць ще немає (база створена через db.create_all без міграцій),
+на SQLite використовується звичайний LIKE.
+"""
+import sqlite3
+
+from sqlalchemy import inspect, or_
+
+# FTS5 trigram не працює із запитами, коротшими за 3 символи
+_FTS_MIN_LENGTH = 3
+
+
+# Українська абетка: літери поза нею (латиниця, цифри) лишаються на своїх кодах
+UKRAINIAN_ALPHABET = 'абвгґдеєжзиіїйклмнопрстуфхцчшщьюя'
+_UK_SORT_MAP = {ord(letter): chr(0xE000 + pos) for pos, letter in enumerate(UKRAINIAN_ALPHABET)}
+
+
+def uk_sort_key(value):
+    """Ключ сортування без урахування регістру за українською абеткою (є, і, ї, ґ на своїх місцях)."""
+    return value.lower().translate(_UK_SORT_MAP)
+
+
+def _uk_collate(left, right):
+    left, right = uk_sort_key(left), uk_sort_key(right)
+    return (left > right) - (left < right)
+
+
+def register_sqlite_functions(dbapi_connection, connection_record):
+    """Обробник події 'connect': юнікодний lower() та колація 'uk' для SQLite.
+
+    Вбудований lower() у SQLite змінює регістр лише ASCII, тож ILIKE
+    (lower(x) LIKE lower(y)) не знаходив би кирилицю в іншому регістрі.
+    """
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function(
+            'lower', 1, lambda value: value.lower() if isinstance(value, str) else value,
+            deterministic=True)
+        dbapi_connection.create_collation('uk', _uk_collate)
+
+
+def _like_pattern(q):
+    escaped = q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+def _fts_phrase(q):
+    # Запит як одна фраза — FTS5 trigram шукає її як підрядок
+    return '"' + q.replace('"', '""') + '"'
+
+
+class CatalogSearch:
+    def __init__(self, db, book_model, reader_model, index=None, backend='database'):
+        self.db = db
+        self.Book = book_model
+        self.Reader = reader_model
+        self.index = index
+        self.backend = backend
+        self._fts_tables = None
+
+    def init_app(self, app):
+        self.backend = app.config['SEARCH_BACKEND']
+
+    def _dialect(self):
+        return self.db.engine.dialect.name
+
+    def _has_fts(self, table):
+        if self._dialect() != 'sqlite':
+            return False
+        if self._fts_tables is None:
+            names = inspect(self.db.engine).get_table_names()
+            self._fts_tables = {name for name in names if name.endswith('_fts')}
+        return table in self._fts_tables
+
+    def _fts_ids(self, table, q):
+        return self.db.text(f'SELECT rowid FROM {table} WHERE {table} MATCH :fts_query') \
+            .bindparams(fts_query=_fts_phrase(q)) \
+            .columns(rowid=self.db.Integer)
+
+    def _match(self, table, pk, columns, q):
+        if len(q) >= _FTS_MIN_LENGTH and self._has_fts(table):
+            return pk.in_(self._fts_ids(table, q))
+        pattern = _like_pattern(q)
+        return or_(*(column.ilike(pattern, escape='\\') for column in columns))
+
+    # ====== КНИГИ ======
+    def _book_query(self, q, stat):
+        Book = self.Book
+        query = self.db.session.query(Book.id, Book.name_book, Book.author, Book.ean, Book.stat) \
+            .filter(self._match('book_fts', Book.id, (Book.name_book, Book.author, Book.ean), q))
+        if stat is not None:
+            query = query.filter(Book.stat == stat)
+        return query
+
+    def books(self, q, stat=None, limit=None, after=None):
+        """Книги, де q є підрядком назви, автора або EAN, за зростанням id.
+
+        after — id останньої книги попередньої сторінки (keyset-пагінація).
+        """
+        q = q.strip()
+        if not q:
+            return []
+        if self.backend == 'index' and self.index is not None:
+            return self.index.search(q, stat=stat, limit=limit, after=after)
+
+        query = self._book_query(q, stat)
+        if after is not None:
+            query = query.filter(self.Book.id > after)
+        query = query.order_by(self.Book.id)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.all()
+
+    def count_books(self, q, stat=None):
+        q = q.strip()
+        if not q:
+            return 0
+        if self.backend == 'index' and self.index is not None:
+            return self.index.count(q, stat=stat)
+        return self._book_query(q, stat).order_by(None).count()
+
+    def fuzzy_books(self, q, stat=None, limit=10):
+        """Книги, схожі на q (опечатки, транслітерація, розкладка), від найсхожіших."""
+        q = q.strip()
+        if not q or self.index is None:
+            return []
+        return self.index.fuzzy_search(q, stat=stat, limit=limit)
+
+    # ====== ЧИТАЧІ ======
+    def reader_filter(self, q):
+        """Умова "q є підрядком імені, прізвища або телефону" для запитів по Reader."""
+        Reader = self.Reader
+        return self._match('reader_fts', Reader.id, (Reader.name, Reader.surname, Reader.phone), q.strip())
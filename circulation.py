@@ -0,0 +1,177 @@
+"""Видача й повернення пачки книг однією транзакцією (/circulation, /api/circulation).
+
+Книги задаються відсканованими EAN/ISBN або номером книги з "#" ("#125").
+Усі книги пачки читаються одним запитом, читач шукається (і створюється)
+один раз, стан книг змінюється UPDATE ... WHERE id IN (...), а записи
+видач додаються одним executemany. Для кожного рядка повертається окремий
+результат, тож неправильний код не зупиняє решту пачки.
+"""
+from datetime import datetime
+
+from sqlalchemy import insert, or_, select, update
+
+from barcodes import normalize_ean
+from models import Book, Loan, Reader
+from stats import apply as apply_stats, book_delta, loan_delta
+
+CHECKOUT = 'видана'
+RETURN = 'доступна'
+# Більші пачки краще розбити: усі коди йдуть в один IN (...)
+MAX_ITEMS = 500
+
+# Стан рядка пачки -> повідомлення для сторінки
+MESSAGES = {
+    'ok_checkout': '✅ Видано',
+    'ok_return': '✅ Повернено',
+    'invalid': '⚠️ Некоректний EAN/ISBN',
+    'not_found': '❌ Книгу не знайдено',
+    'duplicate': '↩️ Повтор у пачці',
+    'already_issued': '📕 Книга вже видана',
+    'not_issued': '📗 Книга не видана',
+}
+
+
+def parse_items(text):
+    """Рядки пачки з тексту: по одному коду на рядок (сканер завершує код Enter)."""
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def _item_key(item):
+    # ('id', номер книги) | ('ean13', код) | None — не розпізнано
+    if item.startswith('#'):
+        number = item[1:].strip()
+        return ('id', int(number)) if number.isdigit() else None
+    code = normalize_ean(item)
+    return ('ean13', code) if code is not None else None
+
+
+def _load_books(session, keys):
+    # Усі книги пачки — одним запитом (первинний ключ і ix_book_ean13), з блокуванням рядків
+    ids = [value for kind, value in keys if kind == 'id']
+    codes = [value for kind, value in keys if kind == 'ean13']
+    table = Book.__table__
+    conditions = []
+    if ids:
+        conditions.append(table.c.id.in_(ids))
+    if codes:
+        conditions.append(table.c.ean13.in_(codes))
+    if not conditions:
+        return {}
+    columns = (table.c.id, table.c.ean13, table.c.name_book, table.c.author, table.c.ean, table.c.stat,
+               table.c.buyer, table.c.surname, table.c.phone, table.c.date, table.c.enddate)
+    rows = session.execute(select(*columns).where(or_(*conditions)).with_for_update()).all()
+    books = {}
+    for row in rows:
+        books[('id', row.id)] = row
+        if row.ean13:
+            books[('ean13', row.ean13)] = row
+    return books
+
+
+def _resolve(session, items, action):
+    """[(рядок, книга або None, стан)] — книги, які можна обробити, мають стан 'ok_<дія>'."""
+    keys = [_item_key(item) for item in items]
+    books = _load_books(session, [key for key in keys if key is not None])
+    seen = set()
+    resolved = []
+    for item, key in zip(items, keys):
+        book = books.get(key) if key is not None else None
+        if key is None:
+            state = 'invalid'
+        elif book is None:
+            state = 'not_found'
+        elif book.id in seen:
+            state = 'duplicate'
+        elif action == CHECKOUT and book.stat == CHECKOUT:
+            state = 'already_issued'
+        elif action == RETURN and book.stat != CHECKOUT:
+            state = 'not_issued'
+        else:
+            state = 'ok_checkout' if action == CHECKOUT else 'ok_return'
+        if book is not None:
+            seen.add(book.id)
+        resolved.append((item, book, state))
+    return resolved
+
+
+def find_or_create_reader(session, name, surname, phone):
+    """Читач за телефоном (ix_reader_phone); нового додаємо в ту ж транзакцію."""
+    reader = session.execute(select(Reader).where(Reader.phone == phone).limit(1)).scalar_one_or_none()
+    if reader is None:
+        reader = Reader(name=name, surname=surname, phone=phone)
+        session.add(reader)
+        session.flush()
+    return reader
+
+
+def _close_open_loans(session, book_ids, now):
+    loan = Loan.__table__
+    session.execute(update(loan).where(loan.c.book_id.in_(book_ids), loan.c.returned_at.is_(None))
+                    .values(returned_at=now))
+
+
+def checkout(session, items, name, surname, phone, due):
+    """Видає книги пачки читачу (name, surname, phone) до due.
+
+    Повертає (результати по рядках, змінені книги як (id, name_book, author, ean, stat)).
+    """
+    now = datetime.utcnow()
+    resolved = _resolve(session, items, CHECKOUT)
+    issuing = [book for _, book, state in resolved if state == 'ok_checkout']
+    book_ids = [book.id for book in issuing]
+    if book_ids:
+        find_or_create_reader(session, name, surname, phone)
+        # Про всяк випадок закриваємо відкриті видачі — як change() при повторній видачі
+        _close_open_loans(session, book_ids, now)
+        book = Book.__table__
+        session.execute(update(book).where(book.c.id.in_(book_ids)).values(
+            buyer=name, surname=surname, phone=phone, stat=CHECKOUT, date=now, enddate=due))
+        session.execute(insert(Loan.__table__), [
+            {'book_id': book_id, 'reader': name, 'surname': surname, 'phone': phone, 'start': now, 'due': due}
+            for book_id in book_ids
+        ])
+        apply_stats(session, [delta for book in issuing for delta in (
+            book_delta(book.author, book.stat, -1), book_delta(book.author, CHECKOUT), loan_delta(now, phone))])
+    return _results(resolved), _changed(issuing, CHECKOUT)
+
+
+def return_books(session, items):
+    """Повертає книги пачки; результат — як у checkout()."""
+    now = datetime.utcnow()
+    resolved = _resolve(session, items, RETURN)
+    returning = [book for _, book, state in resolved if state == 'ok_return']
+    book_ids = [book.id for book in returning]
+    if book_ids:
+        # Книги, видані ще до появи таблиці loan, — відновлюємо запис видачі з полів книги
+        loan = Loan.__table__
+        with_open_loan = set(session.execute(
+            select(loan.c.book_id).where(loan.c.book_id.in_(book_ids), loan.c.returned_at.is_(None))).scalars())
+        legacy = [{'book_id': book.id, 'reader': book.buyer or '', 'surname': book.surname or '',
+                   'phone': book.phone or '', 'start': book.date, 'due': book.enddate}
+                  for book in returning if book.id not in with_open_loan and (book.buyer or '').strip()]
+        if legacy:
+            session.execute(insert(loan), legacy)
+        apply_stats(session, [loan_delta(row['start'], row['phone']) for row in legacy] +
+                    [delta for book in returning for delta in (
+                        book_delta(book.author, book.stat, -1), book_delta(book.author, RETURN))])
+        _close_open_loans(session, book_ids, now)
+        book = Book.__table__
+        session.execute(update(book).where(book.c.id.in_(book_ids)).values(
+            buyer='', surname='', phone='', stat=RETURN, date=now, enddate=now))
+    return _results(resolved), _changed(returning, RETURN)
+
+
+def _changed(books, stat):
+    # Для оновлення індексу пошуку після коміту
+    return [(book.id, book.name_book, book.author, book.ean, stat) for book in books]
+
+
+def _results(resolved):
+    return [{
+        'item': item,
+        'book_id': book.id if book is not None else None,
+        'name_book': book.name_book if book is not None else None,
+        'status': state,
+        'ok': state.startswith('ok_'),
+        'message': MESSAGES[state],
+    } for item, book, state in resolved]
@@ -0,0 +1,89 @@
+"""Стиснення відповідей gzip / deflate за заголовком Accept-Encoding.
+
+Списки книг і читачів — це мегабайти HTML з однаковими inline-стилями в
+кожній картці, а автопідказки й бекап — JSON; усе це стискається в рази.
+Стискаються лише текстові типи (COMPRESSIBLE_MIMETYPES) від COMPRESS_MIN_SIZE
+байт: звичайні відповіді — цілком, потокові (генератори, send_file) — частинами
+в міру читання, без буферизації всього тіла. COMPRESS_LEVEL — рівень zlib
+(0 — вимкнути, наприклад, якщо стискає проксі перед gunicorn).
+
+Стиснене тіло — інше представлення, тому до ETag додається суфікс кодування
+("v5-…-gzip"), а http_cache.conditional приймає у If-None-Match будь-який
+із варіантів.
+"""
+import zlib
+
+from flask import request
+
+COMPRESSIBLE_MIMETYPES = frozenset({
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/json', 'application/javascript', 'image/svg+xml',
+})
+
+# Кодування в порядку переваги -> wbits для zlib (gzip-обгортка або zlib-потік для deflate)
+ENCODINGS = {'gzip': 16 + zlib.MAX_WBITS, 'deflate': zlib.MAX_WBITS}
+ETAG_SUFFIXES = tuple(f'-{encoding}' for encoding in ENCODINGS)
+
+
+class Compressor:
+    def __init__(self, level=6, min_size=1024):
+        self.level = level
+        self.min_size = min_size
+
+    def init_app(self, app):
+        self.level = app.config['COMPRESS_LEVEL']
+        self.min_size = app.config['COMPRESS_MIN_SIZE']
+        if self.level:
+            app.after_request(self.after_request)
+
+    def _stream(self, chunks, wbits):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, wbits)
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    def after_request(self, response):
+        if (response.status_code < 200 or response.status_code in (204, 206)
+                or 'Content-Encoding' in response.headers
+                or 'no-transform' in response.headers.get('Cache-Control', '')):
+            return response
+        if response.status_code == 304:
+            # Тіла немає, але Vary має збігатися з повною відповіддю
+            response.vary.add('Accept-Encoding')
+            return response
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+
+        # Відповідь залежить від Accept-Encoding, навіть якщо цей клієнт стиснення не просив
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(list(ENCODINGS))
+        if encoding is None:
+            return response
+        wbits = ENCODINGS[encoding]
+
+        if response.is_sequence:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            compressor = zlib.compressobj(self.level, zlib.DEFLATED, wbits)
+            response.set_data(compressor.compress(data) + compressor.flush())
+        else:
+            # Потік (генератор або файл): довжина наперед невідома, стискаємо на льоту
+            if response.content_length is not None and response.content_length < self.min_size:
+                return response
+            original = response.response
+            if hasattr(original, 'close'):
+                response.call_on_close(original.close)
+            response.response = self._stream(response.iter_encoded(), wbits)
+            response.direct_passthrough = False
+            response.headers.pop('Content-Length', None)
+            # Діапазони байтів стосуються нестисненого файлу
+            response.headers.pop('Accept-Ranges', None)
+
+        response.headers['Content-Encoding'] = encoding
+        tag, weak = response.get_etag()
+        if tag:
+            response.set_etag(f'{tag}-{encoding}', weak)
+        return response
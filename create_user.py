@@ -1,7 +1,9 @@
-from app import app, db, User
+from app import create_app
+from models import db, User
 
 
 def create_users():
+    app = create_app()
     with app.app_context():
         db.create_all()
 
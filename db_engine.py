@@ -0,0 +1,141 @@
+"""Налаштування пулу з'єднань PostgreSQL зі змінних оточення.
+
+Розмір пулу рахується на один процес gunicorn: потоки воркера
+(GUNICORN_THREADS) плюс потоки фонових завдань, з обмеженням
+DB_MAX_CONNECTIONS / WEB_CONCURRENCY, якщо сервер дає обмежену кількість
+з'єднань. pre-ping і recycle прибирають з'єднання, які керований
+PostgreSQL закрив під час простою. PGBOUNCER=1 — пул тримає PgBouncer
+(NullPool, без параметрів старту, statement_timeout через SET LOCAL).
+"""
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import NullPool, QueuePool
+
+
+def _env_int(environ, name, default):
+    value = environ.get(name, '')
+    return int(value) if value.strip() else default
+
+
+class PoolStats:
+    """Лічильники очікування з'єднань і перепідключень."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+        self.invalidations = 0
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            self.waits += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def record_invalidation(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'waits': self.waits,
+                'wait_avg_ms': round(self.wait_total * 1000 / self.waits, 3) if self.waits else 0.0,
+                'wait_max_ms': round(self.wait_max * 1000, 3),
+                'timeouts': self.timeouts,
+                'invalidations': self.invalidations,
+            }
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool, що міряє час отримання з'єднання з пулу."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+        event.listen(self, 'invalidate', lambda *args: self.stats.record_invalidation())
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.record_wait(time.perf_counter() - started)
+        return connection
+
+
+def engine_options(database_url, background_threads=0, environ=os.environ):
+    """SQLALCHEMY_ENGINE_OPTIONS для PostgreSQL; для SQLite — стандартні."""
+    if 'postgresql' not in database_url:
+        return {}
+
+    statement_timeout = _env_int(environ, 'DB_STATEMENT_TIMEOUT', 30000)    # мс, 0 — без обмеження
+    connect_args = {'connect_timeout': _env_int(environ, 'DB_CONNECT_TIMEOUT', 10)}
+
+    if environ.get('PGBOUNCER', '0') == '1':
+        # PgBouncer у режимі transaction не пропускає параметри старту й сам тримає пул
+        return {'poolclass': NullPool, 'connect_args': connect_args}
+
+    threads = _env_int(environ, 'GUNICORN_THREADS', 1)
+    workers = _env_int(environ, 'WEB_CONCURRENCY', 1)
+    pool_size = _env_int(environ, 'DB_POOL_SIZE', threads + background_threads)
+    max_overflow = _env_int(environ, 'DB_MAX_OVERFLOW', threads)
+    max_connections = _env_int(environ, 'DB_MAX_CONNECTIONS', 0)
+    if max_connections:
+        # Ліміт сервера ділимо між усіма процесами gunicorn
+        per_worker = max(1, max_connections // workers)
+        pool_size = min(pool_size, per_worker)
+        max_overflow = max(0, min(max_overflow, per_worker - pool_size))
+
+    if statement_timeout:
+        connect_args['options'] = f'-c statement_timeout={statement_timeout}'
+
+    return {
+        'poolclass': TimedQueuePool,
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': _env_int(environ, 'DB_POOL_TIMEOUT', 10),
+        'pool_recycle': _env_int(environ, 'DB_POOL_RECYCLE', 280),
+        'pool_pre_ping': environ.get('DB_POOL_PRE_PING', '1') == '1',
+        'connect_args': connect_args,
+    }
+
+
+def install_statement_timeout(engine, environ=os.environ):
+    """Для PgBouncer: statement_timeout на початку кожної транзакції."""
+    statement_timeout = _env_int(environ, 'DB_STATEMENT_TIMEOUT', 30000)
+    if environ.get('PGBOUNCER', '0') != '1' or not statement_timeout:
+        return
+
+    @event.listens_for(engine, 'begin')
+    def _set_timeout(conn):
+        conn.exec_driver_sql(f'SET LOCAL statement_timeout = {statement_timeout}')
+
+
+def pool_status(engine):
+    """Поточний стан пулу для адмінського ендпоінта."""
+    pool = engine.pool
+    status = {'pool': type(pool).__name__, 'status': pool.status()}
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(0, pool.overflow()),
+            'max_overflow': pool._max_overflow,
+            'timeout': pool.timeout(),
+        })
+    stats = getattr(pool, 'stats', None)
+    if stats is not None:
+        status.update(stats.as_dict())
+    return status
@@ -0,0 +1,173 @@
+"""Потоковий імпорт книг з Excel.
+
+Аркуш читається в режимі read_only (openpyxl не будує всі клітинки в
+пам'яті), рядки вставляються пачками через Core insert (executemany) з
+комітом після кожної пачки. Від помилок рядків зберігаємо лише лічильник
+і перші кілька повідомлень, тож пам'ять не росте з розміром файлу.
+
+EAN нормалізується в ean13 (barcodes.py); якщо код уже має інша книга,
+рядок імпортується без ean13 і потрапляє в помилки.
+"""
+from datetime import datetime
+
+from openpyxl import load_workbook
+from sqlalchemy import insert, select
+
+from barcodes import normalize_ean
+
+CHUNK_SIZE = 1000
+MAX_ERROR_SAMPLES = 20
+MAX_TEXT_LENGTH = 500     # Book.name_book / Book.author
+
+# Варіанти заголовків колонок
+COLUMN_ALIASES = {
+    'name_book': ('name_book', 'назва', 'книга', 'name', 'название'),
+    'author': ('author', 'автор', 'writer'),
+    'ean': ('ean', 'isbn', 'код', 'code'),
+}
+
+
+class ImportFormatError(ValueError):
+    """У файлі немає обов'язкових колонок."""
+
+    def __init__(self, headers):
+        self.headers = headers
+        super().__init__(
+            f'У файлі відсутні обов\'язкові колонки! Потрібні: "name_book" (або "назва") '
+            f'та "author" (або "автор"). Знайдено колонки: {", ".join(headers)}')
+
+
+class ImportResult:
+    def __init__(self):
+        self.rows = 0
+        self.added = 0
+        self.error_count = 0
+        self.errors = []        # перші MAX_ERROR_SAMPLES повідомлень
+
+    def add_error(self, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERROR_SAMPLES:
+            self.errors.append(message)
+
+
+def _column_mapping(headers):
+    mapping = {}
+    for idx, header in enumerate(headers):
+        for field, aliases in COLUMN_ALIASES.items():
+            if header in aliases:
+                mapping[field] = idx
+                break
+    return mapping
+
+
+def _cell(row, idx):
+    value = row[idx] if idx is not None and idx < len(row) else None
+    if value is None:
+        return ''
+    value = str(value).strip()
+    return '' if value == 'None' else value
+
+
+def import_books(file, session, book_table, chunk_size=CHUNK_SIZE, after_chunk=None, progress=None,
+                 before_commit=None):
+    """Імпортує книги з .xlsx у book_table.
+
+    before_commit(rows) викликається перед комітом кожної пачки, у тій самій
+    транзакції — для лічильників статистики.
+    after_chunk(rows) викликається після коміту кожної пачки зі словниками
+    вставлених рядків (разом з id) — для оновлення індексів у пам'яті.
+    progress(result) — після кожної пачки, для відображення прогресу.
+    """
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        rows = ws.iter_rows(values_only=True)
+        header_row = next(rows, None) or ()
+        headers = [str(value).lower().strip() if value else '' for value in header_row]
+        mapping = _column_mapping(headers)
+        if 'name_book' not in mapping or 'author' not in mapping:
+            raise ImportFormatError(headers)
+
+        result = ImportResult()
+        stmt = insert(book_table).returning(book_table.c.id, sort_by_parameter_order=True)
+        chunk = []
+        row_numbers = []
+
+        def release_taken_codes():
+            # Коди, які вже є в базі або повторюються в пачці, — одним запитом за ix_book_ean13
+            codes = {row['ean13'] for row in chunk if row['ean13']}
+            if not codes:
+                return
+            owners = dict(session.execute(
+                select(book_table.c.ean13, book_table.c.id).where(book_table.c.ean13.in_(codes))).all())
+            for row, row_idx in zip(chunk, row_numbers):
+                code = row['ean13']
+                if code is None:
+                    continue
+                if code in owners:
+                    owner = f'книга №{owners[code]}' if owners[code] else 'рядок вище'
+                    result.add_error(f'Рядок {row_idx}: код {code} вже має {owner} — книгу додано без коду')
+                    row['ean13'] = None
+                else:
+                    owners[code] = None
+
+        def flush():
+            release_taken_codes()
+            ids = session.execute(stmt, chunk).scalars().all()
+            if before_commit:
+                before_commit(chunk)
+            session.commit()
+            for row, book_id in zip(chunk, ids):
+                row['id'] = book_id
+            result.added += len(chunk)
+            if after_chunk:
+                after_chunk(chunk)
+            if progress:
+                progress(result)
+
+        for row_idx, row in enumerate(rows, start=2):
+            result.rows += 1
+            try:
+                name_book = _cell(row, mapping['name_book'])
+                author = _cell(row, mapping['author'])
+                if not name_book:
+                    result.add_error(f'Рядок {row_idx}: Відсутня назва книги')
+                    continue
+                if not author:
+                    result.add_error(f'Рядок {row_idx}: Відсутній автор')
+                    continue
+                if len(name_book) > MAX_TEXT_LENGTH or len(author) > MAX_TEXT_LENGTH:
+                    result.add_error(f'Рядок {row_idx}: Назва або автор довші за {MAX_TEXT_LENGTH} символів')
+                    continue
+                now = datetime.utcnow()
+                ean = _cell(row, mapping.get('ean')) or '-'
+                chunk.append({
+                    'name_book': name_book,
+                    'author': author,
+                    'surname': '',
+                    'ean': ean,
+                    'ean13': normalize_ean(ean),
+                    'buyer': '',
+                    'phone': '',
+                    'stat': 'доступна',
+                    'date': now,
+                    'enddate': now,
+                    'history': '',
+                })
+                row_numbers.append(row_idx)
+            except Exception as e:
+                result.add_error(f'Рядок {row_idx}: {str(e)}')
+                continue
+
+            if len(chunk) >= chunk_size:
+                flush()
+                chunk = []
+                row_numbers = []
+
+        if chunk:
+            flush()
+        elif progress:
+            progress(result)
+        return result
+    finally:
+        wb.close()
@@ -0,0 +1,77 @@
+"""Спільні об'єкти застосунку: вхід, пошукові індекси, версія каталогу, стиснення, статика, фонові завдання, нагадування.
+
+Створюються без застосунку й підключаються в create_app() через init_app(),
+тож blueprint-и можуть імпортувати їх напряму. Індекси каталогу й авторів
+будуються ліниво — з першим пошуком у воркері, а не при імпорті.
+"""
+import os
+
+from flask_login import LoginManager
+
+from assets import Assets
+from author_index import AuthorIndex
+from catalog_search import CatalogSearch
+from compression import Compressor
+from http_cache import CatalogVersionCache
+from jobs import JobRunner
+from models import db, Book, CatalogVersion, Job, Loan, Reader, ScheduledTask, StatCounter, Tombstone, User
+from overdue import OverdueNotifier
+from search_index import CatalogIndex
+
+login_manager = LoginManager()
+login_manager.login_view = 'auth.login'
+login_manager.login_message = 'Будь ласка, увійдіть для доступу до цієї сторінки.'
+
+@login_manager.user_loader
+def load_user(user_id):
+    return User.query.get(int(user_id))
+
+# ====== ВЕРСІЯ КАТАЛОГУ ======
+# ETag списків і автопідказок; маршрути запису викликають catalog_version.bump() після коміту
+catalog_version = CatalogVersionCache(db, CatalogVersion)
+
+# ====== ПОШУКОВИЙ ІНДЕКС КАТАЛОГУ ======
+def _load_catalog_rows():
+    return db.session.query(Book.id, Book.name_book, Book.author, Book.ean, Book.stat).yield_per(1000)
+
+def _load_catalog_changes(since):
+    # Книги, змінені з since (індекс за updated_at), видалені з since (tombstone) і кількість книг
+    rows = db.session.query(Book.id, Book.name_book, Book.author, Book.ean, Book.stat) \
+        .filter(Book.updated_at >= since).all()
+    deleted = [row_id for (row_id,) in db.session.query(Tombstone.row_id)
+               .filter(Tombstone.table_name == 'book', Tombstone.deleted_at >= since)]
+    return rows, deleted, db.session.query(db.func.count(Book.id)).scalar()
+
+# Індекс живе у пам'яті кожного воркера й доганяє зміни інших процесів за версією каталогу;
+# SEARCH_INDEX_MAX_AGE (секунди) — додатково перебудовувати його періодично
+catalog_index = CatalogIndex(_load_catalog_rows, max_age=int(os.environ.get('SEARCH_INDEX_MAX_AGE', '0')),
+                             changes=_load_catalog_changes, state=catalog_version.current,
+                             on_use=catalog_version.served)
+
+def _load_author_counts():
+    # Кількість книг авторів уже ведуть лічильники статистики (stats.py) — без GROUP BY по каталогу
+    return db.session.query(StatCounter.name, StatCounter.value) \
+        .filter(StatCounter.kind == 'author', StatCounter.value > 0)
+
+# Словник авторів для автопідказок (create.html, edit_book.html)
+author_index = AuthorIndex(_load_author_counts, max_age=int(os.environ.get('SEARCH_INDEX_MAX_AGE', '0')),
+                           state=catalog_version.current, on_use=catalog_version.served)
+# Свої зміни словник уже вніс — після bump() цього процесу не перечитуємо його з бази
+catalog_version.on_bump(author_index.caught_up)
+catalog_search = CatalogSearch(db, Book, Reader, index=catalog_index)
+
+# ====== СТИСНЕННЯ ВІДПОВІДЕЙ ======
+# gzip / deflate для HTML і JSON (COMPRESS_LEVEL, COMPRESS_MIN_SIZE)
+compressor = Compressor()
+
+# ====== СТАТИЧНІ РЕСУРСИ ======
+# CSS/JS-бандли й логотипи з хешем у назві (static/dist, /assets/...), asset_url() у шаблонах
+assets = Assets()
+
+# ====== ФОНОВІ ЗАВДАННЯ ======
+# Імпорт, відновлення та експорт виконуються у пулі потоків (jobs.py)
+job_runner = JobRunner(db, Job)
+
+# ====== НАГАДУВАННЯ ПРО ПРОСТРОЧЕННЯ ======
+# Періодичний потік у воркері (OVERDUE_NOTIFY_INTERVAL, OVERDUE_SENDER), див. overdue.py
+overdue_notifier = OverdueNotifier(db, Book, Loan, ScheduledTask)
@@ -0,0 +1,217 @@
+"""Нечіткий пошук за словами назви й автора: опечатки, транслітерація, розкладка.
+
+Кожне слово спершу «згортається» до латинського скелета (fold): кирилиця
+транслітерується, а варіанти, що їх плутають при наборі латиницею
+(и/і/ї/й/y/j, г/ґ/х/g/h/kh, ц/c/ts, w/v...), зводяться до однієї форми —
+тож «Шевченко», «Shevchenko» і «Szewczenko» дають близькі скелети.
+Запит, набраний не в тій розкладці («rj,pfh» замість «кобзар»),
+перекладається як додатковий варіант (layout_variants).
+
+TokenIndex тримає відсортований словник скелетів — це неявне префіксне
+дерево. Пошук обходить його вглиб, рахуючи для кожного префікса один
+рядок таблиці відстані Дамерау — Левенштейна, і відкидає гілку, щойно
+всі відстані в рядку перевищили допустиму кількість правок — тож
+переглядається лише мала частина словника. Останнє слово запиту
+порівнюється як префікс, бо автопідказки шукають під час набору.
+"""
+import bisect
+import re
+from array import array
+from functools import lru_cache
+
+# Транслітерація (близько до КМУ 2010) + російські літери, які трапляються в назвах
+_CYRILLIC_TO_LATIN = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'h', 'ґ': 'g', 'д': 'd', 'е': 'e', 'є': 'ie',
+    'ж': 'zh', 'з': 'z', 'и': 'y', 'і': 'i', 'ї': 'i', 'й': 'i', 'к': 'k', 'л': 'l',
+    'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch', 'ь': '', 'ю': 'iu',
+    'я': 'ia', 'ы': 'y', 'э': 'e', 'ё': 'io', 'ъ': '', "'": '', '’': '', 'ʼ': '', '`': '',
+})
+# Латинські написання, які при наборі «на слух» плутають між собою
+_LATIN_FOLDS = [
+    (re.compile(r'shch|szcz'), 'sh'),
+    (re.compile(r'sz'), 'sh'),
+    (re.compile(r'cz'), 'ch'),
+    (re.compile(r'kh|gh'), 'h'),
+    (re.compile(r'ph'), 'f'),
+    (re.compile(r'c(?!h)'), 'ts'),
+    (re.compile(r'x'), 'ks'),
+    (re.compile(r'q'), 'k'),
+    (re.compile(r'w'), 'v'),
+    (re.compile(r'g'), 'h'),
+    (re.compile(r'[yj]'), 'i'),
+    (re.compile(r'(.)\1+'), r'\1'),
+]
+_WORD = re.compile(r'\w+')
+_APOSTROPHES = str.maketrans('', '', "'’ʼ`")
+
+# Українська розкладка ЙЦУКЕН поверх QWERTY
+_QWERTY = "qwertyuiop[]asdfghjkl;'zxcvbnm,.`"
+_UKRAINIAN = "йцукенгшщзхїфівапролджєячсмитьбю'"
+_EN_TO_UK = str.maketrans(_QWERTY, _UKRAINIAN)
+_UK_TO_EN = str.maketrans(_UKRAINIAN, _QWERTY)
+_QWERTY_QUERY = re.compile(r"^[a-z\[\];',.`\s\d-]*[a-z][a-z\[\];',.`\s\d-]*$")
+_UKRAINIAN_QUERY = re.compile(r"^[а-яєіїґ'\s\d-]*[а-яєіїґ][а-яєіїґ'\s\d-]*$")
+
+
+@lru_cache(maxsize=200_000)
+def fold(word):
+    """Латинський скелет слова для порівняння без урахування письма й транслітерації."""
+    word = word.lower().translate(_CYRILLIC_TO_LATIN)
+    for pattern, replacement in _LATIN_FOLDS:
+        word = pattern.sub(replacement, word)
+    return word
+
+
+def words(text):
+    """Скелети слів тексту; слова з однієї літери (прийменники, ініціали) не враховуються."""
+    folded = (fold(word) for word in _WORD.findall(text.lower().translate(_APOSTROPHES)))
+    return [word for word in folded if len(word) > 1]
+
+
+def layout_variants(query):
+    """Запит як є плюс, якщо його набрано не в тій розкладці, — переклад у іншу."""
+    q = query.lower()
+    variants = [query]
+    if _QWERTY_QUERY.match(q):
+        variants.append(q.translate(_EN_TO_UK))
+    elif _UKRAINIAN_QUERY.match(q):
+        variants.append(q.translate(_UK_TO_EN))
+    return variants
+
+
+def max_edits(length):
+    # Коротке слово з опечаткою збігається з надто багатьма — допускаємо менше правок
+    if length <= 3:
+        return 0
+    if length <= 6:
+        return 1
+    return 2
+
+
+def next_row(word, char, previous_char, row, previous_row):
+    """Наступний рядок таблиці відстаней (OSA) від префіксів word до рядка, продовженого char.
+
+    row — рядок для рядка без char, previous_row і previous_char — на крок раніше.
+    """
+    current = [row[0] + 1]
+    for j in range(1, len(word) + 1):
+        value = min(row[j] + 1, current[j - 1] + 1, row[j - 1] + (word[j - 1] != char))
+        if j > 1 and previous_char == word[j - 1] and word[j - 2] == char:
+            value = min(value, previous_row[j - 2] + 1)
+        current.append(value)
+    return current
+
+
+def distance(a, b):
+    """Відстань Дамерау — Левенштейна (OSA) між a і b."""
+    row, previous_row, previous_char = list(range(len(a) + 1)), None, None
+    for char in b:
+        row, previous_row, previous_char = next_row(a, char, previous_char, row, previous_row), row, char
+    return row[-1]
+
+
+class TokenIndex:
+    """Скелети слів -> id книг, з обходом відсортованого словника для нечіткого збігу."""
+
+    # Скільки останніх результатів similar() пам'ятати (запити повторюються при наборі)
+    CACHE_SIZE = 2048
+    # Більший за будь-який символ слова: межа діапазону слів з однаковим префіксом
+    _END = '\U0010ffff'
+
+    def __init__(self):
+        self._postings = {}      # слово -> array('q') id книг, відсортований
+        self._sorted = None      # відсортований словник; None — впорядкуємо з першим пошуком
+        self._cache = {}
+
+    def __len__(self):
+        return len(self._postings)
+
+    # ====== ЗМІНИ ======
+    def add(self, word, book_id):
+        posting = self._postings.get(word)
+        if posting is None:
+            posting = self._postings[word] = array('q')
+            if self._sorted is not None:
+                bisect.insort(self._sorted, word)
+            self._cache.clear()
+        if not posting or posting[-1] < book_id:
+            posting.append(book_id)
+        else:
+            pos = bisect.bisect_left(posting, book_id)
+            if pos == len(posting) or posting[pos] != book_id:
+                posting.insert(pos, book_id)
+
+    def discard(self, word, book_id):
+        posting = self._postings.get(word)
+        if posting is None:
+            return
+        pos = bisect.bisect_left(posting, book_id)
+        if pos < len(posting) and posting[pos] == book_id:
+            del posting[pos]
+        if not posting:
+            del self._postings[word]
+            if self._sorted is not None:
+                del self._sorted[bisect.bisect_left(self._sorted, word)]
+            self._cache.clear()
+
+    def postings(self, word):
+        return self._postings.get(word, ())
+
+    # ====== ПОШУК ======
+    def similar(self, word, prefix=False):
+        """[(слово словника, схожість 0..1)] для скелета слова запиту.
+
+        prefix — слово ще набирається: збігом вважається і початок довшого слова
+        (з трохи меншою схожістю, ніж ціле слово).
+        """
+        key = (word, prefix)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        if self._sorted is None:
+            self._sorted = sorted(self._postings)
+
+        vocabulary = self._sorted
+        limit = max_edits(len(word))
+        end = self._END
+        matches = []
+
+        def full_similarity(found):
+            return 1.0 - found / (len(word) + 1)
+
+        def prefix_similarity(found):
+            return 0.9 * (1.0 - found / (len(word) + 1))
+
+        # Вузол: слова vocabulary[lo:hi] зі спільним префіксом довжини depth;
+        # best_prefix — найменша відстань від word до префіксів на шляху до вузла
+        stack = [(0, len(vocabulary), 0, list(range(len(word) + 1)), None, None, len(word))]
+        while stack:
+            lo, hi, depth, row, previous_row, previous_char, best_prefix = stack.pop()
+            if lo < hi and len(vocabulary[lo]) == depth:
+                # Слово, яке закінчується в цьому вузлі
+                found = row[-1]
+                if found <= limit and (not prefix or found <= best_prefix):
+                    matches.append((vocabulary[lo], full_similarity(found)))
+                elif prefix and best_prefix <= limit:
+                    matches.append((vocabulary[lo], prefix_similarity(best_prefix)))
+                lo += 1
+            if prefix and best_prefix <= limit and depth >= len(word) + limit:
+                # Глибше відстань до префіксів уже не зменшиться — решта піддерева збігається
+                matches.extend((candidate, prefix_similarity(best_prefix)) for candidate in vocabulary[lo:hi])
+                continue
+            while lo < hi:
+                char = vocabulary[lo][depth]
+                child_hi = bisect.bisect_left(vocabulary, vocabulary[lo][:depth + 1] + end, lo, hi)
+                child_row = next_row(word, char, previous_char, row, previous_row)
+                child_best = min(best_prefix, child_row[-1]) if prefix else best_prefix
+                if min(child_row) <= limit:
+                    stack.append((lo, child_hi, depth + 1, child_row, row, char, child_best))
+                elif prefix and child_best <= limit:
+                    matches.extend((candidate, prefix_similarity(child_best)) for candidate in vocabulary[lo:child_hi])
+                lo = child_hi
+
+        if len(self._cache) >= self.CACHE_SIZE:
+            self._cache.clear()
+        self._cache[key] = matches
+        return matches
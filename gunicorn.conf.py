@@ -0,0 +1,96 @@
+"""Профіль gunicorn для сервера.
+
+Запуск:  gunicorn --config gunicorn.conf.py
+
+Змінні оточення:
+  GUNICORN_WORKER_CLASS  gthread (за замовчуванням) або sync
+  WEB_CONCURRENCY        кількість процесів; за замовчуванням від кількості CPU
+  GUNICORN_THREADS       потоків на процес для gthread (за замовчуванням 4)
+  GUNICORN_MAX_WORKERS   стеля для автоматичної кількості процесів (8)
+  GUNICORN_TIMEOUT       секунд на запит до перезапуску воркера (60)
+  GUNICORN_PRELOAD       1 — застосунок імпортується в майстрі до fork (за замовчуванням)
+  GUNICORN_MAX_REQUESTS  перезапускати воркер після стількох запитів (0 — ніколи, за замовчуванням)
+  PORT                   порт (платформа задає сама)
+
+Важка робота (імпорт Excel, відновлення, експорт) йде у фонових завданнях,
+тож запит тримає потік недовго; gthread дає автопідказкам окремі потоки,
+поки інший потік приймає великий файл. Обрані WEB_CONCURRENCY і
+GUNICORN_THREADS записуються в оточення — за ними db_engine.py рахує пул.
+"""
+import multiprocessing
+import os
+
+
+def _env_int(name, default):
+    value = os.environ.get(name, '')
+    return int(value) if value.strip() else default
+
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+if worker_class not in ('sync', 'gthread'):
+    raise ValueError(f'GUNICORN_WORKER_CLASS: очікується sync або gthread, а не {worker_class!r}')
+
+cpu_count = multiprocessing.cpu_count()
+threads = _env_int('GUNICORN_THREADS', 4) if worker_class == 'gthread' else 1
+# sync: класичні 2 × CPU + 1 процеси; gthread: паралельність дають потоки, процесів — CPU + 1
+default_workers = 2 * cpu_count + 1 if worker_class == 'sync' else cpu_count + 1
+workers = _env_int('WEB_CONCURRENCY', min(default_workers, _env_int('GUNICORN_MAX_WORKERS', 8)))
+
+os.environ['WEB_CONCURRENCY'] = str(workers)
+os.environ['GUNICORN_THREADS'] = str(threads)
+
+wsgi_app = 'app:create_app()'
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# Застосунок імпортується один раз у майстрі: воркери стартують fork-ом без
+# повторного імпорту. До першого запиту з'єднань з базою немає (bench_startup.py)
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') == '1'
+
+timeout = _env_int('GUNICORN_TIMEOUT', 60)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+
+# Плановий перезапуск воркерів вимкнено: він обриває фонові завдання (імпорт,
+# відновлення) посеред роботи. Якщо все ж увімкнути — завдання воркера, що
+# зупиняється, позначаються як failed (worker_exit), а не висять "виконується"
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 0)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+# Heartbeat воркерів у пам'яті, а не на диску контейнера
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    # Індекси каталогу в майстрі не будуємо: знімок на момент старту успадкував би
+    # кожен воркер (і кожен перезапущений). Воркер будує свій з першим пошуком
+    # і доганяє зміни за версією каталогу (search_index.py)
+    server.log.info('Профіль: %s, процесів %s, потоків %s, preload=%s',
+                    worker_class, workers, threads, preload_app)
+
+
+def worker_exit(server, worker):
+    # Незавершені фонові завдання воркера не переживуть його — позначаємо їх одразу
+    from extensions import job_runner
+    if job_runner.app is None:
+        return
+    try:
+        abandoned = job_runner.abandon()
+    except Exception:
+        server.log.exception('Не вдалося позначити завдання воркера %s', worker.pid)
+        return
+    if abandoned:
+        server.log.warning('Воркер %s зупинився з %s незавершеними завданнями', worker.pid, abandoned)
+
+
+def post_fork(server, worker):
+    if not preload_app:
+        return
+    # З'єднання з пулу майстра не можна ділити між процесами: кожен воркер відкриває свої
+    from models import db
+    with server.app.wsgi().app_context():
+        db.engine.dispose(close=False)
@@ -0,0 +1,167 @@
+"""Умовні GET-запити (ETag / Last-Modified) для списків і автопідказок каталогу.
+
+Версія каталогу — рядок таблиці catalog_version, який кожен маршрут запису,
+імпорт і відновлення збільшують після свого коміту. Кожен процес тримає
+прочитану версію в пам'яті CATALOG_VERSION_TTL секунд, тож повторний запит
+з If-None-Match отримує 304 без запитів до каталогу й без рендерингу
+(Flask-Login, як і завжди, читає користувача сесії). Процес, що сам змінив
+дані, бачить нову версію одразу; інші — не пізніше ніж за TTL (0 — читати
+версію з бази на кожен запит). За цією ж версією індекси пошуку в пам'яті
+воркера дізнаються, що каталог змінили інші процеси (search_index.py);
+bump(reset=True) після відновлення з бекапу вимагає від них повної перебудови.
+
+Індекс у пам'яті воркера може ще не дійти до версії, прочитаної для
+запиту; тоді він повідомляє served() свою версію, і ETag відповіді
+будується з меншої з них — клієнт не закешує старі результати під новим ETag.
+
+ETag залежить від версії, шляху із запитом і користувача: сторінки
+показують кнопки за роллю, тож кеш приватний (Cache-Control: private, no-cache —
+браузер щоразу перевіряє, чи не змінилась версія).
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+from functools import wraps
+
+from flask import g, has_request_context, make_response, request, session
+from flask_login import current_user
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from compression import ETAG_SUFFIXES
+
+logger = logging.getLogger(__name__)
+
+CACHE_CONTROL = 'private, no-cache'
+
+# reset_version — версія останньої масової заміни каталогу (відновлення з бекапу)
+CatalogState = namedtuple('CatalogState', 'version changed_at reset_version')
+
+
+class CatalogVersionCache:
+    def __init__(self, db, version_model, ttl=1.0):
+        self.db = db
+        self.table = version_model.__table__
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cached = None
+        self._fetched_at = 0.0
+        self._listeners = []
+
+    def init_app(self, app):
+        self.ttl = app.config['CATALOG_VERSION_TTL']
+
+    def on_bump(self, callback):
+        """callback(state) після кожного bump() цього процесу з версією, яку він записав."""
+        self._listeners.append(callback)
+
+    # ====== ВЕРСІЯ ======
+    def _read(self, conn):
+        row = conn.execute(self.db.select(self.table.c.version, self.table.c.changed_at, self.table.c.reset_version)
+                           .where(self.table.c.id == 1)).first()
+        return CatalogState(row.version, row.changed_at, row.reset_version or 0) if row else CatalogState(0, None, 0)
+
+    def _store(self, value):
+        with self._lock:
+            self._cached = value
+            self._fetched_at = time.monotonic()
+
+    def current(self):
+        """CatalogState або None, якщо таблиці ще немає (міграцію не застосовано)."""
+        with self._lock:
+            if self._cached is not None and time.monotonic() - self._fetched_at < self.ttl:
+                return self._cached
+        try:
+            with self.db.engine.connect() as conn:
+                value = self._read(conn)
+        except SQLAlchemyError:
+            logger.warning('Не вдалося прочитати версію каталогу', exc_info=True)
+            return None
+        self._store(value)
+        return value
+
+    def bump(self, reset=False):
+        """Нова версія каталогу; викликати після коміту змін, а не до нього.
+
+        reset=True — каталог замінено цілком (відновлення з бекапу): індекси
+        в пам'яті інших воркерів перебудуються, а не доганятимуть зміни.
+        """
+        now = datetime.utcnow()
+        values = {'version': self.table.c.version + 1, 'changed_at': now}
+        if reset:
+            values['reset_version'] = self.table.c.version + 1
+        stmt = self.table.update().where(self.table.c.id == 1).values(**values)
+        try:
+            try:
+                with self.db.engine.begin() as conn:
+                    if conn.execute(stmt).rowcount == 0:
+                        conn.execute(self.table.insert().values(id=1, version=1, changed_at=now,
+                                                                reset_version=1 if reset else 0))
+                    value = self._read(conn)
+            except IntegrityError:
+                # Рядок щойно вставив інший процес
+                with self.db.engine.begin() as conn:
+                    conn.execute(stmt)
+                    value = self._read(conn)
+        except SQLAlchemyError:
+            # Дані вже закомічені; без нової версії кеш браузера застаріє, тож скидаємо й свою копію
+            logger.warning('Не вдалося оновити версію каталогу', exc_info=True)
+            with self._lock:
+                self._cached = None
+            return
+        self._store(value)
+        for callback in self._listeners:
+            callback(value)
+
+    def served(self, version):
+        """Відповідь зібрано з даних версії version (індекс у пам'яті може відставати)."""
+        if version is None or not has_request_context():
+            return
+        g.catalog_served_version = min(g.get('catalog_served_version', version), version)
+
+    # ====== УМОВНИЙ GET ======
+    def _etag(self, version):
+        user = f'{current_user.id}:{current_user.role}' if current_user.is_authenticated else 'anon'
+        key = hashlib.sha1(f'{request.full_path}|{user}'.encode('utf-8')).hexdigest()[:16]
+        return f'v{version}-{key}'
+
+    def conditional(self, view):
+        """Декоратор GET-маршруту: 304, якщо в клієнта сторінка цієї ж версії каталогу."""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Непоказані flash-повідомлення мають потрапити на сторінку — рендеримо заново
+            state = self.current() if '_flashes' not in session else None
+            if state is None:
+                return view(*args, **kwargs)
+            version, changed_at = state.version, state.changed_at
+            etag = self._etag(version)
+
+            if request.if_none_match:
+                # Клієнт може мати стиснений варіант ("…-gzip", див. compression.py);
+                # для If-None-Match порівняння слабке, тож W/"…" від проксі теж підходить
+                matched = next((tag for tag in (etag,) + tuple(etag + suffix for suffix in ETAG_SUFFIXES)
+                                if request.if_none_match.contains_weak(tag)), None)
+                not_modified = matched is not None
+                if not_modified:
+                    etag = matched
+            else:
+                not_modified = (changed_at is not None and request.if_modified_since is not None
+                                and changed_at.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None))
+            if not_modified:
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                served = g.pop('catalog_served_version', None)
+                if served is not None and served < version:
+                    # Дані старіші за прочитану версію — ETag старої версії, без Last-Modified
+                    etag, changed_at = self._etag(served), None
+            if response.status_code in (200, 304):
+                response.set_etag(etag)
+                if changed_at is not None:
+                    response.last_modified = changed_at
+                response.headers['Cache-Control'] = CACHE_CONTROL
+                response.vary.add('Cookie')
+            return response
+        return wrapper
@@ -0,0 +1,242 @@
+"""Фонові завдання (імпорт, відновлення, експорт) без зовнішнього брокера.
+
+Завдання виконуються в пулі потоків воркера, що їх прийняв. Стан
+(статус, лічильники, помилки, результат) зберігається в таблиці job, тож
+сторінку прогресу може обслужити будь-який воркер. Проміжний прогрес
+пишеться окремим з'єднанням не частіше ніж раз на PERSIST_INTERVAL секунд
+(на SQLite — лише початок і кінець, щоб не чекати на блокування запису);
+воркер-виконавець віддає свіжий стан прямо з пам'яті.
+
+Рядок завдання знає свого власника (хост:pid), а окремий потік раз на
+HEARTBEAT_INTERVAL секунд оновлює heartbeat_at усіх незавершених завдань
+воркера. Якщо воркер зник (перезапуск, деплой, OOM), сигнал припиняється:
+status() позначає таке завдання як failed, щойно його хтось прочитає, —
+сторінка прогресу не показуватиме "виконується" вічно. Перед штатною
+зупинкою воркер сам позначає свої незавершені завдання (abandon()).
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+PERSIST_INTERVAL = 1.0
+MAX_ERROR_MESSAGES = 20
+HEARTBEAT_INTERVAL = 30
+# Без сигналу довше за це — власник завдання вважається зниклим
+STALE_AFTER = timedelta(seconds=HEARTBEAT_INTERVAL * 4)
+
+ORPHANED_MESSAGE = '❌ Воркер, що виконував завдання, зупинився — запустіть завдання ще раз'
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+_FIELDS = ('id', 'kind', 'status', 'processed', 'total', 'error_count', 'errors',
+           'message', 'result_path', 'created_by', 'created_at', 'started_at', 'finished_at')
+_UNFINISHED = (STATUS_QUEUED, STATUS_RUNNING)
+
+
+def _owner():
+    # pid повторюються в контейнерах різних хостів, тож разом з назвою хоста
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+class JobProgress:
+    """Передається першим аргументом у функцію завдання."""
+
+    def __init__(self, runner, job_id):
+        self._runner = runner
+        self.job_id = job_id
+        self.processed = 0
+
+    def advance(self, step=500):
+        # Ще один оброблений запис; прогрес оновлюємо раз на step записів
+        self.processed += 1
+        if self.processed % step == 0:
+            self.update(processed=self.processed)
+
+    def update(self, processed=None, total=None, error_count=None, errors=None):
+        changes = {}
+        if processed is not None:
+            self.processed = processed
+            changes['processed'] = processed
+        if total is not None:
+            changes['total'] = total
+        if error_count is not None:
+            changes['error_count'] = error_count
+        if errors is not None:
+            changes['errors'] = '\n'.join(errors[:MAX_ERROR_MESSAGES])
+        self._runner._update(self.job_id, changes)
+
+
+class JobRunner:
+    def __init__(self, db, job_model):
+        self.app = None
+        self.db = db
+        self.persist_progress = True
+        self.table = job_model.__table__
+        self._executor = None
+        self._lock = threading.Lock()
+        self._states = {}
+        self._persisted_at = {}
+        self._heartbeat_pid = None
+
+    def init_app(self, app, max_workers=2, persist_progress=True):
+        # Потоки пулу стартують лише з першим завданням — воркер gunicorn
+        # після fork отримує порожній пул
+        self.app = app
+        self.persist_progress = persist_progress
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        app.extensions['job_runner'] = self
+
+    # ====== ЗАПУСК ======
+    def submit(self, kind, func, *args, user_id=None):
+        """Створює запис job і ставить func(progress, *args) у чергу; повертає id.
+
+        func повертає словник з 'message' і, за потреби, 'result_path'.
+        """
+        job_id = uuid.uuid4().hex
+        state = {
+            'id': job_id, 'kind': kind, 'status': STATUS_QUEUED,
+            'processed': 0, 'total': None, 'error_count': 0, 'errors': '',
+            'message': '', 'result_path': None, 'created_by': user_id,
+            'created_at': datetime.utcnow(), 'started_at': None, 'finished_at': None,
+            'owner': _owner(), 'heartbeat_at': datetime.utcnow(),
+        }
+        with self.db.engine.begin() as conn:
+            conn.execute(self.table.insert().values(**state))
+        with self._lock:
+            self._states[job_id] = state
+        self._ensure_heartbeat()
+        self._executor.submit(self._run, job_id, func, args)
+        return job_id
+
+    # ====== СИГНАЛ ЖИТТЯ ======
+    def _ensure_heartbeat(self):
+        # Один потік на процес; після fork воркера його треба запустити заново
+        with self._lock:
+            if self._heartbeat_pid == os.getpid():
+                return
+            self._heartbeat_pid = os.getpid()
+        threading.Thread(target=self._heartbeat_loop, name='job-heartbeat', daemon=True).start()
+
+    def _heartbeat_loop(self):
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            with self._lock:
+                job_ids = list(self._states)
+            if not job_ids:
+                continue
+            try:
+                with self.app.app_context(), self.db.engine.begin() as conn:
+                    conn.execute(self.table.update().where(self.table.c.id.in_(job_ids))
+                                 .values(heartbeat_at=datetime.utcnow()))
+            except Exception:
+                logger.warning('Не вдалося оновити сигнал завдань %s', job_ids, exc_info=True)
+
+    def abandon(self, message=ORPHANED_MESSAGE):
+        """Позначає незавершені завдання цього процесу як failed (перед зупинкою воркера)."""
+        with self._lock:
+            job_ids = list(self._states)
+            self._states.clear()
+            self._persisted_at.clear()
+        if job_ids:
+            with self.app.app_context(), self.db.engine.begin() as conn:
+                conn.execute(self.table.update()
+                             .where(self.table.c.id.in_(job_ids), self.table.c.status.in_(_UNFINISHED))
+                             .values(status=STATUS_FAILED, message=message, finished_at=datetime.utcnow()))
+        return len(job_ids)
+
+    def _run(self, job_id, func, args):
+        with self.app.app_context():
+            self._update(job_id, {'status': STATUS_RUNNING, 'started_at': datetime.utcnow()}, force=True)
+            progress = JobProgress(self, job_id)
+            try:
+                result = func(progress, *args) or {}
+                final = {'status': STATUS_DONE, 'message': result.get('message', ''),
+                         'result_path': result.get('result_path')}
+            except Exception as e:
+                logger.exception('Завдання %s завершилося з помилкою', job_id)
+                self.db.session.rollback()
+                final = {'status': STATUS_FAILED, 'message': f'❌ {str(e)}'}
+            finally:
+                self.db.session.remove()
+            final['processed'] = progress.processed
+            final['finished_at'] = datetime.utcnow()
+            self._update(job_id, final, force=True)
+            with self._lock:
+                # Завершений стан уже в базі — звільняємо пам'ять
+                self._states.pop(job_id, None)
+                self._persisted_at.pop(job_id, None)
+
+    # ====== СТАН ======
+    def _update(self, job_id, changes, force=False):
+        with self._lock:
+            state = self._states.get(job_id)
+            if state is None:
+                return
+            state.update(changes)
+            now = time.monotonic()
+            if not force and (not self.persist_progress
+                              or now - self._persisted_at.get(job_id, 0) < PERSIST_INTERVAL):
+                return
+            self._persisted_at[job_id] = now
+            snapshot = {key: value for key, value in state.items() if key != 'id'}
+        try:
+            with self.db.engine.begin() as conn:
+                conn.execute(self.table.update().where(self.table.c.id == job_id).values(**snapshot))
+        except Exception:
+            # Проміжний прогрес не критичний
+            if force:
+                raise
+            logger.warning('Не вдалося зберегти прогрес завдання %s', job_id, exc_info=True)
+
+    def status(self, job_id):
+        """Стан завдання як словник або None, якщо такого немає."""
+        with self._lock:
+            state = self._states.get(job_id)
+            if state is not None:
+                return dict(state)
+        with self.db.engine.connect() as conn:
+            row = conn.execute(self.table.select().where(self.table.c.id == job_id)).mappings().first()
+        if row is None:
+            return None
+        job = {key: row[key] for key in _FIELDS}
+        if job['status'] in _UNFINISHED and self._orphaned(row):
+            self._fail_orphaned(job)
+        return job
+
+    def _orphaned(self, row):
+        if row['owner'] == _owner():
+            # Власник — цей процес, але завдання в ньому вже немає
+            return True
+        heartbeat = row['heartbeat_at'] or row['started_at'] or row['created_at']
+        return heartbeat is not None and datetime.utcnow() - heartbeat > STALE_AFTER
+
+    def _fail_orphaned(self, job):
+        now = datetime.utcnow()
+        with self.db.engine.begin() as conn:
+            # Умова на статус — якщо завдання тим часом завершилось, не чіпаємо його
+            conn.execute(self.table.update()
+                         .where(self.table.c.id == job['id'], self.table.c.status.in_(_UNFINISHED))
+                         .values(status=STATUS_FAILED, message=ORPHANED_MESSAGE, finished_at=now))
+        logger.warning('Завдання %s лишилось без воркера (%s) — позначено як failed', job['id'], job['status'])
+        job.update(status=STATUS_FAILED, message=ORPHANED_MESSAGE, finished_at=now)
+
+
+def remove_old_files(directory, max_age):
+    """Видаляє файли завдань (завантаження, експорт), старші за max_age секунд."""
+    cutoff = time.time() - max_age
+    for entry in os.scandir(directory):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
@@ -0,0 +1,628 @@
+"""Каталог книг і читачі: списки, пошук, видача, редагування (blueprint 'library')."""
+from datetime import datetime
+
+from flask import Blueprint, current_app, flash, jsonify, redirect, render_template, request
+from flask_login import current_user, login_required
+
+from barcodes import is_blank, normalize_ean
+from circulation import CHECKOUT, MAX_ITEMS, RETURN, checkout, parse_items, return_books
+from extensions import author_index, catalog_index, catalog_search, catalog_version
+from models import db, Book, Loan, Reader, Tombstone
+from overdue import count_overdue, days_overdue, overdue_cutoff, overdue_page
+from pagination import decode_cursor, keyset_page, page_size_from, split_page
+from stats import apply as apply_stats, book_count, book_delta, dashboard, loan_delta, rename_reader
+
+bp = Blueprint('library', __name__)
+
+# ====== ПАГІНАЦІЯ ======
+def _page_size(default=None):
+    return page_size_from(request.args, default or current_app.config['PAGE_SIZE'], current_app.config['PAGE_SIZE_MAX'])
+
+def _book_page(search_query, stat=None, page_size=None, with_total=True):
+    # Одна сторінка книг за курсором (id) + загальна кількість окремим COUNT;
+    # четверте значення — чи це схожі книги замість точних збігів
+    cursor = request.args.get('cursor')
+    page_size = page_size or _page_size()
+    if search_query and request.args.get('fuzzy') == '1':
+        books = catalog_search.fuzzy_books(search_query, stat=stat, limit=page_size)
+        return books, None, len(books), True
+    if search_query:
+        after = decode_cursor(cursor)
+        after_id = after[0] if after and isinstance(after[0], int) else None
+        rows = catalog_search.books(search_query, stat=stat, limit=page_size + 1, after=after_id)
+        books, next_cursor = split_page(rows, page_size, lambda book: [book.id])
+        total = catalog_search.count_books(search_query, stat=stat) if with_total else None
+        if not books and cursor is None and current_app.config['SEARCH_FUZZY']:
+            books = catalog_search.fuzzy_books(search_query, stat=stat, limit=page_size)
+            return books, None, len(books), bool(books)
+    else:
+        query = Book.query
+        if stat is not None:
+            query = query.filter(Book.stat == stat)
+        books, next_cursor = keyset_page(query, (Book.id,), lambda book: [book.id], cursor, page_size)
+        # Без пошуку кількість — з лічильників статистики, а не COUNT по каталогу
+        total = book_count(db.session, stat) if with_total else None
+    return books, next_cursor, total, False
+
+def _reader_sort_keys():
+    # Прізвище та ім'я без урахування регістру, в порядку української абетки
+    collation = current_app.config['READER_COLLATION']
+    keys = [db.func.lower(Reader.surname), db.func.lower(Reader.name)]
+    if collation:
+        keys = [key.collate(collation) for key in keys]
+    return keys
+
+def _reader_page(search_query, page_size=None):
+    # Сторінка читачів разом з ознакою виданих книг — одним запитом
+    surname_key, name_key = _reader_sort_keys()
+    has_books = db.exists().where(Book.stat == 'видана', Book.phone == Reader.phone)
+    query = db.session.query(Reader, has_books.label('has_books'),
+                             surname_key.label('surname_key'), name_key.label('name_key'))
+    count_query = Reader.query
+    if search_query:
+        condition = catalog_search.reader_filter(search_query)
+        query = query.filter(condition)
+        count_query = count_query.filter(condition)
+    rows, next_cursor = keyset_page(query, (surname_key, name_key, Reader.id),
+                                    lambda row: [row.surname_key, row.name_key, row.Reader.id],
+                                    request.args.get('cursor'), page_size or _page_size())
+    return rows, next_cursor, count_query
+
+# ====== ШТРИХКОДИ ======
+def _checked_ean(ean, book_id=None):
+    # (EAN-13 або None, помилка або None, попередження або None) для EAN з форми.
+    # Код, який уже має інша книга (ще один примірник), не прив'язуємо — як імпорт і backfill
+    if is_blank(ean):
+        return None, None, None
+    code = normalize_ean(ean)
+    if code is None:
+        return None, f'⚠️ "{ean}" — некоректний EAN/ISBN: перевірте цифри (контрольна цифра не збігається)', None
+    owner = db.session.query(Book.id, Book.name_book).filter(Book.ean13 == code, Book.id != book_id).first()
+    if owner is not None:
+        return None, None, f'⚠️ Код {code} вже має книга «{owner.name_book}» (№{owner.id}) — книгу збережено без коду'
+    return code, None, None
+
+def _book_by_ean(code):
+    # Один запит за унікальним індексом ix_book_ean13
+    return db.session.query(Book.id, Book.name_book, Book.author, Book.ean, Book.stat) \
+        .filter(Book.ean13 == code).first()
+
+# ====== ОСНОВНІ МАРШРУТИ ======
+@bp.route('/booked')
+@catalog_version.conditional
+def booked():
+    search_query = request.args.get('search', '')
+    booked, next_cursor, total, fuzzy = _book_page(search_query, stat='видана')
+    return render_template('booked.html', booked=booked, search_query=search_query,
+                           next_cursor=next_cursor, total=total, fuzzy=fuzzy)
+
+@bp.route('/notbook')
+@catalog_version.conditional
+def notbook():
+    search_query = request.args.get('search', '')
+    notbook, next_cursor, total, fuzzy = _book_page(search_query, stat='доступна')
+    return render_template('notbook.html', notbook=notbook, search_query=search_query,
+                           next_cursor=next_cursor, total=total, fuzzy=fuzzy)
+
+@bp.route('/')
+@bp.route('/books')
+@catalog_version.conditional
+def books():
+    search_query = request.args.get('search', '')
+    # Сканер штрихкодів «вводить» код у пошук — відкриваємо книгу одразу
+    code = normalize_ean(search_query) if search_query else None
+    if code is not None:
+        book = _book_by_ean(code)
+        if book is not None:
+            return redirect(f'/books/{book.id}')
+    books, next_cursor, total, fuzzy = _book_page(search_query)
+    return render_template('value_books.html', books=books, search_query=search_query,
+                           next_cursor=next_cursor, total=total, fuzzy=fuzzy)
+
+@bp.route('/readers')
+@login_required
+@catalog_version.conditional
+def readers():
+    search_query = request.args.get('search', '')
+    # Сторінка читачів, відсортованих за прізвищем, потім за іменем
+    rows, next_cursor, count_query = _reader_page(search_query)
+    total = count_query.count()
+    
+    readers_with_books = [{'reader': row.Reader, 'has_books': bool(row.has_books)} for row in rows]
+    
+    return render_template('readers.html', readers_data=readers_with_books, search_query=search_query,
+                           next_cursor=next_cursor, total=total)
+
+def _book_loans(book_id):
+    # Історія видач книги, найновіші першими (індекс ix_loan_book_start)
+    return Loan.query.filter_by(book_id=book_id).order_by(Loan.start.desc(), Loan.id.desc()).all()
+
+@bp.route('/books/<int:id>', methods=['POST', 'GET'])
+@login_required
+def change(id):
+    book = db.get_or_404(Book, id)
+    if request.method == 'POST':
+        enddate_str = request.form.get('enddate')
+        if enddate_str:
+            enddate = datetime.strptime(enddate_str, '%Y-%m-%d')
+        else:
+            enddate = datetime.utcnow()
+        
+        new_stat = request.form['stat']
+        if new_stat == 'видана':
+            buyer = request.form.get('buyer', '').strip()
+            phone = request.form.get('phone', '').strip()
+            surname = request.form.get('surname', '').strip()
+            if not buyer or not phone or not surname:
+                flash('⚠️ Заповніть всі поля: ім\'я, прізвище та телефон!', 'warning')
+                return render_template('change.html', book=book, loans=_book_loans(book.id))
+        
+        # Лічильники статистики: книга змінює стан, нові записи видач додаються до днів і читачів
+        deltas = [book_delta(book.author, book.stat, -1),
+                  book_delta(book.author, 'видана' if new_stat == 'видана' else 'доступна')]
+
+        # Закриваємо поточну видачу, якщо книга була у читача
+        if book.buyer and book.buyer.strip():
+            open_loan = Loan.query.filter_by(book_id=book.id, returned_at=None) \
+                .order_by(Loan.start.desc()).first()
+            if open_loan is None:
+                # Книгу видали ще до появи таблиці loan — відновлюємо запис з полів книги
+                open_loan = Loan(book_id=book.id, reader=book.buyer, surname=book.surname or '',
+                                 phone=book.phone or '', start=book.date, due=book.enddate)
+                db.session.add(open_loan)
+                deltas.append(loan_delta(open_loan.start, open_loan.phone))
+            open_loan.returned_at = datetime.utcnow()
+        
+        if new_stat == 'видана':
+            book.buyer = buyer
+            book.phone = phone
+            book.surname = surname
+            book.stat = 'видана'
+            book.date = datetime.utcnow()
+            book.enddate = enddate
+            db.session.add(Loan(book_id=book.id, reader=buyer, surname=surname, phone=phone,
+                                start=book.date, due=enddate))
+            deltas.append(loan_delta(book.date, phone))
+        else:
+            book.buyer = ''
+            book.phone = ''
+            book.surname = ''
+            book.stat = 'доступна'
+            book.enddate = enddate
+            book.date = datetime.utcnow()
+
+        try:
+            apply_stats(db.session, deltas)
+            db.session.commit()
+            catalog_index.upsert(book)
+            catalog_version.bump()
+            if new_stat == 'видана':
+                existing_reader = Reader.query.filter_by(phone=phone).first()
+                if not existing_reader:
+                    new_reader = Reader(name=buyer, surname=surname, phone=phone)
+                    db.session.add(new_reader)
+                    db.session.commit()
+                    catalog_version.bump()
+            flash('✅ Дані успішно оновлено!', 'success')
+            return redirect('/books')
+        except Exception as e:
+            db.session.rollback()
+            flash(f'⚠️ Помилка: {str(e)}', 'danger')
+            return render_template('change.html', book=book, loans=_book_loans(book.id))
+    return render_template('change.html', book=book, loans=_book_loans(book.id))
+
+@bp.route('/api/loans')
+@login_required
+def api_loans():
+    # Історія видач за читачем (?phone=) та/або періодом (?from=, ?to= у форматі РРРР-ММ-ДД)
+    query = Loan.query
+    phone = request.args.get('phone', '').strip()
+    if phone:
+        query = query.filter(Loan.phone == phone)
+    try:
+        if request.args.get('from'):
+            query = query.filter(Loan.start >= datetime.strptime(request.args['from'], '%Y-%m-%d'))
+        if request.args.get('to'):
+            query = query.filter(Loan.start < datetime.strptime(request.args['to'], '%Y-%m-%d'))
+    except ValueError:
+        return jsonify({'error': 'Невірний формат дати, потрібен РРРР-ММ-ДД'}), 400
+    
+    loans, next_cursor = keyset_page(query, (Loan.id,), lambda loan: [loan.id],
+                                     request.args.get('cursor'), _page_size())
+    results = []
+    for loan in loans:
+        results.append({
+            'id': loan.id,
+            'book_id': loan.book_id,
+            'reader': loan.reader,
+            'surname': loan.surname,
+            'phone': loan.phone,
+            'start': loan.start.isoformat() if loan.start else None,
+            'due': loan.due.isoformat() if loan.due else None,
+            'returned_at': loan.returned_at.isoformat() if loan.returned_at else None
+        })
+    return jsonify({'results': results, 'next_cursor': next_cursor})
+
+@bp.route('/stats')
+@login_required
+def stats():
+    # Панель статистики: лише рядки лічильників, незалежно від розміру каталогу
+    return render_template('stats.html', stats=dashboard(db.session))
+
+@bp.route('/overdue')
+@login_required
+def overdue():
+    # Прострочені видачі: найдовше прострочені першими (без ETag — межа змінюється щодоби)
+    cutoff = overdue_cutoff()
+    rows, next_cursor = overdue_page(db.session, Book, cutoff, request.args.get('cursor'), _page_size())
+    total = count_overdue(db.session, Book, cutoff)
+    return render_template('overdue.html', overdue=rows, cutoff=cutoff, days_overdue=days_overdue,
+                           total=total, next_cursor=next_cursor, search_query=None)
+
+@bp.route('/api/overdue')
+@login_required
+def api_overdue():
+    cutoff = overdue_cutoff()
+    rows, next_cursor = overdue_page(db.session, Book, cutoff, request.args.get('cursor'), _page_size())
+    results = []
+    for row in rows:
+        results.append({
+            'id': row.id,
+            'name_book': row.name_book,
+            'author': row.author,
+            'reader': row.buyer,
+            'surname': row.surname,
+            'phone': row.phone,
+            'due': row.enddate.isoformat(),
+            'days_overdue': days_overdue(row.enddate, cutoff)
+        })
+    return jsonify({'results': results, 'next_cursor': next_cursor,
+                    'total': count_overdue(db.session, Book, cutoff)})
+
+@bp.route('/api/ean/<code>')
+@login_required
+def api_ean(code):
+    # Пошук книги за відсканованим EAN/ISBN; браузер одразу переходить на сторінку видачі
+    wants_html = request.accept_mimetypes.best_match(['application/json', 'text/html']) == 'text/html'
+    ean13 = normalize_ean(code)
+    if ean13 is None:
+        if wants_html:
+            flash(f'⚠️ "{code}" — некоректний EAN/ISBN', 'warning')
+            return redirect('/books')
+        return jsonify({'error': 'Некоректний EAN/ISBN'}), 400
+    book = _book_by_ean(ean13)
+    if book is None:
+        if wants_html:
+            flash(f'❌ Книгу з кодом {ean13} не знайдено', 'warning')
+            return redirect(f'/books?search={ean13}')
+        return jsonify({'error': 'Книгу з таким кодом не знайдено', 'ean13': ean13}), 404
+    if wants_html:
+        return redirect(f'/books/{book.id}')
+    return jsonify({
+        'id': book.id,
+        'name_book': book.name_book,
+        'author': book.author,
+        'ean': book.ean,
+        'ean13': ean13,
+        'stat': book.stat,
+        'url': f'/books/{book.id}'
+    })
+
+# ====== ВИДАЧА Й ПОВЕРНЕННЯ ПАЧКОЮ ======
+def _circulation_error(stat, items, name, surname, phone):
+    if not items:
+        return '⚠️ Відскануйте хоча б один код!'
+    if len(items) > MAX_ITEMS:
+        return f'⚠️ Забагато книг у пачці (максимум {MAX_ITEMS})'
+    if stat == CHECKOUT and (not name or not surname or not phone):
+        return '⚠️ Заповніть всі поля: ім\'я, прізвище та телефон!'
+    return None
+
+def _circulate(stat, items, name, surname, phone, due):
+    # Уся пачка — одна транзакція; індекс пошуку й версію каталогу оновлюємо після коміту
+    try:
+        if stat == CHECKOUT:
+            results, changed = checkout(db.session, items, name, surname, phone, due or datetime.utcnow())
+        else:
+            results, changed = return_books(db.session, items)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    for row in changed:
+        catalog_index.upsert_row(*row)
+    if changed:
+        catalog_version.bump()
+    return results
+
+@bp.route('/circulation', methods=['GET', 'POST'])
+@login_required
+def circulation():
+    form = request.form
+    if request.method == 'POST':
+        stat = form.get('stat') if form.get('stat') in (CHECKOUT, RETURN) else RETURN
+        try:
+            due = datetime.strptime(form['enddate'], '%Y-%m-%d') if form.get('enddate') else None
+        except ValueError:
+            due = None
+        items = parse_items(form.get('items', ''))
+        name, surname, phone = form.get('buyer', '').strip(), form.get('surname', '').strip(), form.get('phone', '').strip()
+        error = _circulation_error(stat, items, name, surname, phone)
+        if error:
+            flash(error, 'warning')
+            return render_template('circulation.html', form=form)
+        try:
+            results = _circulate(stat, items, name, surname, phone, due)
+        except Exception as e:
+            flash(f'⚠️ Помилка: {str(e)}', 'danger')
+            return render_template('circulation.html', form=form)
+        done = sum(1 for result in results if result['ok'])
+        flash(f"{'✅' if done == len(results) else '⚠️'} Оброблено {done} з {len(results)}",
+              'success' if done == len(results) else 'warning')
+        return render_template('circulation.html', form=form, results=results)
+    return render_template('circulation.html', form=form)
+
+@bp.route('/api/circulation', methods=['POST'])
+@login_required
+def api_circulation():
+    # {"action": "checkout"|"return", "items": [коди або "#id"], "reader": {...}, "due": "РРРР-ММ-ДД"}
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Тіло запиту має бути JSON-об\'єктом'}), 400
+    actions = {'checkout': CHECKOUT, 'return': RETURN}
+    if not isinstance(data.get('action'), str) or data['action'] not in actions:
+        return jsonify({'error': 'action має бути "checkout" або "return"'}), 400
+    items = data.get('items') or []
+    if isinstance(items, str):
+        items = parse_items(items)
+    if not isinstance(items, list) or not all(isinstance(item, (str, int)) and not isinstance(item, bool)
+                                              for item in items):
+        return jsonify({'error': 'items має бути списком кодів або рядком'}), 400
+    reader = data.get('reader') or {}
+    if not isinstance(reader, dict):
+        return jsonify({'error': 'reader має бути об\'єктом з полями name, surname, phone'}), 400
+    try:
+        due = datetime.strptime(data['due'], '%Y-%m-%d') if data.get('due') else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Невірний формат дати, потрібен РРРР-ММ-ДД'}), 400
+    stat = actions[data['action']]
+    items = [str(item).strip() for item in items if str(item).strip()]
+    name, surname, phone = (str(reader.get(key, '')).strip() for key in ('name', 'surname', 'phone'))
+    error = _circulation_error(stat, items, name, surname, phone)
+    if error:
+        return jsonify({'error': error}), 400
+    results = _circulate(stat, items, name, surname, phone, due)
+    return jsonify({'results': results, 'processed': sum(1 for result in results if result['ok'])})
+
+@bp.route('/books/<int:id>/edit', methods=['GET', 'POST'])
+@login_required
+def edit_book(id):
+    book = Book.query.get_or_404(id)
+    if request.method == 'POST':
+        name_book = request.form.get('name_book', '').strip()
+        author = request.form.get('author', '').strip()
+        ean = request.form.get('ean', '').strip()
+        if not name_book or not author:
+            flash('⚠️ Назва книги та автор - обов\'язкові поля!', 'warning')
+            return render_template('edit_book.html', book=book)
+        warning = None
+        if ean != (book.ean or ''):
+            ean13, error, warning = _checked_ean(ean, book.id)
+            if error:
+                flash(error, 'warning')
+                return render_template('edit_book.html', book=book)
+            book.ean13 = ean13
+        old_author = book.author
+        book.name_book = name_book
+        book.author = author
+        book.ean = ean
+        try:
+            if old_author != author:
+                apply_stats(db.session, [book_delta(old_author, book.stat, -1), book_delta(author, book.stat)])
+            db.session.commit()
+            catalog_index.upsert(book)
+            author_index.replace(old_author, author)
+            catalog_version.bump()
+            flash('✅ Книгу успішно оновлено!', 'success')
+            if warning:
+                flash(warning, 'warning')
+            return redirect(f'/books/{book.id}')
+        except Exception as e:
+            db.session.rollback()
+            flash(f'⚠️ Помилка при оновленні: {str(e)}', 'danger')
+            return render_template('edit_book.html', book=book)
+    return render_template('edit_book.html', book=book)
+
+@bp.route('/search_books')
+@catalog_version.conditional
+def search_books():
+    q = request.args.get('q', '').lower()
+    if not q or len(q) < 1:
+        return jsonify({'results': [], 'next_cursor': None, 'fuzzy': False})
+    
+    # Шукаємо книги (перші 10 результатів, далі — за курсором)
+    books, next_cursor, _, fuzzy = _book_page(q, page_size=_page_size(10), with_total=False)
+    
+    # Формуємо результати
+    results = []
+    for book in books:
+        results.append({
+            'id': book.id,
+            'name_book': book.name_book,
+            'author': book.author,
+            'ean': book.ean,
+            'stat': book.stat
+        })
+    
+    return jsonify({'results': results, 'next_cursor': next_cursor, 'fuzzy': fuzzy})
+
+@bp.route('/search_authors')
+@catalog_version.conditional
+def search_authors():
+    q = request.args.get('q', '').lower()
+    if not q or len(q) < 1:
+        return jsonify({'results': []})
+    
+    # Перші 10 авторів зі словника: спершу ті, що починаються з запиту
+    results = [{'author': author} for author in author_index.search(q, limit=10)]
+    
+    return jsonify({'results': results})
+
+@bp.route('/create', methods=['POST', 'GET'])
+@login_required
+def create():
+    if request.method == 'POST':
+        name_book = request.form['name_book']
+        author = request.form['author']
+        ean = request.form['ean']
+        buyer = request.form['buyer']
+        phone = request.form['phone']   
+        stat = request.form['stat']   
+        date_str = request.form.get('date')
+        if date_str:
+            date = datetime.strptime(date_str, '%Y-%m-%d')
+        else:
+            date = datetime.utcnow()
+        ean13, error, warning = _checked_ean(ean)
+        if error:
+            flash(error, 'warning')
+            return render_template('create.html')
+        books = Book(name_book=name_book, author=author, ean=ean, ean13=ean13, buyer=buyer, phone=phone, stat=stat, date=date)
+        try:
+            db.session.add(books)
+            apply_stats(db.session, [book_delta(author, stat)])
+            db.session.commit()
+            catalog_index.upsert(books)
+            author_index.add(books.author)
+            catalog_version.bump()
+            flash('Книгу успішно додано!', 'success')
+            if warning:
+                flash(warning, 'warning')
+            return redirect('/books')
+        except Exception as e:
+            flash(f'При добавленні статті сталася помилка: {str(e)}', 'danger')
+    return render_template('create.html')
+
+@bp.route('/rules')
+def rules():
+    return render_template('rules.html')
+
+@bp.route('/reg', methods=['POST', 'GET'])
+def reg():
+    if request.method == 'POST':
+        name = request.form['name']
+        surname = request.form['surname']
+        phone = request.form['phone']
+        reader = Reader(name=name,surname=surname,phone=phone)
+        try:
+            db.session.add(reader)
+            db.session.commit()
+            catalog_version.bump()
+            return redirect('/books')
+        except Exception as e:
+            flash(f'При добавленні статті сталася помилка: {str(e)}', 'danger')
+    return render_template('reg.html')
+
+@bp.route('/books/<int:id>/del')
+@login_required
+def post_delete(id):
+    if current_user.role != 'superadmin':
+        flash('❌ У вас немає прав на видалення!', 'danger')
+        return redirect('/books')
+    book = Book.query.get_or_404(id)
+    author = book.author
+    try:
+        # Разом з книгою зникає й її історія видач — прибираємо її з лічильників
+        loans = db.session.query(Loan.start, Loan.phone).filter(Loan.book_id == id).all()
+        apply_stats(db.session, [book_delta(author, book.stat, -1)] +
+                    [loan_delta(start, phone, -1) for start, phone in loans])
+        Loan.query.filter_by(book_id=id).delete()
+        db.session.delete(book)
+        db.session.add(Tombstone(table_name='book', row_id=id))
+        db.session.commit()
+        catalog_index.remove(id)
+        author_index.remove(author)
+        catalog_version.bump()
+        flash('✅ Книгу видалено!', 'success')
+    except:
+        flash('❌ Помилка при видаленні', 'danger')
+    return redirect('/books')
+
+@bp.route('/readers/<int:id>/edit', methods=['GET', 'POST'])
+@login_required
+def edit_reader(id):
+    reader = Reader.query.get_or_404(id)
+    
+    if request.method == 'POST':
+        name = request.form.get('name', '').strip()
+        surname = request.form.get('surname', '').strip()
+        phone = request.form.get('phone', '').strip()
+        
+        if not name or not surname or not phone:
+            flash('⚠️ Всі поля обов\'язкові!', 'warning')
+            return render_template('edit_reader.html', reader=reader)
+        
+        # Перевіряємо чи не використовується вже такий телефон іншим читачем
+        existing_reader = Reader.query.filter(Reader.phone == phone, Reader.id != id).first()
+        if existing_reader:
+            flash('⚠️ Читач з таким телефоном вже існує!', 'warning')
+            return render_template('edit_reader.html', reader=reader)
+        
+        old_phone = reader.phone
+        reader.name = name
+        reader.surname = surname
+        reader.phone = phone
+        
+        try:
+            # Оновлюємо телефон у всіх книгах цього читача
+            if old_phone != phone:
+                books = Book.query.filter_by(phone=old_phone).all()
+                for book in books:
+                    book.phone = phone
+                Loan.query.filter_by(phone=old_phone).update({'phone': phone})
+                rename_reader(db.session, old_phone, phone)
+            
+            db.session.commit()
+            catalog_version.bump()
+            flash('✅ Читача успішно оновлено!', 'success')
+            return redirect('/readers')
+        except Exception as e:
+            db.session.rollback()
+            flash(f'⚠️ Помилка при оновленні: {str(e)}', 'danger')
+            return render_template('edit_reader.html', reader=reader)
+    
+    return render_template('edit_reader.html', reader=reader)
+
+@bp.route('/readers/<int:id>/del')
+@login_required
+def reader_delete(id):
+    if current_user.role not in ['admin', 'superadmin']:
+        flash('❌ У вас немає прав на видалення!', 'danger')
+        return redirect('/readers')
+    
+    reader = Reader.query.get_or_404(id)
+    
+    try:
+        db.session.delete(reader)
+        db.session.add(Tombstone(table_name='reader', row_id=id))
+        db.session.commit()
+        catalog_version.bump()
+        flash('✅ Читача видалено!', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'❌ Помилка при видаленні: {str(e)}', 'danger')
+    
+    return redirect('/readers')
+    
+@bp.route('/search_reader')
+@login_required
+@catalog_version.conditional
+def search_reader():
+    q = request.args.get('q', '')
+    if not q:
+        return {'results': [], 'next_cursor': None}
+    rows, next_cursor, _ = _reader_page(q, page_size=_page_size(5))
+    results = []
+    for r in (row.Reader for row in rows):
+        results.append({'name': r.name, 'surname': r.surname, 'phone': r.phone})
+    return {'results': results, 'next_cursor': next_cursor}
@@ -0,0 +1,46 @@
+"""Розбір застарілого поля Book.history у записи видач.
+
+Формат, який писав change() до появи таблиці loan (найновіші першими):
+    "Ім'я (телефон) - з 01.02.2026 до 15.02.2026 | ..."
+Замість телефону чи дати могло стояти "Немає".
+
+Усі такі видачі вже завершені: якщо дату повернення прочитати не вдалося,
+returned_at дорівнює моменту розбору, щоб запис не вважався відкритою видачею.
+"""
+import re
+from datetime import datetime
+
+_ENTRY_RE = re.compile(r'^(?P<reader>.*) \((?P<phone>[^()]*)\) - з (?P<start>\S+) до (?P<end>\S+)$')
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%d.%m.%Y')
+    except ValueError:
+        return None
+
+
+def parse_history(history):
+    """Список словників (reader, phone, start, due, returned_at) від найстаріших до найновіших."""
+    loans = []
+    now = datetime.utcnow()
+    for entry in (history or '').split(' | '):
+        entry = entry.strip()
+        if not entry:
+            continue
+        match = _ENTRY_RE.match(entry)
+        if match is None:
+            # Нестандартний запис зберігаємо як є, без дат
+            loans.append({'reader': entry, 'phone': '', 'start': None, 'due': None, 'returned_at': now})
+            continue
+        phone = match.group('phone')
+        end = _parse_date(match.group('end'))
+        loans.append({
+            'reader': match.group('reader').strip(),
+            'phone': '' if phone == 'Немає' else phone,
+            'start': _parse_date(match.group('start')),
+            'due': end,
+            'returned_at': end or now,
+        })
+    loans.reverse()
+    return loans
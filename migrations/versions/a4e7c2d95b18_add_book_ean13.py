@@ -0,0 +1,114 @@
+"""Add normalized Book.ean13 with a unique index for barcode lookups
+
+Revision ID: a4e7c2d95b18
+Revises: d9b2e64f1c30
+Create Date: 2026-10-18 21:05:43.218640
+
+Existing rows are backfilled from Book.ean. Books whose code is already
+taken by a book with a lower id keep ean13 = NULL and are listed in the
+migration output.
+
+The normalization and backfill are a frozen copy of barcodes.py as of this
+revision, written against sa.table() stubs, so later changes to the
+application code or models cannot change what this migration does.
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# Копія нормалізації й заповнення з barcodes.py на момент міграції
+_SEPARATORS = re.compile(r'[\s\-‐‑–—.]+')
+
+
+def _ean13_check_digit(digits12):
+    total = sum(int(digit) * (3 if pos % 2 else 1) for pos, digit in enumerate(digits12))
+    return str((10 - total % 10) % 10)
+
+
+def _isbn10_valid(code):
+    total = sum((10 - pos) * (10 if char == 'X' else int(char)) for pos, char in enumerate(code))
+    return total % 11 == 0
+
+
+def _normalize_ean(value):
+    if value is None:
+        return None
+    code = _SEPARATORS.sub('', str(value)).upper()
+    if code.startswith('ISBN'):
+        code = code[4:].lstrip(':')
+    if len(code) == 10 and code[:9].isdigit() and (code[9].isdigit() or code[9] == 'X'):
+        if not _isbn10_valid(code):
+            return None
+        code = '978' + code[:9]
+        return code + _ean13_check_digit(code)
+    if not code.isdigit():
+        return None
+    if len(code) == 12:
+        code = '0' + code
+    if len(code) != 13 or _ean13_check_digit(code[:12]) != code[12]:
+        return None
+    return code
+
+
+def _backfill(connection, book_table, chunk_size=1000):
+    # Код лишається за книгою з меншим id; повертає (оновлено, [(id, ean, id власника)])
+    owners = {}
+    conflicts = []
+    wanted = {}
+    released = []
+    rows = connection.execute(
+        sa.select(book_table.c.id, book_table.c.ean, book_table.c.ean13).order_by(book_table.c.id))
+    for book_id, ean, current in rows:
+        code = _normalize_ean(ean)
+        if code is not None:
+            owner = owners.setdefault(code, book_id)
+            if owner != book_id:
+                conflicts.append((book_id, ean, owner))
+                code = None
+        if code != current:
+            wanted[book_id] = code
+            if current is not None:
+                released.append(book_id)
+
+    stmt = sa.update(book_table).where(book_table.c.id == sa.bindparam('b_id')) \
+        .values(ean13=sa.bindparam('b_ean13'))
+    for params in ([{'b_id': book_id, 'b_ean13': None} for book_id in released],
+                   [{'b_id': book_id, 'b_ean13': code} for book_id, code in wanted.items() if code is not None]):
+        for start in range(0, len(params), chunk_size):
+            connection.execute(stmt, params[start:start + chunk_size])
+    return len(wanted), conflicts
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4e7c2d95b18'
+down_revision = 'd9b2e64f1c30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    # Таблицю book могла вже створити команда flask init-db (db.create_all) — разом з колонкою
+    if 'ean13' not in {column['name'] for column in inspector.get_columns('book')}:
+        with op.batch_alter_table('book', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('ean13', sa.String(length=13), nullable=True))
+    if 'ix_book_ean13' not in {index['name'] for index in inspector.get_indexes('book')}:
+        with op.batch_alter_table('book', schema=None) as batch_op:
+            batch_op.create_index('ix_book_ean13', ['ean13'], unique=True)
+
+    book = sa.table('book', sa.column('id', sa.Integer()), sa.column('ean', sa.Text()),
+                    sa.column('ean13', sa.String(13)))
+    updated, conflicts = _backfill(op.get_bind(), book)
+    print(f'📚 EAN-13 заповнено для {updated} книг')
+    if conflicts:
+        print(f'⚠️ Конфлікти EAN ({len(conflicts)}) — код лишився за книгою з меншим id:')
+        for book_id, ean, owner in conflicts:
+            print(f'   книга {book_id}: "{ean}" вже має книга {owner}')
+
+
+def downgrade():
+    with op.batch_alter_table('book', schema=None) as batch_op:
+        batch_op.drop_index('ix_book_ean13')
+        batch_op.drop_column('ean13')
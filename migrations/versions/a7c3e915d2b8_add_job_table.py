@@ -0,0 +1,43 @@
+"""Add Job table for background import/restore/export
+
+Revision ID: a7c3e915d2b8
+Revises: f2d7c81a4b36
+Create Date: 2026-10-18 14:05:12.418803
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e915d2b8'
+down_revision = 'f2d7c81a4b36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Таблицю могла вже створити команда flask init-db (db.create_all)
+    if 'job' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table('job',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('processed', sa.Integer(), nullable=False),
+        sa.Column('total', sa.Integer(), nullable=True),
+        sa.Column('error_count', sa.Integer(), nullable=False),
+        sa.Column('errors', sa.Text(), nullable=True),
+        sa.Column('message', sa.Text(), nullable=True),
+        sa.Column('result_path', sa.String(length=500), nullable=True),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('job')
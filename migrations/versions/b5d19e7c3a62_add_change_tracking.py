@@ -0,0 +1,56 @@
+"""Add updated_at columns and Tombstone table for delta backups
+
+Revision ID: b5d19e7c3a62
+Revises: a7c3e915d2b8
+Create Date: 2026-10-18 15:12:40.926117
+
+Existing rows get updated_at = migration time, so the first delta after the
+upgrade conservatively includes everything.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d19e7c3a62'
+down_revision = 'a7c3e915d2b8'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ('book', 'loan', 'reader', 'user')
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    for table in TABLES:
+        # На новій базі колонку вже створила команда flask init-db (db.create_all)
+        if 'updated_at' in {column['name'] for column in inspector.get_columns(table)}:
+            continue
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+            batch_op.create_index(f'ix_{table}_updated_at', ['updated_at'], unique=False)
+        op.execute(f'UPDATE "{table}" SET updated_at = CURRENT_TIMESTAMP')
+
+    if 'tombstone' not in inspector.get_table_names():
+        op.create_table('tombstone',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('table_name', sa.String(length=20), nullable=False),
+            sa.Column('row_id', sa.Integer(), nullable=False),
+            sa.Column('deleted_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('tombstone', schema=None) as batch_op:
+            batch_op.create_index('ix_tombstone_deleted_at', ['deleted_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tombstone', schema=None) as batch_op:
+        batch_op.drop_index('ix_tombstone_deleted_at')
+    op.drop_table('tombstone')
+
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{table}_updated_at')
+            batch_op.drop_column('updated_at')
@@ -0,0 +1,29 @@
+"""Add CatalogVersion.reset_version so in-memory indexes know when to rebuild
+
+Revision ID: b8d2f4a6c1e3
+Revises: f7b3d8e2a9c4
+Create Date: 2026-10-19 10:14:52.380117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8d2f4a6c1e3'
+down_revision = 'f7b3d8e2a9c4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Колонку могла вже створити команда flask init-db (db.create_all)
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('catalog_version')}
+    if 'reset_version' not in columns:
+        with op.batch_alter_table('catalog_version', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('reset_version', sa.BigInteger(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('catalog_version', schema=None) as batch_op:
+        batch_op.drop_column('reset_version')
@@ -0,0 +1,84 @@
+"""Add full-text search indexes for books and readers
+
+Revision ID: c3f1a9d27e54
+Revises: b994ee69bee2
+Create Date: 2026-10-18 10:12:41.508113
+
+PostgreSQL: pg_trgm GIN indexes (work for ILIKE '%...%').
+SQLite: FTS5 external-content tables with trigram tokenizer + triggers.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f1a9d27e54'
+down_revision = 'b994ee69bee2'
+branch_labels = None
+depends_on = None
+
+
+FTS_TABLES = {
+    'book_fts': ('book', ('name_book', 'author', 'ean')),
+    'reader_fts': ('reader', ('name', 'surname', 'phone')),
+}
+
+
+def _create_sqlite_fts(fts_table, source_table, columns):
+    cols = ', '.join(columns)
+    new_values = ', '.join(f'new.{col}' for col in columns)
+    old_values = ', '.join(f'old.{col}' for col in columns)
+
+    op.execute(f"""
+        CREATE VIRTUAL TABLE {fts_table} USING fts5(
+            {cols}, content='{source_table}', content_rowid='id', tokenize='trigram'
+        )
+    """)
+    op.execute(f"""
+        CREATE TRIGGER {fts_table}_ai AFTER INSERT ON {source_table} BEGIN
+            INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_values});
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER {fts_table}_ad AFTER DELETE ON {source_table} BEGIN
+            INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.id, {old_values});
+        END
+    """)
+    op.execute(f"""
+        CREATE TRIGGER {fts_table}_au AFTER UPDATE OF {cols} ON {source_table} BEGIN
+            INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.id, {new_values});
+        END
+    """)
+    # Заповнюємо індекс наявними рядками
+    op.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute("""
+            CREATE INDEX IF NOT EXISTS ix_book_search_trgm ON book
+            USING gin (name_book gin_trgm_ops, author gin_trgm_ops, ean gin_trgm_ops)
+        """)
+        op.execute("""
+            CREATE INDEX IF NOT EXISTS ix_reader_search_trgm ON reader
+            USING gin (name gin_trgm_ops, surname gin_trgm_ops, phone gin_trgm_ops)
+        """)
+    elif dialect == 'sqlite':
+        for fts_table, (source_table, columns) in FTS_TABLES.items():
+            _create_sqlite_fts(fts_table, source_table, columns)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_reader_search_trgm')
+        op.execute('DROP INDEX IF EXISTS ix_book_search_trgm')
+    elif dialect == 'sqlite':
+        for fts_table in FTS_TABLES:
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute(f'DROP TRIGGER IF EXISTS {fts_table}_{suffix}')
+            op.execute(f'DROP TABLE IF EXISTS {fts_table}')
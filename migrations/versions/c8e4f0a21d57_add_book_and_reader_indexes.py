@@ -0,0 +1,41 @@
+"""Add indexes for book status/phone/due date and reader phone lookups
+
+Revision ID: c8e4f0a21d57
+Revises: b5d19e7c3a62
+Create Date: 2026-10-18 16:02:18.371904
+
+benchmarks/check_query_plans.py checks that route queries use them.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8e4f0a21d57'
+down_revision = 'b5d19e7c3a62'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('book', 'ix_book_stat_id', ['stat', 'id']),
+    ('book', 'ix_book_phone_stat', ['phone', 'stat']),
+    ('book', 'ix_book_stat_enddate', ['stat', 'enddate']),
+    ('reader', 'ix_reader_phone', ['phone']),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table, name, columns in INDEXES:
+        # На новій базі індекси вже створила команда flask init-db (db.create_all)
+        if name in {index['name'] for index in inspector.get_indexes(table)}:
+            continue
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.create_index(name, columns, unique=False)
+
+
+def downgrade():
+    for table, name, columns in reversed(INDEXES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(name)
@@ -0,0 +1,32 @@
+"""Add Job.owner and Job.heartbeat_at to detect jobs orphaned by a dead worker
+
+Revision ID: c9e1a7b5d3f2
+Revises: b8d2f4a6c1e3
+Create Date: 2026-10-19 11:02:37.846210
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9e1a7b5d3f2'
+down_revision = 'b8d2f4a6c1e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Колонки могла вже створити команда flask init-db (db.create_all)
+    columns = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('job')}
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        if 'owner' not in columns:
+            batch_op.add_column(sa.Column('owner', sa.String(length=100), nullable=True))
+        if 'heartbeat_at' not in columns:
+            batch_op.add_column(sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.drop_column('heartbeat_at')
+        batch_op.drop_column('owner')
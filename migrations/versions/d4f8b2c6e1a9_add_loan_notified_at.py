@@ -0,0 +1,58 @@
+"""Add Loan.notified_at so overdue notices are tracked per loan
+
+Revision ID: d4f8b2c6e1a9
+Revises: c9e1a7b5d3f2
+Create Date: 2026-10-19 14:26:51.308417
+
+Open loans that the old due-date window (scheduled_task.watermark) already
+covered are marked as notified, so upgrading does not resend their notices.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f8b2c6e1a9'
+down_revision = 'c9e1a7b5d3f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    # Колонку й індекс могла вже створити команда flask init-db (db.create_all)
+    columns = {column['name'] for column in inspector.get_columns('loan')}
+    indexes = {index['name'] for index in inspector.get_indexes('loan')}
+    with op.batch_alter_table('loan', schema=None) as batch_op:
+        if 'notified_at' not in columns:
+            batch_op.add_column(sa.Column('notified_at', sa.DateTime(), nullable=True))
+        if 'ix_loan_open_due' not in indexes:
+            batch_op.create_index('ix_loan_open_due', ['returned_at', 'notified_at', 'due'], unique=False)
+
+    # Копія таблиць на момент міграції
+    task = sa.table('scheduled_task',
+        sa.column('name', sa.String()),
+        sa.column('watermark', sa.DateTime()),
+    )
+    loan = sa.table('loan',
+        sa.column('start', sa.DateTime()),
+        sa.column('due', sa.DateTime()),
+        sa.column('returned_at', sa.DateTime()),
+        sa.column('notified_at', sa.DateTime()),
+    )
+    watermark = bind.execute(sa.select(task.c.watermark).where(task.c.name == 'overdue_notices')).scalar()
+    if watermark is None:
+        return
+    # Старий планувальник надсилав нагадування, коли термін потрапляв у його діапазон,
+    # тож лише видачі, що існували до терміну; видані заднім числом нагадування не отримали
+    bind.execute(sa.update(loan).where(
+        loan.c.returned_at.is_(None), loan.c.notified_at.is_(None),
+        loan.c.due < watermark, loan.c.start <= loan.c.due,
+    ).values(notified_at=watermark))
+
+
+def downgrade():
+    with op.batch_alter_table('loan', schema=None) as batch_op:
+        batch_op.drop_index('ix_loan_open_due')
+        batch_op.drop_column('notified_at')
@@ -0,0 +1,39 @@
+"""Add CatalogVersion table for ETag / conditional GET
+
+Revision ID: d9b2e64f1c30
+Revises: c8e4f0a21d57
+Create Date: 2026-10-18 18:40:27.551093
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9b2e64f1c30'
+down_revision = 'c8e4f0a21d57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Таблицю могла вже створити команда flask init-db (db.create_all)
+    if 'catalog_version' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table('catalog_version',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('version', sa.BigInteger(), nullable=False),
+            sa.Column('changed_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    # Єдиний рядок лічильника (id = 1)
+    catalog_version = sa.table('catalog_version', sa.column('id', sa.Integer()),
+                               sa.column('version', sa.BigInteger()), sa.column('changed_at', sa.DateTime()))
+    if op.get_bind().execute(sa.select(catalog_version.c.id).where(catalog_version.c.id == 1)).first() is None:
+        op.bulk_insert(catalog_version, [{'id': 1, 'version': 1, 'changed_at': datetime.utcnow()}])
+
+
+def downgrade():
+    op.drop_table('catalog_version')
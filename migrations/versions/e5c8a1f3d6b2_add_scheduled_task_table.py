@@ -0,0 +1,33 @@
+"""Add ScheduledTask table for the overdue notice scheduler
+
+Revision ID: e5c8a1f3d6b2
+Revises: a4e7c2d95b18
+Create Date: 2026-10-18 22:17:09.604512
+
+The overdue queue itself reads ix_book_stat_enddate (c8e4f0a21d57).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5c8a1f3d6b2'
+down_revision = 'a4e7c2d95b18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Таблицю могла вже створити команда flask init-db (db.create_all)
+    if 'scheduled_task' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table('scheduled_task',
+            sa.Column('name', sa.String(length=50), nullable=False),
+            sa.Column('watermark', sa.DateTime(), nullable=True),
+            sa.Column('last_run_at', sa.DateTime(), nullable=True),
+            sa.Column('last_count', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('name')
+        )
+
+
+def downgrade():
+    op.drop_table('scheduled_task')
@@ -0,0 +1,49 @@
+"""Add case-insensitive Ukrainian sort index for readers
+
+Revision ID: e8a4b2c19f07
+Revises: c3f1a9d27e54
+Create Date: 2026-10-18 11:03:27.194655
+
+PostgreSQL only: expression index matching ORDER BY in readers()
+(lower(surname), lower(name) with ICU collation "uk-x-icu", then id).
+SQLite sorts through the 'uk' collation registered by the app and needs no index.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e8a4b2c19f07'
+down_revision = 'c3f1a9d27e54'
+branch_labels = None
+depends_on = None
+
+
+COLLATION = 'uk-x-icu'
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    has_collation = bind.execute(
+        sa.text('SELECT 1 FROM pg_collation WHERE collname = :name'), {'name': COLLATION}
+    ).scalar()
+    if not has_collation:
+        # PostgreSQL зібрано без ICU — додаток має працювати з READER_COLLATION=''
+        print(f'⚠️ Колація "{COLLATION}" недоступна, індекс сортування читачів не створено')
+        return
+
+    op.execute(f"""
+        CREATE INDEX IF NOT EXISTS ix_reader_sort ON reader (
+            lower(surname) COLLATE "{COLLATION}",
+            lower(name) COLLATE "{COLLATION}",
+            id
+        )
+    """)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_reader_sort')
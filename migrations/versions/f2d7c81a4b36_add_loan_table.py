@@ -0,0 +1,132 @@
+"""Add Loan table and move Book.history into it
+
+Revision ID: f2d7c81a4b36
+Revises: e8a4b2c19f07
+Create Date: 2026-10-18 12:20:54.733019
+
+Existing "buyer (phone) - з dd.mm.yyyy до dd.mm.yyyy | ..." strings are parsed
+into closed loans; books that are currently issued get an open loan built from
+buyer/surname/phone/date/enddate. Book.history itself is kept (read-only) so
+older backups and tools that still expect the column keep working.
+"""
+import re
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2d7c81a4b36'
+down_revision = 'e8a4b2c19f07'
+branch_labels = None
+depends_on = None
+
+
+# Копія розбору з loan_history.py на момент міграції
+_ENTRY_RE = re.compile(r'^(?P<reader>.*) \((?P<phone>[^()]*)\) - з (?P<start>\S+) до (?P<end>\S+)$')
+BATCH_SIZE = 1000
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%d.%m.%Y')
+    except ValueError:
+        return None
+
+
+def _parse_history(book_id, history, now):
+    rows = []
+    for entry in (history or '').split(' | '):
+        entry = entry.strip()
+        if not entry:
+            continue
+        match = _ENTRY_RE.match(entry)
+        if match is None:
+            rows.append({'book_id': book_id, 'reader': entry[:200], 'surname': '', 'phone': '',
+                         'start': None, 'due': None, 'returned_at': now})
+            continue
+        phone = match.group('phone')
+        end = _parse_date(match.group('end'))
+        rows.append({
+            'book_id': book_id,
+            'reader': match.group('reader').strip()[:200],
+            'surname': '',
+            'phone': '' if phone == 'Немає' else phone[:50],
+            'start': _parse_date(match.group('start')),
+            'due': end,
+            'returned_at': end or now,
+        })
+    rows.reverse()
+    return rows
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # Таблицю могла вже створити команда flask init-db (db.create_all)
+    if 'loan' not in sa.inspect(bind).get_table_names():
+        op.create_table('loan',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('book_id', sa.Integer(), nullable=False),
+            sa.Column('reader', sa.String(length=200), nullable=False),
+            sa.Column('surname', sa.String(length=200), nullable=False),
+            sa.Column('phone', sa.String(length=50), nullable=False),
+            sa.Column('start', sa.DateTime(), nullable=True),
+            sa.Column('due', sa.DateTime(), nullable=True),
+            sa.Column('returned_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['book_id'], ['book.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('loan', schema=None) as batch_op:
+            batch_op.create_index('ix_loan_book_start', ['book_id', 'start'], unique=False)
+            batch_op.create_index('ix_loan_phone_start', ['phone', 'start'], unique=False)
+            batch_op.create_index('ix_loan_start', ['start'], unique=False)
+
+    loan = sa.table('loan',
+        sa.column('book_id', sa.Integer()),
+        sa.column('reader', sa.String()),
+        sa.column('surname', sa.String()),
+        sa.column('phone', sa.String()),
+        sa.column('start', sa.DateTime()),
+        sa.column('due', sa.DateTime()),
+        sa.column('returned_at', sa.DateTime()),
+    )
+    if bind.execute(sa.text('SELECT COUNT(*) FROM loan')).scalar():
+        # Історію вже перенесено (або додаток встиг записати видачі)
+        return
+
+    # Переносимо історію з рядків book.history
+    now = datetime.utcnow()
+    book = sa.table('book',
+        sa.column('id', sa.Integer()),
+        sa.column('history', sa.Text()),
+        sa.column('buyer', sa.String()),
+        sa.column('surname', sa.String()),
+        sa.column('phone', sa.String()),
+        sa.column('stat', sa.String()),
+        sa.column('date', sa.DateTime()),
+        sa.column('enddate', sa.DateTime()),
+    )
+    books = bind.execute(sa.select(book).order_by(book.c.id))
+    batch = []
+    for book in books:
+        batch.extend(_parse_history(book.id, book.history, now))
+        if book.stat == 'видана' and book.buyer:
+            batch.append({'book_id': book.id, 'reader': book.buyer, 'surname': book.surname or '',
+                          'phone': book.phone or '', 'start': book.date, 'due': book.enddate,
+                          'returned_at': None})
+        if len(batch) >= BATCH_SIZE:
+            op.bulk_insert(loan, batch)
+            batch = []
+    if batch:
+        op.bulk_insert(loan, batch)
+
+
+def downgrade():
+    with op.batch_alter_table('loan', schema=None) as batch_op:
+        batch_op.drop_index('ix_loan_start')
+        batch_op.drop_index('ix_loan_phone_start')
+        batch_op.drop_index('ix_loan_book_start')
+
+    op.drop_table('loan')
@@ -0,0 +1,67 @@
+"""Add StatCounter table for the statistics dashboard
+
+Revision ID: f7b3d8e2a9c4
+Revises: e5c8a1f3d6b2
+Create Date: 2026-10-18 23:12:07.531904
+
+Counters are filled from the existing books and loans. The recount is a
+frozen copy of stats.rebuild as of this revision, written against
+sa.table() stubs, so later changes to the models or to stats.py cannot
+change what this migration does.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7b3d8e2a9c4'
+down_revision = 'e5c8a1f3d6b2'
+branch_labels = None
+depends_on = None
+
+CHUNK_SIZE = 1000
+
+
+# Копія перерахунку з stats.py на момент міграції
+def _rebuild(connection):
+    book = sa.table('book', sa.column('stat', sa.String()), sa.column('author', sa.String()))
+    loan = sa.table('loan', sa.column('start', sa.DateTime()), sa.column('phone', sa.String()))
+    counter = sa.table('stat_counter', sa.column('kind', sa.String()), sa.column('name', sa.String()),
+                       sa.column('value', sa.Integer()))
+    day = sa.func.date(loan.c.start)
+    groups = [
+        ('stat', sa.select(book.c.stat, sa.func.count()).group_by(book.c.stat)),
+        ('author', sa.select(book.c.author, sa.func.count()).group_by(book.c.author)),
+        ('day', sa.select(day, sa.func.count()).where(loan.c.start.isnot(None)).group_by(day)),
+        ('reader', sa.select(loan.c.phone, sa.func.count()).where(loan.c.phone != '').group_by(loan.c.phone)),
+    ]
+    rows = []
+    for kind, query in groups:
+        rows.extend({'kind': kind, 'name': str(name), 'value': count}
+                    for name, count in connection.execute(query) if name is not None)
+    connection.execute(sa.delete(counter))
+    for start in range(0, len(rows), CHUNK_SIZE):
+        connection.execute(sa.insert(counter), rows[start:start + CHUNK_SIZE])
+    return len(rows)
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    # Таблицю могла вже створити команда flask init-db (db.create_all)
+    if 'stat_counter' not in inspector.get_table_names():
+        op.create_table('stat_counter',
+            sa.Column('kind', sa.String(length=20), nullable=False),
+            sa.Column('name', sa.String(length=500), nullable=False),
+            sa.Column('value', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('kind', 'name')
+        )
+        with op.batch_alter_table('stat_counter', schema=None) as batch_op:
+            batch_op.create_index('ix_stat_counter_kind_value', ['kind', 'value'], unique=False)
+
+    print(f'📊 Лічильників статистики: {_rebuild(op.get_bind())}')
+
+
+def downgrade():
+    with op.batch_alter_table('stat_counter', schema=None) as batch_op:
+        batch_op.drop_index('ix_stat_counter_kind_value')
+    op.drop_table('stat_counter')
@@ -0,0 +1,130 @@
+"""Моделі бази даних.
+
+Об'єкт db не прив'язаний до застосунку: create_app() (app.py) викликає
+db.init_app(app), тож імпорт моделей не відкриває з'єднань з базою.
+"""
+from datetime import datetime
+
+from flask_login import UserMixin
+from flask_sqlalchemy import SQLAlchemy
+from werkzeug.security import generate_password_hash, check_password_hash
+
+db = SQLAlchemy()
+
+# Моделі
+class Reader(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(200), nullable=False)
+    surname = db.Column(db.String(200), nullable=False)
+    phone = db.Column(db.String(50), nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        db.Index('ix_reader_phone', 'phone'),      # пошук читача за телефоном при видачі й редагуванні
+    )
+
+class User(UserMixin, db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False) 
+    password_hash = db.Column(db.String(200), nullable=False)
+    role = db.Column(db.String(20), default='admin')  
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+    def set_password(self, password):
+        self.password_hash = generate_password_hash(password)
+    
+    def check_password(self, password):
+        return check_password_hash(self.password_hash, password)
+
+class Book(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name_book = db.Column(db.String(500), nullable=False)  # ✅ Збільшено з 100 до 500
+    author = db.Column(db.String(500), nullable=False)     # ✅ Збільшено з 100 до 500
+    surname = db.Column(db.String(200), default='')        # ✅ Збільшено з 100 до 200
+    ean = db.Column(db.Text, default='-')
+    ean13 = db.Column(db.String(13))                       # EAN як ввели -> перевірений EAN-13 (barcodes.py)
+    buyer = db.Column(db.String(200), nullable=False)      # ✅ Збільшено з 100 до 200
+    phone = db.Column(db.String(50), nullable=False)       # ✅ Збільшено з 20 до 50
+    stat = db.Column(db.String(20), nullable=False)
+    date = db.Column(db.DateTime, default=datetime.utcnow)
+    enddate = db.Column(db.DateTime, default=datetime.utcnow)
+    history = db.Column(db.Text, default='')               # ⚠️ Застаріле: історія тепер у таблиці loan
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        db.Index('ix_book_stat_id', 'stat', 'id'),            # /booked, /notbook: фільтр + курсор за id
+        db.Index('ix_book_phone_stat', 'phone', 'stat'),      # видані книги читача (EXISTS у /readers)
+        db.Index('ix_book_stat_enddate', 'stat', 'enddate'),  # видані книги за терміном повернення
+        db.Index('ix_book_ean13', 'ean13', unique=True),      # сканер штрихкодів: /api/ean/<code>
+    )
+
+class Loan(db.Model):
+    # Одна видача книги читачу; returned_at = None — книга ще у читача
+    id = db.Column(db.Integer, primary_key=True)
+    book_id = db.Column(db.Integer, db.ForeignKey('book.id', ondelete='CASCADE'), nullable=False)
+    reader = db.Column(db.String(200), nullable=False, default='')
+    surname = db.Column(db.String(200), nullable=False, default='')
+    phone = db.Column(db.String(50), nullable=False, default='')
+    start = db.Column(db.DateTime, default=datetime.utcnow)
+    due = db.Column(db.DateTime)
+    returned_at = db.Column(db.DateTime)
+    # Коли читачу надіслано нагадування про прострочення (overdue.py); None — ще ні
+    notified_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+    __table_args__ = (
+        db.Index('ix_loan_book_start', 'book_id', 'start'),
+        db.Index('ix_loan_phone_start', 'phone', 'start'),
+        db.Index('ix_loan_start', 'start'),
+        # Відкриті видачі без нагадування за терміном — черга OverdueNotifier
+        db.Index('ix_loan_open_due', 'returned_at', 'notified_at', 'due'),
+    )
+
+class Tombstone(db.Model):
+    # Запис про видалений рядок — щоб дельта-бекап міг передати видалення
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(20), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+class Job(db.Model):
+    # Фонове завдання; стан оновлює JobRunner (jobs.py)
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer)
+    error_count = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(db.Text, default='')
+    message = db.Column(db.Text, default='')
+    result_path = db.Column(db.String(500))
+    created_by = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    owner = db.Column(db.String(100))       # хост:pid воркера, що виконує завдання
+    heartbeat_at = db.Column(db.DateTime)   # останній сигнал від нього; давній — воркер зник
+
+class CatalogVersion(db.Model):
+    # Лічильник змін каталогу (книги, читачі, видачі) для ETag; один рядок з id = 1
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=1)
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    reset_version = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')  # остання повна заміна каталогу
+
+class ScheduledTask(db.Model):
+    # Стан періодичного завдання (overdue.py): час і результат останнього запуску
+    name = db.Column(db.String(50), primary_key=True)
+    watermark = db.Column(db.DateTime)
+    last_run_at = db.Column(db.DateTime)
+    last_count = db.Column(db.Integer, nullable=False, default=0)
+
+class StatCounter(db.Model):
+    # Лічильник панелі статистики (stats.py): вид + назва -> значення; оновлюється разом зі змінами
+    kind = db.Column(db.String(20), primary_key=True)
+    name = db.Column(db.String(500), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_stat_counter_kind_value', 'kind', 'value'),  # топ авторів і читачів
+    )
@@ -0,0 +1,241 @@
+"""Прострочені видачі: черга для /overdue і періодичні нагадування читачам.
+
+Прострочена книга — видана, термін повернення (Book.enddate) якої минув
+до початку сьогоднішньої доби. Жодна частина не читає всю таблицю:
+
+  * overdue_page() — сторінка черги за терміном (найдовше прострочені
+    першими), keyset-курсор (enddate, id); діапазон індексу
+    ix_book_stat_enddate (stat = 'видана' AND enddate < межа);
+  * OverdueNotifier — потік у кожному воркері; раз на
+    OVERDUE_NOTIFY_INTERVAL секунд бере відкриті прострочені видачі без
+    нагадування (Loan.notified_at IS NULL, індекс ix_loan_open_due), групує
+    їх за телефоном читача і передає пачками відправнику
+    (OVERDUE_SENDER: 'log', 'file' або 'модуль:фабрика').
+
+Видачу забирає умовний UPDATE ... SET notified_at WHERE notified_at IS NULL
+RETURNING id — кожну лише один воркер, тож нагадування не дублюються, а
+видачі, оформлені заднім числом чи відновлені з бекапу, теж їх отримують.
+Нагадування надсилається не більше одного разу: якщо відправник впав,
+видачі вже позначено (див. журнал). У scheduled_task лишається час і
+результат останнього запуску.
+"""
+import json
+import logging
+import os
+import threading
+from collections import namedtuple
+from datetime import datetime, time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import insert, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import import_string
+
+from pagination import decode_cursor, split_page
+
+logger = logging.getLogger(__name__)
+
+ISSUED = 'видана'
+TASK_NAME = 'overdue_notices'
+# Скільки повідомлень (читачів) передавати відправнику за один виклик
+NOTICE_BATCH = 100
+# Скільки видач позначати одним UPDATE
+CLAIM_BATCH = 500
+
+OverdueBook = namedtuple('OverdueBook', 'id name_book due')
+Notice = namedtuple('Notice', 'phone reader books')
+
+
+def overdue_cutoff(now=None):
+    """Початок поточної доби: книги з терміном раніше за нього прострочені."""
+    return datetime.combine((now or datetime.utcnow()).date(), time.min)
+
+
+def days_overdue(due, cutoff):
+    return (cutoff.date() - due.date()).days
+
+
+# ====== ЧЕРГА ======
+def _overdue_query(session, book_model, cutoff):
+    Book = book_model
+    return session.query(Book.id, Book.name_book, Book.author, Book.ean, Book.buyer, Book.surname,
+                         Book.phone, Book.enddate) \
+        .filter(Book.stat == ISSUED, Book.enddate < cutoff)
+
+
+def overdue_page(session, book_model, cutoff, cursor, page_size):
+    """Сторінка прострочених книг за (enddate, id) і курсор наступної сторінки."""
+    Book = book_model
+    query = _overdue_query(session, book_model, cutoff)
+    values = decode_cursor(cursor)
+    if values is not None and len(values) == 2:
+        try:
+            after = (datetime.fromisoformat(values[0]), int(values[1]))
+        except (TypeError, ValueError):
+            after = None
+        if after is not None:
+            query = query.filter(tuple_(Book.enddate, Book.id) > tuple_(*after))
+    rows = query.order_by(Book.enddate, Book.id).limit(page_size + 1).all()
+    return split_page(rows, page_size, lambda row: [row.enddate.isoformat(), row.id])
+
+
+def count_overdue(session, book_model, cutoff):
+    return _overdue_query(session, book_model, cutoff).order_by(None).count()
+
+
+# ====== ВІДПРАВНИКИ ======
+def log_sender(app):
+    """Нагадування в журнал застосунку (за замовчуванням)."""
+    def send(notices):
+        for notice in notices:
+            logger.info('Прострочено: %s (%s) — %s', notice.reader, notice.phone,
+                        '; '.join(f'«{book.name_book}» до {book.due:%d.%m.%Y}' for book in notice.books))
+    return send
+
+
+def file_sender(app):
+    """Нагадування рядками JSON у instance/overdue_notices.jsonl (або OVERDUE_NOTICE_FILE)."""
+    path = app.config.get('OVERDUE_NOTICE_FILE') or os.path.join(app.instance_path, 'overdue_notices.jsonl')
+
+    def send(notices):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            for notice in notices:
+                f.write(json.dumps({
+                    'phone': notice.phone,
+                    'reader': notice.reader,
+                    'books': [{'id': book.id, 'name_book': book.name_book, 'due': book.due.date().isoformat()}
+                              for book in notice.books],
+                    'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+                }, ensure_ascii=False) + '\n')
+    return send
+
+
+SENDERS = {'log': log_sender, 'file': file_sender}
+
+
+def load_sender(app):
+    """Відправник за OVERDUE_SENDER: фабрика(app) повертає send(notices)."""
+    spec = app.config['OVERDUE_SENDER']
+    factory = SENDERS.get(spec) or import_string(spec)
+    return factory(app)
+
+
+# ====== ПЛАНУВАЛЬНИК ======
+class OverdueNotifier:
+    def __init__(self, db, book_model, loan_model, task_model):
+        self.app = None
+        self.db = db
+        self.Book = book_model
+        self.Loan = loan_model
+        self.task_table = task_model.__table__
+        self.interval = 0
+        self.send = None
+        self._lock = threading.Lock()
+        self._pid = None
+        self._stop = threading.Event()
+
+    def init_app(self, app):
+        self.app = app
+        self.interval = app.config['OVERDUE_NOTIFY_INTERVAL']
+        self.send = load_sender(app)
+        app.extensions['overdue_notifier'] = self
+        app.cli.add_command(notify_overdue_command)
+        if self.interval > 0:
+            # Потік стартує з першим запитом воркера — майстер gunicorn (preload) його не запускає
+            app.before_request(self._ensure_started)
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop = threading.Event()
+            threading.Thread(target=self._loop, args=(self._stop,), name='overdue-notifier', daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self, stop):
+        while True:
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception('Нагадування про прострочені книги не надіслано')
+            if stop.wait(self.interval):
+                return
+
+    def _claim(self, cutoff, now):
+        # Позначає прострочені видачі без нагадування; повертає id, які забрав саме цей воркер
+        loan = self.Loan.__table__
+        candidates = select(loan.c.id).where(
+            loan.c.returned_at.is_(None), loan.c.notified_at.is_(None), loan.c.due < cutoff)
+        with self.db.engine.connect() as conn:
+            loan_ids = list(conn.execute(candidates.order_by(loan.c.due, loan.c.id)).scalars())
+        claimed = []
+        for start in range(0, len(loan_ids), CLAIM_BATCH):
+            with self.db.engine.begin() as conn:
+                # Інший воркер міг позначити частину пачки між SELECT і UPDATE
+                claimed.extend(conn.execute(
+                    update(loan).where(loan.c.id.in_(loan_ids[start:start + CLAIM_BATCH]),
+                                       loan.c.notified_at.is_(None))
+                    .values(notified_at=now).returning(loan.c.id)).scalars())
+        return claimed
+
+    def _notices(self, loan_ids):
+        # Нагадування за телефоном читача; у кожному — книги в порядку терміну
+        Book, loan = self.Book.__table__, self.Loan.__table__
+        by_phone = {}
+        with self.db.engine.connect() as conn:
+            for start in range(0, len(loan_ids), CLAIM_BATCH):
+                query = select(loan.c.id, loan.c.reader, loan.c.surname, loan.c.phone, loan.c.due,
+                               Book.c.id.label('book_id'), Book.c.name_book) \
+                    .join(Book, Book.c.id == loan.c.book_id) \
+                    .where(loan.c.id.in_(loan_ids[start:start + CLAIM_BATCH]))
+                for row in conn.execute(query.order_by(loan.c.due, loan.c.id)):
+                    notice = by_phone.get(row.phone)
+                    if notice is None:
+                        reader = f'{row.reader} {row.surname}'.strip()
+                        notice = by_phone[row.phone] = Notice(row.phone, reader, [])
+                    notice.books.append(OverdueBook(row.book_id, row.name_book, row.due))
+        return list(by_phone.values())
+
+    def _record(self, cutoff, now, count):
+        # Час і результат останнього запуску — у scheduled_task
+        table = self.task_table
+        with self.db.engine.begin() as conn:
+            values = {'watermark': cutoff, 'last_run_at': now, 'last_count': count}
+            if conn.execute(update(table).where(table.c.name == TASK_NAME).values(**values)).rowcount:
+                return
+        try:
+            with self.db.engine.begin() as conn:
+                conn.execute(insert(table).values(name=TASK_NAME, **values))
+        except IntegrityError:
+            # Рядок щойно додав інший воркер
+            pass
+
+    def run_once(self, now=None):
+        """Один запуск: надсилає нагадування про нові прострочення; повертає кількість читачів."""
+        now = now or datetime.utcnow()
+        cutoff = overdue_cutoff(now)
+        with self.app.app_context():
+            loan_ids = self._claim(cutoff, now)
+            notices = self._notices(loan_ids) if loan_ids else []
+            for start in range(0, len(notices), NOTICE_BATCH):
+                self.send(notices[start:start + NOTICE_BATCH])
+            self._record(cutoff, now, len(notices))
+            if notices:
+                logger.info('Нагадування про прострочені книги: %s читачів', len(notices))
+            return len(notices)
+
+
+@click.command('notify-overdue')
+@with_appcontext
+def notify_overdue_command():
+    """Надіслати нагадування про прострочені книги зараз (наприклад, з cron)."""
+    sent = current_app.extensions['overdue_notifier'].run_once()
+    print(f"📨 Нагадувань надіслано: {sent}")
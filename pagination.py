@@ -0,0 +1,59 @@
+"""Keyset-пагінація (курсором) для списків книг і читачів.
+
+Курсор — непрозорий рядок із ключем сортування останнього рядка сторінки.
+Наступна сторінка вибирається умовою (k1, k2, ...) > (v1, v2, ...), тож
+база йде індексом від потрібного місця замість OFFSET чи читання всієї таблиці.
+"""
+import base64
+import json
+
+from sqlalchemy import tuple_
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Значення ключа з курсору або None, якщо курсору немає чи він пошкоджений."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return values if isinstance(values, list) and values else None
+
+
+def page_size_from(args, default, maximum):
+    try:
+        size = int(args.get('per_page', default))
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, maximum))
+
+
+def keyset_page(query, order_columns, key, cursor, page_size):
+    """Одна сторінка запиту за ключем order_columns.
+
+    key(row) повертає значення ключа для рядка (у порядку order_columns).
+    Повертає (rows, next_cursor); next_cursor=None на останній сторінці.
+    """
+    values = decode_cursor(cursor)
+    if values is not None and len(values) == len(order_columns):
+        if len(order_columns) == 1:
+            query = query.filter(order_columns[0] > values[0])
+        else:
+            query = query.filter(tuple_(*order_columns) > tuple_(*values))
+    rows = query.order_by(*order_columns).limit(page_size + 1).all()
+    return split_page(rows, page_size, key)
+
+
+def split_page(rows, page_size, key):
+    # Запитуємо page_size + 1 рядків: зайвий означає, що є наступна сторінка
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, encode_cursor(key(rows[-1]))
+    return rows, None
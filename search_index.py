@@ -0,0 +1,309 @@
+"""Інвертований триграмний індекс каталогу в пам'яті воркера.
+
+Індекс тримає тільки поля, які потрібні спискам і автопідказкам
+(id, назва, автор, EAN, статус), тож пошук не створює ORM-об'єктів.
+Семантика збігається зі старим пошуком: підрядок без урахування регістру
+у назві, авторі або EAN. Поруч тримається словник слів назви й автора
+(fuzzy.TokenIndex) для нечіткого пошуку з рангуванням за схожістю.
+
+Кожен воркер тримає власну копію, тож зміни, зроблені іншими процесами,
+індекс доганяє за версією каталогу (http_cache.CatalogState): якщо вона
+випередила версію, до якої індекс синхронізовано, перед пошуком він
+дочитує книги, змінені після попередньої синхронізації (Book.updated_at),
+і прибирає видалені (tombstone). Після відновлення з бекапу (reset_version),
+надто великої дельти або якщо кількість книг не зійшлася з базою індекс
+будується заново.
+"""
+import bisect
+import heapq
+import threading
+import time
+from array import array
+from collections import namedtuple
+from datetime import datetime, timedelta
+from itertools import islice
+
+from fuzzy import TokenIndex, layout_variants, words
+
+BookHit = namedtuple('BookHit', 'id name_book author ean stat')
+
+# Роздільник полів: не трапляється у запитах, тож триграми через межу полів
+# ніколи не збігаються із запитом
+_FIELD_SEP = '\x1f'
+
+# Дельта читається з запасом: транзакція могла записати updated_at до початку
+# попередньої синхронізації, а закомітитись після неї (і годинники хостів різняться)
+SYNC_OVERLAP = timedelta(minutes=1)
+# Більшу дельту (частка каталогу) дешевше перебудувати, ніж вставляти по одній книзі
+SYNC_MAX_SHARE = 0.1
+SYNC_MIN_ROWS = 1000
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _contains(sorted_ids, book_id):
+    pos = bisect.bisect_left(sorted_ids, book_id)
+    return pos < len(sorted_ids) and sorted_ids[pos] == book_id
+
+
+class CatalogIndex:
+    def __init__(self, loader, max_age=0, changes=None, state=None, on_use=None):
+        # loader() повертає ітерацію кортежів (id, name_book, author, ean, stat);
+        # changes(since) — (такі ж кортежі книг, змінених з since, id видалених книг, книг усього);
+        # state() — поточна версія каталогу (CatalogState) або None
+        self._loader = loader
+        self._max_age = max_age
+        self._changes = changes
+        self._state = state
+        # on_use(version) — після кожної синхронізації перед пошуком (ETag відповіді)
+        self._on_use = on_use
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._records = {}
+        self._texts = {}
+        self._ids = array('q')
+        self._postings = {}
+        self._words = TokenIndex()
+        self._book_words = {}
+        self.built_at = None
+        # Версія каталогу, до якої індекс синхронізовано, і початок останньої синхронізації (UTC)
+        self.version = None
+        self._synced_at = None
+
+    @property
+    def is_built(self):
+        return self.built_at is not None
+
+    def __len__(self):
+        return len(self._records)
+
+    # ====== ПОБУДОВА ======
+    def rebuild(self, state=None):
+        with self._lock:
+            self._reset()
+            # Версію й час фіксуємо до читання: зміни під час побудови дочитає наступна синхронізація
+            synced_at = datetime.utcnow()
+            # Масова побудова: спершу звичайні списки, потім компактні масиви
+            postings = {}
+            for book_id, name_book, author, ean, stat in sorted(self._loader(), key=lambda row: row[0]):
+                text = self._store(book_id, name_book, author, ean, stat)
+                self._ids.append(book_id)
+                for gram in _trigrams(text):
+                    posting = postings.get(gram)
+                    if posting is None:
+                        postings[gram] = [book_id]
+                    else:
+                        posting.append(book_id)
+            self._postings = {gram: array('q', ids) for gram, ids in postings.items()}
+            self.built_at = time.monotonic()
+            self.version = state.version if state is not None else None
+            self._synced_at = synced_at
+
+    def ensure_built(self):
+        """Будує індекс або доганяє зміни інших процесів перед пошуком."""
+        state = self._state() if self._state is not None else None
+        with self._lock:
+            stale = (self._max_age and self.built_at is not None
+                     and time.monotonic() - self.built_at > self._max_age)
+            if not self.is_built or stale:
+                self.rebuild(state)
+            elif state is not None and (self.version is None or state.version > self.version):
+                if self.version is None or state.reset_version > self.version or self._changes is None:
+                    self.rebuild(state)
+                else:
+                    self._sync(state)
+            version = self.version
+        if self._on_use is not None:
+            self._on_use(version)
+
+    def _sync(self, state):
+        synced_at = datetime.utcnow()
+        rows, deleted, total = self._changes(self._synced_at - SYNC_OVERLAP)
+        if len(rows) + len(deleted) > max(SYNC_MIN_ROWS, len(self._records) * SYNC_MAX_SHARE):
+            self.rebuild(state)
+            return
+        present = set()
+        for book_id, name_book, author, ean, stat in rows:
+            present.add(book_id)
+            if book_id in self._records:
+                self._discard(book_id)
+            self._add(book_id, name_book, author, ean, stat)
+        for book_id in deleted:
+            if book_id not in present and book_id in self._records:
+                self._discard(book_id)
+        if len(self._records) != total:
+            # Книги видаляли в обхід застосунку (без tombstone) — дельта не все бачить
+            self.rebuild(state)
+            return
+        self.version = state.version
+        self._synced_at = synced_at
+
+    def invalidate(self):
+        with self._lock:
+            self._reset()
+
+    # ====== ІНКРЕМЕНТАЛЬНІ ЗМІНИ ======
+    def upsert(self, book):
+        self.upsert_row(book.id, book.name_book, book.author, book.ean, book.stat)
+
+    def upsert_row(self, book_id, name_book, author, ean, stat):
+        with self._lock:
+            if not self.is_built:
+                # Індекс ще не побудовано — зміна потрапить у першу побудову
+                return
+            if book_id in self._records:
+                self._discard(book_id)
+            self._add(book_id, name_book, author, ean, stat)
+
+    def remove(self, book_id):
+        with self._lock:
+            if self.is_built and book_id in self._records:
+                self._discard(book_id)
+
+    def _store(self, book_id, name_book, author, ean, stat):
+        name_book, author, ean = name_book or '', author or '', ean or ''
+        self._records[book_id] = BookHit(book_id, name_book, author, ean, stat)
+        text = _FIELD_SEP.join((name_book.lower(), author.lower(), ean.lower()))
+        self._texts[book_id] = text
+        book_words = self._book_words[book_id] = tuple(set(words(name_book) + words(author)))
+        for word in book_words:
+            self._words.add(word, book_id)
+        return text
+
+    def _add(self, book_id, name_book, author, ean, stat):
+        text = self._store(book_id, name_book, author, ean, stat)
+        self._insort(self._ids, book_id)
+        for gram in _trigrams(text):
+            posting = self._postings.get(gram)
+            if posting is None:
+                posting = self._postings[gram] = array('q')
+            self._insort(posting, book_id)
+
+    def _discard(self, book_id):
+        del self._records[book_id]
+        text = self._texts.pop(book_id)
+        for word in self._book_words.pop(book_id):
+            self._words.discard(word, book_id)
+        self._remove_sorted(self._ids, book_id)
+        for gram in _trigrams(text):
+            posting = self._postings[gram]
+            self._remove_sorted(posting, book_id)
+            if not posting:
+                del self._postings[gram]
+
+    @staticmethod
+    def _insort(sorted_ids, book_id):
+        # Нові книги майже завжди мають найбільший id — дописуємо в кінець
+        if not sorted_ids or sorted_ids[-1] < book_id:
+            sorted_ids.append(book_id)
+        else:
+            bisect.insort(sorted_ids, book_id)
+
+    @staticmethod
+    def _remove_sorted(sorted_ids, book_id):
+        pos = bisect.bisect_left(sorted_ids, book_id)
+        if pos < len(sorted_ids) and sorted_ids[pos] == book_id:
+            del sorted_ids[pos]
+
+    # ====== ПОШУК ======
+    def _iter_matches(self, q, stat, after):
+        # Викликається під self._lock; віддає збіги за зростанням id
+        if len(q) < 3:
+            # Для 1-2 символів триграм немає — перебираємо компактні рядки
+            postings, others = [self._ids], []
+        else:
+            postings = []
+            for gram in _trigrams(q):
+                posting = self._postings.get(gram)
+                if posting is None:
+                    return
+                postings.append(posting)
+            # Йдемо найкоротшим списком і ліниво перевіряємо решту —
+            # з limit пошук зупиняється після перших збігів
+            postings.sort(key=len)
+            others = postings[1:]
+
+        start = 0 if after is None else bisect.bisect_right(postings[0], after)
+        for pos in range(start, len(postings[0])):
+            book_id = postings[0][pos]
+            if others and not all(_contains(posting, book_id) for posting in others):
+                continue
+            hit = self._records[book_id]
+            if stat is not None and hit.stat != stat:
+                continue
+            if q in self._texts[book_id]:
+                yield hit
+
+    def search(self, query, stat=None, limit=None, after=None):
+        """Книги, де query є підрядком назви, автора або EAN, за зростанням id.
+
+        after — id останньої книги попередньої сторінки (keyset-пагінація).
+        """
+        q = query.lower()
+        if not q:
+            return []
+        self.ensure_built()
+        with self._lock:
+            return list(islice(self._iter_matches(q, stat, after), limit))
+
+    def count(self, query, stat=None):
+        q = query.lower()
+        if not q:
+            return 0
+        self.ensure_built()
+        with self._lock:
+            return sum(1 for _ in self._iter_matches(q, stat, None))
+
+    # ====== НЕЧІТКИЙ ПОШУК ======
+    def _fuzzy_scores(self, query):
+        # Викликається під self._lock; {id книги: схожість}, кожне слово запиту має знайтись
+        query_words = words(query)
+        per_word = []
+        for pos, word in enumerate(query_words):
+            # Останнє слово ще може набиратися — порівнюємо і як префікс
+            best = {}
+            for candidate, similarity in self._words.similar(word, prefix=pos == len(query_words) - 1):
+                for book_id in self._words.postings(candidate):
+                    if similarity > best.get(book_id, 0.0):
+                        best[book_id] = similarity
+            if not best:
+                return {}
+            per_word.append(best)
+        if not per_word:
+            return {}
+
+        per_word.sort(key=len)
+        scores = {}
+        for book_id, similarity in per_word[0].items():
+            total = similarity
+            for other in per_word[1:]:
+                other_similarity = other.get(book_id)
+                if other_similarity is None:
+                    break
+                total += other_similarity
+            else:
+                scores[book_id] = total / len(per_word)
+        return scores
+
+    def fuzzy_search(self, query, stat=None, limit=10):
+        """Книги, схожі на query за словами назви й автора, від найсхожіших.
+
+        Допускає опечатки, транслітерацію та набір не в тій розкладці;
+        рівні за схожістю — за зростанням id.
+        """
+        self.ensure_built()
+        with self._lock:
+            scores = {}
+            for variant in layout_variants(query):
+                for book_id, score in self._fuzzy_scores(variant).items():
+                    if score > scores.get(book_id, 0.0):
+                        scores[book_id] = score
+            if stat is not None:
+                scores = {book_id: score for book_id, score in scores.items()
+                          if self._records[book_id].stat == stat}
+            ranked = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+            return [self._records[book_id] for book_id, _ in ranked]
@@ -0,0 +1,92 @@
+// ====== АВТОПІДКАЗКИ ======
+// Спільний модуль для всіх полів із підказками: затримка вводу, запит до
+// JSON-ендпоінту (/search_books, /search_authors, /search_reader), список під
+// полем і закриття при кліку поза ним. Поле описується атрибутами:
+//   data-autocomplete="catalog|book|author|reader" — вид підказок (AUTOCOMPLETE у pages.js)
+//   data-suggestions="<id>"                         — елемент для списку підказок
+
+function escapeHtml(value) {
+    return String(value ?? '').replace(/[&<>"']/g, ch => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    })[ch]);
+}
+
+function attachAutocomplete(input, box, options) {
+    const {url, minLength = 1, delay = 300, filter, render, onSelect, emptyText} = options;
+    let timeout = null;
+    let controller = null;
+
+    function hide() {
+        box.style.display = 'none';
+    }
+
+    function show(results) {
+        const items = filter ? results.filter(filter) : results;
+        box.innerHTML = '';
+
+        if (items.length === 0) {
+            const text = emptyText ? emptyText(results) : null;
+            if (!text) {
+                hide();
+                return;
+            }
+            const empty = document.createElement('div');
+            empty.className = 'suggestion-empty';
+            empty.textContent = text;
+            box.appendChild(empty);
+        }
+
+        items.forEach(item => {
+            const div = document.createElement('div');
+            div.className = 'suggestion-item';
+            div.innerHTML = render(item);
+            div.addEventListener('click', () => {
+                hide();
+                onSelect(item);
+            });
+            box.appendChild(div);
+        });
+        box.style.display = 'block';
+    }
+
+    input.addEventListener('input', () => {
+        clearTimeout(timeout);
+        const query = input.value.trim();
+
+        if (query.length < minLength) {
+            hide();
+            return;
+        }
+
+        timeout = setTimeout(() => {
+            // Відповідь на попередній запит уже не потрібна
+            if (controller) {
+                controller.abort();
+            }
+            controller = new AbortController();
+            fetch(`${url}?q=${encodeURIComponent(query)}`, {signal: controller.signal})
+                .then(response => response.json())
+                .then(data => show(data.results || []))
+                .catch(error => {
+                    if (error.name !== 'AbortError') {
+                        console.error('Помилка пошуку:', error);
+                        hide();
+                    }
+                });
+        }, delay);
+    });
+
+    // Показуємо підказки знову при фокусі на полі
+    input.addEventListener('focus', () => {
+        if (input.value.trim().length >= minLength && box.innerHTML) {
+            box.style.display = 'block';
+        }
+    });
+
+    // Закриваємо підказки при кліку поза полем
+    document.addEventListener('click', event => {
+        if (!input.contains(event.target) && !box.contains(event.target)) {
+            hide();
+        }
+    });
+}
@@ -0,0 +1,90 @@
+// ====== ПОВЕДІНКА СТОРІНОК ======
+// Підключається на всіх сторінках (base.html) і шукає свої елементи за data-атрибутами.
+
+const STATUS_LABELS = {
+    'доступна': '<span class="suggestion-status status-available">✅ Доступна</span>',
+    'видана': '<span class="suggestion-status status-issued">📕 Видана</span>'
+};
+
+function renderBook(book) {
+    return `
+        <div class="suggestion-title">📖 ${escapeHtml(book.name_book)} ${STATUS_LABELS[book.stat] || ''}</div>
+        <div class="suggestion-details">✍️ ${escapeHtml(book.author)} | 🔢 ${escapeHtml(book.ean)}</div>
+    `;
+}
+
+// Види підказок: input — поле з data-autocomplete
+const AUTOCOMPLETE = {
+    // Пошук у списках книг: перехід на сторінку книги; data-stat — лише книги з цим статусом
+    catalog: input => ({
+        url: '/search_books',
+        filter: input.dataset.stat ? book => book.stat === input.dataset.stat : null,
+        render: renderBook,
+        onSelect: book => { window.location.href = `/books/${book.id}`; },
+        emptyText: results => results.length && input.dataset.emptyFiltered
+            ? input.dataset.emptyFiltered : 'Нічого не знайдено'
+    }),
+    // Додавання книги: заповнює назву, автора й EAN існуючої книги
+    book: input => ({
+        url: '/search_books',
+        minLength: 2,
+        render: renderBook,
+        onSelect: book => {
+            input.value = book.name_book;
+            input.form.elements.author.value = book.author;
+            input.form.elements.ean.value = book.ean;
+        }
+    }),
+    author: input => ({
+        url: '/search_authors',
+        render: item => `✍️ ${escapeHtml(item.author)}`,
+        onSelect: item => { input.value = item.author; }
+    }),
+    // Видача книги: заповнює ім'я, прізвище й телефон наявного читача
+    reader: input => ({
+        url: '/search_reader',
+        minLength: 2,
+        render: r => `${escapeHtml(r.name)} ${escapeHtml(r.surname)} (${escapeHtml(r.phone)})`,
+        onSelect: r => {
+            input.value = r.name;
+            input.form.elements.surname.value = r.surname;
+            input.form.elements.phone.value = r.phone;
+        }
+    })
+};
+
+document.querySelectorAll('[data-autocomplete]').forEach(input => {
+    const box = document.getElementById(input.dataset.suggestions);
+    attachAutocomplete(input, box, AUTOCOMPLETE[input.dataset.autocomplete](input));
+});
+
+// Картки списків відкривають свою сторінку (кнопки й посилання всередині — ні)
+document.addEventListener('click', event => {
+    const card = event.target.closest('[data-href]');
+    if (card && !event.target.closest('a, button, [data-no-nav]')) {
+        window.location.href = card.dataset.href;
+    }
+});
+
+// Поля читача потрібні лише тоді, коли книгу видають (create.html, change.html)
+document.querySelectorAll('select[data-reader-toggle]').forEach(select => {
+    const fields = document.querySelectorAll('[data-reader-field]');
+    function toggle() {
+        const hidden = select.value === 'доступна';
+        fields.forEach(field => {
+            field.style.display = hidden ? 'none' : '';
+            if (hidden && 'clearHidden' in select.dataset) {
+                field.querySelectorAll('input').forEach(input => { input.value = ''; });
+            }
+        });
+    }
+    toggle();
+    select.addEventListener('change', toggle);
+});
+
+// Сьогоднішня дата за замовчуванням
+document.querySelectorAll('input[type="date"][data-default-today]').forEach(input => {
+    if (!input.value) {
+        input.value = new Date().toISOString().split('T')[0];
+    }
+});
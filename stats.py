@@ -0,0 +1,168 @@
+"""Панель статистики (/stats) на лічильниках, які оновлюються разом із даними.
+
+Замість COUNT/GROUP BY по всьому каталогу на кожен перегляд кожна зміна
+книг і видач додає свою різницю до рядків stat_counter у тій самій
+транзакції, тож панель читає кілька рядків незалежно від розміру каталогу:
+
+  * 'stat'   — книги за станом (доступна / видана), сума — весь каталог;
+  * 'author' — книги автора;
+  * 'day'    — видачі за день (РРРР-ММ-ДД);
+  * 'reader' — видачі за телефоном читача.
+
+Різниці збираються в Counter: book_delta() / loan_delta() для кожної
+зміненої книги чи видачі, apply() записує їх одним upsert. Відновлення з
+бекапу перераховує лічильники з нуля (rebuild()); те саме робить
+flask rebuild-stats, якщо дані змінювали в обхід застосунку.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import db, Book, Loan, Reader, StatCounter
+
+STAT = 'stat'
+AUTHOR = 'author'
+DAY = 'day'
+READER = 'reader'
+# Рядків за один INSERT при перерахунку
+CHUNK_SIZE = 1000
+
+
+# ====== РІЗНИЦІ ======
+def book_delta(author, stat, sign=1):
+    """Книга додана (sign=1) або прибрана (sign=-1) з лічильників."""
+    delta = Counter()
+    delta[(STAT, stat)] += sign
+    delta[(AUTHOR, author)] += sign
+    return delta
+
+
+def loan_delta(start, phone, sign=1):
+    """Видача, що почалася start, читачу з телефоном phone."""
+    delta = Counter()
+    if start is not None:
+        delta[(DAY, start.date().isoformat())] += sign
+    if phone:
+        delta[(READER, phone)] += sign
+    return delta
+
+
+def _dialect(executor):
+    # Session (get_bind) або Connection (міграція)
+    bind = executor.get_bind() if hasattr(executor, 'get_bind') else executor
+    return bind.dialect.name
+
+
+def apply(executor, deltas):
+    """Додає суму різниць до лічильників (INSERT ... ON CONFLICT DO UPDATE)."""
+    total = Counter()
+    for delta in deltas:
+        # update(), а не "+": Counter.__add__ відкидає від'ємні значення
+        total.update(delta)
+    # Сталий порядок рядків — паралельні транзакції блокують їх в одному порядку
+    rows = [{'kind': kind, 'name': name, 'value': value}
+            for (kind, name), value in sorted(total.items()) if value]
+    if not rows:
+        return
+    dialect = _dialect(executor)
+    if dialect == 'postgresql':
+        stmt = postgresql.insert(StatCounter.__table__)
+    elif dialect == 'sqlite':
+        stmt = sqlite.insert(StatCounter.__table__)
+    else:
+        raise NotImplementedError(f'Upsert не підтримується для {dialect}')
+    stmt = stmt.on_conflict_do_update(index_elements=['kind', 'name'],
+                                      set_={'value': StatCounter.__table__.c.value + stmt.excluded.value})
+    executor.execute(stmt, rows)
+
+
+def rename_reader(executor, old_phone, new_phone):
+    """Видачі читача перейшли на новий телефон — переносимо його лічильник."""
+    counter = StatCounter.__table__
+    count = executor.execute(select(counter.c.value).where(
+        counter.c.kind == READER, counter.c.name == old_phone)).scalar() or 0
+    apply(executor, [Counter({(READER, old_phone): -count, (READER, new_phone): count})])
+
+
+# ====== ПЕРЕРАХУНОК ======
+def rebuild(executor):
+    """Перераховує всі лічильники з таблиць book і loan; повертає кількість рядків."""
+    book, loan, counter = Book.__table__, Loan.__table__, StatCounter.__table__
+    day = func.date(loan.c.start)
+    groups = [
+        (STAT, select(book.c.stat, func.count()).group_by(book.c.stat)),
+        (AUTHOR, select(book.c.author, func.count()).group_by(book.c.author)),
+        # date() дає 'РРРР-ММ-ДД' у SQLite і date у PostgreSQL — str() зводить до одного вигляду
+        (DAY, select(day, func.count()).where(loan.c.start.isnot(None)).group_by(day)),
+        (READER, select(loan.c.phone, func.count()).where(loan.c.phone != '').group_by(loan.c.phone)),
+    ]
+    rows = []
+    for kind, query in groups:
+        rows.extend({'kind': kind, 'name': str(name), 'value': count}
+                    for name, count in executor.execute(query) if name is not None)
+    executor.execute(delete(counter))
+    for start in range(0, len(rows), CHUNK_SIZE):
+        executor.execute(insert(counter), rows[start:start + CHUNK_SIZE])
+    return len(rows)
+
+
+@click.command('rebuild-stats')
+@with_appcontext
+def rebuild_stats_command():
+    """Перерахувати лічильники панелі статистики з книг і видач."""
+    count = rebuild(db.session)
+    db.session.commit()
+    print(f"📊 Лічильників статистики: {count}")
+
+
+# ====== ЧИТАННЯ ======
+def book_count(session, stat=None):
+    """Кількість книг (усього або в стані stat) — з лічильників, без COUNT по каталогу."""
+    query = select(func.coalesce(func.sum(StatCounter.value), 0)).where(StatCounter.kind == STAT)
+    if stat is not None:
+        query = query.where(StatCounter.name == stat)
+    return session.execute(query).scalar()
+
+
+def _top(session, kind, limit):
+    return session.execute(
+        select(StatCounter.name, StatCounter.value)
+        .where(StatCounter.kind == kind, StatCounter.value > 0)
+        .order_by(StatCounter.value.desc()).limit(limit)).all()
+
+
+def dashboard(session, days=30, top=10, today=None):
+    """Дані панелі: книги за станом, видачі за останні days днів, топ авторів і читачів."""
+    by_stat = dict(session.execute(
+        select(StatCounter.name, StatCounter.value).where(StatCounter.kind == STAT)).all())
+
+    today = today or datetime.utcnow().date()
+    first = today - timedelta(days=days - 1)
+    per_day = dict(session.execute(
+        select(StatCounter.name, StatCounter.value)
+        .where(StatCounter.kind == DAY, StatCounter.name >= first.isoformat())).all())
+    loans_per_day = [(first + timedelta(days=offset), per_day.get((first + timedelta(days=offset)).isoformat(), 0))
+                     for offset in range(days)]
+
+    readers = _top(session, READER, top)
+    # Імена читачів — за телефонами з топу (ix_reader_phone); видалений читач лишається телефоном
+    names = {}
+    if readers:
+        for reader in session.execute(select(Reader.phone, Reader.name, Reader.surname)
+                                      .where(Reader.phone.in_([phone for phone, _ in readers]))):
+            names.setdefault(reader.phone, f'{reader.name} {reader.surname}'.strip())
+
+    return {
+        'total': sum(by_stat.values()),
+        'available': by_stat.get('доступна', 0),
+        'issued': by_stat.get('видана', 0),
+        'loans_per_day': loans_per_day,
+        'loans_in_period': sum(count for _, count in loans_per_day),
+        'max_per_day': max([count for _, count in loans_per_day] + [1]),
+        'top_authors': _top(session, AUTHOR, top),
+        'top_readers': [(phone, names.get(phone, ''), count) for phone, count in readers],
+    }